@@ -15,6 +15,8 @@ Welcome to the OCR Benchmark Dashboard! This tool helps analyze and visualize OC
 ### Available Pages:
 - **Performance Metrics**: View detailed performance metrics, costs, and latency analysis
 - **Test Results**: View detailed test results
+- **Run Comparison**: Compare two runs document by document to find regressions
+- **Trends**: Follow each model's accuracy, cost and latency across all runs
 
 Choose a page from the sidebar to get started.
 """
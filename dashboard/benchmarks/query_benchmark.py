@@ -0,0 +1,303 @@
+"""EXPLAIN and latency benchmark for the dashboard's database loaders.
+
+Meant for a local Postgres whose schema was created with `npx prisma db push`
+(plus the optional files in prisma/sql). It can fill the database with
+synthetic runs, then calls each loader repeatedly, records its latency, and
+prints the EXPLAIN (ANALYZE, BUFFERS) plan of every SQL statement the loader
+issued. Run it before and after a schema or index change to compare plans and
+timings:
+
+    DATABASE_URL=postgresql://localhost/benchmark \\
+        python dashboard/benchmarks/query_benchmark.py --seed-runs 200 --results-per-run 2000
+    python dashboard/benchmarks/query_benchmark.py --repeat 20 --no-explain
+    python dashboard/benchmarks/query_benchmark.py --clean
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.sql import text
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.data_loader import (  # noqa: E402
+    load_run_list,
+    load_results_for_run,
+    load_one_result,
+    load_result_ids_for_run,
+    load_results_page_for_run,
+)
+
+SYNTHETIC_DESCRIPTION = "synthetic query benchmark data"
+
+SEED_RUNS_SQL = """
+    INSERT INTO benchmark_runs (
+        id, timestamp, status, description, models_config, total_documents,
+        created_at, completed_at
+    )
+    SELECT
+        gen_random_uuid(),
+        to_char(
+            timestamp '2020-01-01' + (g || ' minutes')::interval,
+            'YYYY-MM-DD-HH24-MI-SS'
+        ),
+        'completed',
+        :description,
+        '{"models": []}'::jsonb,
+        :results_per_run,
+        timestamp '2020-01-01' + (g || ' minutes')::interval,
+        timestamp '2020-01-01' + (g || ' minutes')::interval
+    FROM generate_series(:first_run, :last_run) g
+    RETURNING id
+"""
+
+SEED_RESULTS_SQL = """
+    INSERT INTO benchmark_results (
+        id, benchmark_run_id, file_url, ocr_model, extraction_model,
+        direct_image_extraction, levenshtein_distance, json_accuracy,
+        json_diff_stats, metadata, usage, error
+    )
+    SELECT
+        gen_random_uuid(),
+        :run_id,
+        'https://example.com/documents/' || g || '.png',
+        (ARRAY['gpt-4o', 'gemini-2.0-flash-001', 'mistral-ocr'])[1 + g % 3],
+        'gpt-4o',
+        g % 7 = 0,
+        random(),
+        random(),
+        jsonb_build_object(
+            'additions', diff % 3,
+            'deletions', diff % 2,
+            'modifications', diff - diff % 3 - diff % 2,
+            'total', diff
+        ),
+        '{"language": "EN", "documentQuality": "clean"}'::jsonb,
+        jsonb_build_object(
+            'duration', 2000 + random() * 8000,
+            'totalCost', random() / 100,
+            'ocr', jsonb_build_object(
+                'duration', 1000 + random() * 5000,
+                'totalCost', random() / 200,
+                'inputTokens', (random() * 2000)::int,
+                'outputTokens', (random() * 1000)::int
+            ),
+            'extraction', jsonb_build_object(
+                'duration', 500 + random() * 3000,
+                'totalCost', random() / 200,
+                'inputTokens', (random() * 3000)::int,
+                'outputTokens', (random() * 500)::int
+            )
+        ),
+        CASE WHEN g % 50 = 0 THEN '"timeout"' END
+    FROM generate_series(1, :results_per_run) g,
+        LATERAL (SELECT (random() * 6)::int AS diff) d
+"""
+
+SEED_PAYLOADS_SQL = """
+    INSERT INTO benchmark_result_payloads (
+        result_id, json_schema, true_markdown, predicted_markdown, true_json,
+        predicted_json, json_diff, full_json_diff, json_accuracy_result
+    )
+    SELECT
+        bres.id,
+        '{"type": "object"}'::jsonb,
+        repeat('| item | quantity | price |' || chr(10), 200),
+        repeat('| item | qty | price |' || chr(10), 200),
+        '{"total": "10.00", "items": [{"name": "a"}]}'::jsonb,
+        '{"total": "10.50", "items": [{"name": "a"}]}'::jsonb,
+        '{"total": {"__old": "10.00", "__new": "10.50"}}'::jsonb,
+        '{"total": {"__old": "10.00", "__new": "10.50"}}'::jsonb,
+        '{"totalFields": 2}'::jsonb
+    FROM benchmark_results bres
+    WHERE bres.benchmark_run_id = :run_id
+"""
+
+
+def seed(engine: Engine, runs: int, results_per_run: int) -> None:
+    """Insert synthetic completed runs with results and payloads"""
+    with engine.begin() as conn:
+        existing = conn.execute(
+            text("SELECT count(*) FROM benchmark_runs WHERE description = :d"),
+            {"d": SYNTHETIC_DESCRIPTION},
+        ).scalar()
+        run_ids = [
+            row.id
+            for row in conn.execute(
+                text(SEED_RUNS_SQL),
+                {
+                    "description": SYNTHETIC_DESCRIPTION,
+                    "results_per_run": results_per_run,
+                    "first_run": existing + 1,
+                    "last_run": existing + runs,
+                },
+            )
+        ]
+
+    for index, run_id in enumerate(run_ids, start=1):
+        with engine.begin() as conn:
+            params = {"run_id": run_id, "results_per_run": results_per_run}
+            conn.execute(text(SEED_RESULTS_SQL), params)
+            conn.execute(text(SEED_PAYLOADS_SQL), params)
+        print(f"Seeded run {index}/{len(run_ids)}", end="\r", flush=True)
+
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    print(f"Seeded {len(run_ids)} runs x {results_per_run} results")
+
+
+def clean(engine: Engine, description: str = SYNTHETIC_DESCRIPTION) -> None:
+    """Delete the synthetic runs created by seed()"""
+    with engine.begin() as conn:
+        run_filter = "SELECT id FROM benchmark_runs WHERE description = :description"
+        params = {"description": description}
+        conn.execute(
+            text(
+                f"""
+                DELETE FROM benchmark_result_payloads WHERE result_id IN (
+                    SELECT id FROM benchmark_results
+                    WHERE benchmark_run_id IN ({run_filter})
+                )
+            """
+            ),
+            params,
+        )
+        for table in ("benchmark_run_model_stats", "benchmark_results"):
+            conn.execute(
+                text(f"DELETE FROM {table} WHERE benchmark_run_id IN ({run_filter})"),
+                params,
+            )
+        conn.execute(
+            text(f"DELETE FROM benchmark_runs WHERE id IN ({run_filter})"), params
+        )
+    print("Removed synthetic benchmark runs")
+
+
+class StatementRecorder:
+    """Captures the SQL statements issued by any SQLAlchemy engine"""
+
+    def __init__(self):
+        self.statements: List[Tuple[str, Any]] = []
+        event.listen(Engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        # Skip the dialect's connection setup queries (version, schema, ...)
+        if "benchmark_" in statement:
+            self.statements.append((statement, parameters))
+
+    def close(self) -> None:
+        event.remove(Engine, "before_cursor_execute", self._record)
+
+
+def benchmark_loader(
+    name: str, loader: Callable[[], Any], repeat: int
+) -> Dict[str, Any]:
+    """Time a loader and capture the statements of its first call"""
+    recorder = StatementRecorder()
+    try:
+        loader()
+    finally:
+        recorder.close()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        loader()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return {
+        "name": name,
+        "statements": recorder.statements,
+        "p50_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "max_ms": timings[-1],
+    }
+
+
+def explain(engine: Engine, statement: str, parameters: Any) -> str:
+    """EXPLAIN (ANALYZE, BUFFERS) of a captured DBAPI statement"""
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        raw.rollback()
+        return plan
+    finally:
+        raw.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seed-runs", type=int, default=0)
+    parser.add_argument("--results-per-run", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--no-explain", action="store_true")
+    parser.add_argument("--clean", action="store_true")
+    args = parser.parse_args()
+
+    if not os.getenv("DATABASE_URL"):
+        parser.error("DATABASE_URL must point at a local Postgres database")
+    engine = create_engine(os.getenv("DATABASE_URL"))
+
+    if args.clean:
+        clean(engine)
+        return
+    if args.seed_runs:
+        seed(engine, args.seed_runs, args.results_per_run)
+
+    runs = load_run_list()
+    if not runs:
+        parser.error("No runs found; use --seed-runs to create synthetic data")
+
+    # The largest run is the interesting case for the per-run loaders
+    run = max(runs, key=lambda r: r["total_documents"] or 0)
+    timestamp = run["timestamp"]
+    first_page = load_result_ids_for_run(timestamp, {"only_with_diffs": True})
+    if not first_page["ids"]:
+        parser.error(f"Run {timestamp} has no results with differences")
+    result_id = first_page["ids"][0]
+
+    loaders = [
+        ("load_run_list", load_run_list),
+        ("load_results_for_run", lambda: load_results_for_run(timestamp)),
+        (
+            "load_result_ids_for_run",
+            lambda: load_result_ids_for_run(timestamp, {"only_with_diffs": True}),
+        ),
+        (
+            "load_results_page_for_run",
+            lambda: load_results_page_for_run(
+                timestamp, {"only_with_diffs": False}, "totalCost", True
+            ),
+        ),
+        ("load_one_result", lambda: load_one_result(timestamp, result_id)),
+    ]
+
+    print(f"Benchmarking against run {timestamp} ({run['total_documents']} results)")
+    reports = [benchmark_loader(name, fn, args.repeat) for name, fn in loaders]
+
+    if not args.no_explain:
+        for report in reports:
+            for statement, parameters in report["statements"]:
+                print(f"\n=== {report['name']} ===")
+                print(explain(engine, statement, parameters))
+
+    print(f"\n{'loader':<28}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for report in reports:
+        print(
+            f"{report['name']:<28}{report['p50_ms']:>10.1f}"
+            f"{report['p95_ms']:>10.1f}{report['max_ms']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,695 @@
+"""Scale benchmark for the dashboard's loaders and aggregations.
+
+Generates synthetic runs of 1k to 1M results with realistic usage, diff stats
+and markdown sizes, two runs per size so the run comparison has something to
+pair. Every loader of the folder backend (results.json under --data-dir) and,
+when DATABASE_URL points at a local Postgres, of the database backend is timed
+together with the aggregations behind the Performance Metrics page. Each step
+reports its best wall time over --repeat calls and the peak Python memory of
+one extra call, and is compared with a stored baseline:
+
+    python dashboard/benchmarks/scale_benchmark.py --sizes 1000,10000 --save-baseline
+    python dashboard/benchmarks/scale_benchmark.py --sizes 1000,10000
+    DATABASE_URL=postgresql://localhost/benchmark \\
+        python dashboard/benchmarks/scale_benchmark.py --backends db --sizes 1000000
+    python dashboard/benchmarks/scale_benchmark.py --clean
+
+Folder runs of 1M results are several GB of JSON and need memory of the same
+order to load, which is why 1M is not among the default sizes.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / "tensorlake"))
+
+from utils import data_loader  # noqa: E402
+from utils.aggregations import RunAggregates, result_metrics_frame  # noqa: E402
+from utils.bootstrap import confidence_intervals, paired_difference  # noqa: E402
+from utils.columnar import ensure_sidecars, sidecar_paths  # noqa: E402
+
+SIZES = [1_000, 10_000, 100_000, 1_000_000]
+DEFAULT_SIZES = "1000,10000,100000"
+
+SYNTHETIC_DESCRIPTION = "synthetic scale benchmark data"
+DEFAULT_DATA_DIR = Path(tempfile.gettempdir()) / "ocr-benchmark-scale"
+BASELINE_PATH = Path(__file__).with_name("scale_baseline.json")
+
+# A step regresses when it is this much slower (or larger) than the baseline
+# and the difference is above the noise floor
+DEFAULT_TOLERANCE = 0.25
+MIN_SECONDS_CHANGE = 0.05
+MIN_PEAK_MB_CHANGE = 1.0
+
+# Loading every payload is skipped above this size (metric loads still run)
+FULL_LOAD_MAX_RESULTS = 100_000
+
+# (ocr model, extraction model, direct image extraction) of each result
+MODELS = [
+    ("gpt-4o", "gpt-4o", False),
+    ("gemini-2.0-flash-001", "gpt-4o", False),
+    ("mistral-ocr", "gpt-4o", False),
+    ("tensorlake", "gpt-4o", False),
+    ("gpt-4o", "gpt-4o", True),
+    ("claude-3-5-sonnet", "claude-3-5-sonnet", True),
+]
+
+# Markdown lengths are log-normal around a one-page invoice or receipt
+MARKDOWN_MEDIAN_CHARS = 2_000
+MARKDOWN_SIGMA = 0.9
+MARKDOWN_MAX_CHARS = 60_000
+
+ERROR_RATE = 0.02
+
+# Column names of the database sink for each results.json key
+DB_COLUMNS = {
+    "fileUrl": "file_url",
+    "ocrModel": "ocr_model",
+    "extractionModel": "extraction_model",
+    "directImageExtraction": "direct_image_extraction",
+    "levenshteinDistance": "levenshtein_distance",
+    "jsonAccuracy": "json_accuracy",
+    "jsonDiffStats": "json_diff_stats",
+    "metadata": "metadata",
+    "usage": "usage",
+    "error": "error",
+    "jsonSchema": "json_schema",
+    "trueMarkdown": "true_markdown",
+    "predictedMarkdown": "predicted_markdown",
+    "trueJson": "true_json",
+    "predictedJson": "predicted_json",
+    "jsonDiff": "json_diff",
+    "fullJsonDiff": "full_json_diff",
+    "jsonAccuracyResult": "json_accuracy_result",
+}
+
+
+def _markdown_text(rng: random.Random) -> str:
+    rows = [
+        "# Invoice",
+        "",
+        "| Item | Quantity | Unit Price | Total |",
+        "|---|---|---|---|",
+    ]
+    while sum(len(row) + 1 for row in rows) < MARKDOWN_MAX_CHARS:
+        quantity = rng.randint(1, 20)
+        price = rng.randint(100, 99_999) / 100
+        rows.append(
+            f"| Item {rng.randint(1, 9999)} | {quantity} | {price:.2f} "
+            f"| {quantity * price:.2f} |"
+        )
+    return "\n".join(rows)
+
+
+def _usage(rng: random.Random, direct: bool) -> Dict[str, Any]:
+    def phase(input_tokens: int, output_tokens: int, duration: float):
+        input_cost = input_tokens * 2.5e-6
+        output_cost = output_tokens * 1e-5
+        return {
+            "duration": duration,
+            "inputTokens": input_tokens,
+            "outputTokens": output_tokens,
+            "totalTokens": input_tokens + output_tokens,
+            "inputCost": input_cost,
+            "outputCost": output_cost,
+            "totalCost": input_cost + output_cost,
+        }
+
+    phases = {
+        "extraction": phase(
+            rng.randint(800, 4000), rng.randint(100, 800), rng.lognormvariate(7.5, 0.5)
+        )
+    }
+    if not direct:
+        phases["ocr"] = phase(
+            rng.randint(500, 3000), rng.randint(200, 2000), rng.lognormvariate(8, 0.6)
+        )
+    return {
+        **phases,
+        "duration": sum(p["duration"] for p in phases.values()),
+        "totalCost": sum(p["totalCost"] for p in phases.values()),
+    }
+
+
+def synthetic_results(size: int, seed: int) -> Iterator[Dict[str, Any]]:
+    """Results in the runner's results.json format; every document is run by every model"""
+    rng = random.Random(seed)
+    text = _markdown_text(random.Random(0))
+    json_schema = {
+        "type": "object",
+        "properties": {"total": {"type": "number"}, "items": {"type": "array"}},
+    }
+    for index in range(size):
+        document = index // len(MODELS)
+        ocr_model, extraction_model, direct = MODELS[index % len(MODELS)]
+        result = {
+            "fileUrl": f"https://example.com/documents/{document}.png",
+            "metadata": {
+                "documentQuality": rng.choice(["clean", "photo", "scan"]),
+                "language": "EN",
+                "orientation": 0,
+            },
+            "ocrModel": ocr_model,
+            "extractionModel": extraction_model,
+            "directImageExtraction": direct,
+            "jsonSchema": json_schema,
+        }
+
+        length = min(
+            int(rng.lognormvariate(np.log(MARKDOWN_MEDIAN_CHARS), MARKDOWN_SIGMA)),
+            MARKDOWN_MAX_CHARS,
+        )
+        start = rng.randint(0, MARKDOWN_MAX_CHARS - length)
+        result["trueMarkdown"] = text[start : start + length]
+        total = round(rng.uniform(10, 5000), 2)
+        result["trueJson"] = {"total": total, "items": [{"name": "Item"}] * 5}
+        if rng.random() < ERROR_RATE:
+            result["error"] = "Request timed out"
+            result["usage"] = {"duration": 60_000}
+            yield result
+            continue
+
+        # Drop a random slice so predictions differ from the ground truth
+        dropped = int(length * rng.uniform(0, 0.3))
+        cut = rng.randint(0, length - dropped)
+        result["predictedMarkdown"] = (
+            result["trueMarkdown"][:cut] + result["trueMarkdown"][cut + dropped :]
+        )
+        result["predictedJson"] = {"total": total, "items": [{"name": "Item"}] * 5}
+        diff = rng.choice([0, 0, 0, 1, 1, 2, 3, 5])
+        if diff:
+            result["predictedJson"]["total"] = total + diff
+        total_fields = 7
+        result["levenshteinDistance"] = 1 - dropped / max(length, 1)
+        result["jsonAccuracy"] = max(0.0, 1 - diff / total_fields)
+        result["jsonDiff"] = (
+            {"total": {"__old": total, "__new": total + diff}} if diff else {}
+        )
+        result["fullJsonDiff"] = result["jsonDiff"]
+        result["jsonDiffStats"] = {
+            "additions": diff // 3,
+            "deletions": diff // 5,
+            "modifications": diff - diff // 3 - diff // 5,
+            "total": diff,
+        }
+        result["jsonAccuracyResult"] = {
+            "score": result["jsonAccuracy"],
+            "jsonDiff": result["jsonDiff"],
+            "jsonDiffStats": result["jsonDiffStats"],
+            "totalFields": total_fields,
+        }
+        result["usage"] = _usage(rng, direct)
+        yield result
+
+
+def run_timestamps(size: int) -> List[str]:
+    """Base and compared run of a size, a day apart and distinct per size"""
+    base = datetime(2019, 1, 1) + timedelta(minutes=SIZES.index(size))
+    return [
+        (base + timedelta(days=day)).strftime("%Y-%m-%d-%H-%M-%S") for day in (0, 1)
+    ]
+
+
+def write_folder_runs(data_dir: Path, size: int) -> Path:
+    """Write both runs of a size as results.json files; reused when present"""
+    results_dir = data_dir / str(size)
+    for seed, timestamp in enumerate(run_timestamps(size)):
+        results_path = results_dir / timestamp / "results.json"
+        if results_path.exists():
+            continue
+        results_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = results_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write("[")
+            for index, result in enumerate(synthetic_results(size, seed)):
+                f.write(("," if index else "") + json.dumps(result))
+            f.write("]")
+        os.replace(tmp_path, results_path)
+        print(f"Wrote {results_path} ({results_path.stat().st_size / 2**20:.0f} MB)")
+    return results_dir
+
+
+def seed_database_runs(size: int) -> None:
+    """Write both runs of a size through the runner's database sink"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.sql import text
+    from db_sink import PostgresResultSink
+
+    engine = create_engine(os.getenv("DATABASE_URL"))
+    for seed, timestamp in enumerate(run_timestamps(size)):
+        with engine.connect() as conn:
+            exists = conn.execute(
+                text(
+                    "SELECT 1 FROM benchmark_runs WHERE timestamp = :timestamp "
+                    "AND status = 'completed'"
+                ),
+                {"timestamp": timestamp},
+            ).first()
+        if exists:
+            continue
+
+        sink = PostgresResultSink(os.getenv("DATABASE_URL"), batch_size=5000)
+        sink.start(
+            timestamp,
+            [
+                {"ocr": m[0], "extraction": m[1], "directImageExtraction": m[2]}
+                for m in MODELS
+            ],
+            size,
+            description=SYNTHETIC_DESCRIPTION,
+        )
+        for result in synthetic_results(size, seed):
+            sink.add({DB_COLUMNS[key]: value for key, value in result.items()})
+        sink.close()
+    engine.dispose()
+
+
+def measure(
+    fn: Callable[[], Any], repeat: int, setup: Optional[Callable[[], None]] = None
+) -> Dict[str, float]:
+    """Best wall time over repeat calls, then peak Python memory of one more.
+
+    Memory is measured separately because tracemalloc slows allocation-heavy
+    code down several times. Allocations made by pyarrow outside the Python
+    allocator are not included.
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "peak_mb": peak / 2**20}
+
+
+def folder_steps(results_dir: Path, size: int) -> List[tuple]:
+    base, compare = run_timestamps(size)
+    results_path = results_dir / compare / "results.json"
+    summary_path = results_path.with_name(data_loader.RUN_SUMMARY_FILENAME)
+
+    def remove_sidecars():
+        for path in sidecar_paths(results_path):
+            path.unlink(missing_ok=True)
+
+    # Sidecars and summaries of the other run are built by the first calls
+    steps = [
+        (
+            "ensure_sidecars (cold)",
+            lambda: ensure_sidecars(results_path),
+            remove_sidecars,
+        ),
+        (
+            "load_model_stats_for_run (cold)",
+            lambda: data_loader.load_model_stats_for_run_from_folder(
+                compare, results_dir
+            ),
+            lambda: summary_path.unlink(missing_ok=True),
+        ),
+        (
+            "load_model_stats_for_run",
+            lambda: data_loader.load_model_stats_for_run_from_folder(
+                compare, results_dir
+            ),
+            None,
+        ),
+        (
+            "load_run_list",
+            lambda: data_loader.load_run_list_from_folder(results_dir),
+            None,
+        ),
+        (
+            "load_results_for_run",
+            lambda: data_loader.load_results_for_run_from_folder(compare, results_dir),
+            None,
+        ),
+    ]
+    if size <= FULL_LOAD_MAX_RESULTS:
+        steps.append(
+            (
+                "load_results_for_run (payloads)",
+                lambda: data_loader.load_results_for_run_from_folder(
+                    compare, results_dir, include_metrics_only=False
+                ),
+                None,
+            )
+        )
+    steps += [
+        (
+            "load_result_ids_for_run",
+            lambda: data_loader.load_result_ids_for_run_from_folder(
+                compare, {"only_with_diffs": True}, results_dir=results_dir
+            ),
+            None,
+        ),
+        (
+            "load_model_keys_for_run",
+            lambda: data_loader.load_model_keys_for_run_from_folder(
+                compare, results_dir
+            ),
+            None,
+        ),
+        (
+            "load_results_page_for_run",
+            lambda: data_loader.load_results_page_for_run_from_folder(
+                compare,
+                {"only_with_diffs": False},
+                "totalCost",
+                True,
+                results_dir=results_dir,
+            ),
+            None,
+        ),
+        (
+            "load_one_result",
+            lambda: data_loader.load_one_result_from_folder(
+                compare, str(size // 2), results_dir
+            ),
+            None,
+        ),
+        (
+            "load_result_payload",
+            lambda: data_loader.load_result_payload_from_folder(
+                compare,
+                data_loader.load_one_result_from_folder(
+                    compare, str(size // 2), results_dir
+                )["result"],
+                results_dir,
+            ),
+            None,
+        ),
+        (
+            "load_run_comparison",
+            lambda: data_loader.load_run_comparison_from_folder(
+                base, compare, results_dir=results_dir
+            ),
+            None,
+        ),
+        (
+            "load_model_stats_history",
+            lambda: data_loader.load_model_stats_history_from_folder(results_dir),
+            None,
+        ),
+    ]
+    return steps
+
+
+def db_steps(size: int) -> List[tuple]:
+    base, compare = run_timestamps(size)
+    first_page = data_loader.load_result_ids_for_run_from_db(
+        compare, {"only_with_diffs": True}
+    )
+    result_id = first_page["ids"][0] if first_page["ids"] else None
+
+    steps = [
+        ("load_run_list", data_loader.load_run_list_from_db, None),
+        (
+            "load_model_stats_for_run",
+            lambda: data_loader.load_model_stats_for_run_from_db(compare),
+            None,
+        ),
+        (
+            "load_results_for_run",
+            lambda: data_loader.load_results_for_run_from_db(compare),
+            None,
+        ),
+    ]
+    if size <= FULL_LOAD_MAX_RESULTS:
+        steps.append(
+            (
+                "load_results_for_run (payloads)",
+                lambda: data_loader.load_results_for_run_from_db(
+                    compare, include_metrics_only=False
+                ),
+                None,
+            )
+        )
+    steps += [
+        (
+            "load_result_ids_for_run",
+            lambda: data_loader.load_result_ids_for_run_from_db(
+                compare, {"only_with_diffs": True}
+            ),
+            None,
+        ),
+        (
+            "load_model_keys_for_run",
+            lambda: data_loader.load_model_keys_for_run_from_db(compare),
+            None,
+        ),
+        (
+            "load_results_page_for_run",
+            lambda: data_loader.load_results_page_for_run_from_db(
+                compare, {"only_with_diffs": False}, "totalCost", True
+            ),
+            None,
+        ),
+        (
+            "load_run_comparison",
+            lambda: data_loader.load_run_comparison_from_db(base, compare),
+            None,
+        ),
+        (
+            "load_model_stats_history",
+            data_loader.load_model_stats_history_from_db,
+            None,
+        ),
+    ]
+    if result_id is not None:
+        steps.append(
+            (
+                "load_one_result",
+                lambda: data_loader.load_one_result_from_db(compare, result_id),
+                None,
+            )
+        )
+        steps.append(
+            (
+                "load_result_payload",
+                lambda: data_loader.load_result_payload_from_db(
+                    data_loader.load_one_result_from_db(compare, result_id)["result"]
+                ),
+                None,
+            )
+        )
+    return steps
+
+
+def aggregation_steps(results: List[Dict[str, Any]]) -> List[tuple]:
+    """The per-run computations of the Performance Metrics page"""
+    aggregates = RunAggregates.from_results(results)
+    metrics_df = result_metrics_frame(results)
+    models = sorted(metrics_df["Model"].unique())
+    scores = metrics_df.pivot_table(
+        index="fileUrl", columns="Model", values="JSON Accuracy", aggfunc="first"
+    )
+    pairs = scores[models[:2]].dropna()
+
+    return [
+        (
+            "RunAggregates.from_results",
+            lambda: RunAggregates.from_results(results),
+            None,
+        ),
+        (
+            "model_stats_frame + accuracy_frames",
+            lambda: (aggregates.model_stats_frame(), aggregates.accuracy_frames()),
+            None,
+        ),
+        ("percentile_frame", aggregates.percentile_frame, None),
+        ("result_metrics_frame", lambda: result_metrics_frame(results), None),
+        (
+            "confidence_intervals",
+            lambda: [
+                confidence_intervals(
+                    {
+                        model: group[metric].to_numpy()
+                        for model, group in metrics_df.groupby("Model")
+                    }
+                )
+                for metric in ("JSON Accuracy", "Text Similarity")
+            ],
+            None,
+        ),
+        (
+            "paired_difference",
+            lambda: paired_difference(
+                pairs[models[0]].to_numpy(), pairs[models[1]].to_numpy()
+            ),
+            None,
+        ),
+    ]
+
+
+def compare_with_baseline(
+    measurements: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    tolerance: float,
+) -> List[str]:
+    """Print every step next to its baseline and return the keys that regressed"""
+    regressions = []
+    print(
+        f"\n{'step':<58}{'seconds':>10}{'baseline':>10}{'change':>9}"
+        f"{'peak MB':>10}{'baseline':>10}{'change':>9}"
+    )
+    for key, current in measurements.items():
+        previous = baseline.get(key)
+        line = f"{key:<58}{current['seconds']:>10.3f}"
+        if previous is None:
+            print(line + f"{'-':>10}{'':>9}{current['peak_mb']:>10.1f}{'-':>10}")
+            continue
+
+        regressed = []
+        for metric, floor in (
+            ("seconds", MIN_SECONDS_CHANGE),
+            ("peak_mb", MIN_PEAK_MB_CHANGE),
+        ):
+            change = current[metric] - previous[metric]
+            if change > floor and current[metric] > previous[metric] * (1 + tolerance):
+                regressed.append(metric)
+
+        def relative(metric):
+            if not previous[metric]:
+                return f"{'':>9}"
+            return f"{current[metric] / previous[metric] - 1:>+9.0%}"
+
+        line += f"{previous['seconds']:>10.3f}{relative('seconds')}"
+        line += f"{current['peak_mb']:>10.1f}{previous['peak_mb']:>10.1f}"
+        line += relative("peak_mb")
+        if regressed:
+            regressions.append(key)
+            line += "  REGRESSED (" + ", ".join(regressed) + ")"
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        default=DEFAULT_SIZES,
+        help=f"Comma separated run sizes out of {', '.join(map(str, SIZES))}",
+    )
+    parser.add_argument(
+        "--backends",
+        default="folder,db",
+        help="folder and/or db; db is skipped without DATABASE_URL",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="Store the measurements as the new baseline",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="Delete the generated folder runs and synthetic database runs",
+    )
+    args = parser.parse_args()
+
+    if args.clean:
+        shutil.rmtree(args.data_dir, ignore_errors=True)
+        if os.getenv("DATABASE_URL"):
+            from sqlalchemy import create_engine
+            from query_benchmark import clean
+
+            clean(create_engine(os.getenv("DATABASE_URL")), SYNTHETIC_DESCRIPTION)
+        return
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"Unsupported sizes {unknown}; choose from {SIZES}")
+    backends = args.backends.split(",")
+    if "db" in backends and not os.getenv("DATABASE_URL"):
+        print("DATABASE_URL is not set; skipping the database backend")
+        backends.remove("db")
+
+    # Spans of the instrumented loaders would only duplicate these timings
+    logging.getLogger("dashboard.perf").setLevel(logging.ERROR)
+
+    measurements: Dict[str, Dict[str, float]] = {}
+    for size in sizes:
+        results = None
+        if "folder" in backends:
+            results_dir = write_folder_runs(args.data_dir, size)
+            for name, fn, setup in folder_steps(results_dir, size):
+                print(f"folder/{size}: {name}", end="\r", flush=True)
+                measurements[f"folder/{size}/{name}"] = measure(fn, args.repeat, setup)
+            results = data_loader.load_results_for_run_from_folder(
+                run_timestamps(size)[1], results_dir
+            )["results"]
+        if "db" in backends:
+            seed_database_runs(size)
+            for name, fn, setup in db_steps(size):
+                print(f"db/{size}: {name}", end="\r", flush=True)
+                measurements[f"db/{size}/{name}"] = measure(fn, args.repeat, setup)
+            if results is None:
+                results = data_loader.load_results_for_run_from_db(
+                    run_timestamps(size)[1]
+                )["results"]
+        if results:
+            for name, fn, setup in aggregation_steps(results):
+                print(f"aggregation/{size}: {name}", end="\r", flush=True)
+                measurements[f"aggregation/{size}/{name}"] = measure(
+                    fn, args.repeat, setup
+                )
+        print(" " * 80, end="\r")
+
+    baseline = {}
+    if args.baseline.exists():
+        with open(args.baseline) as f:
+            baseline = json.load(f)["measurements"]
+    regressions = compare_with_baseline(measurements, baseline, args.tolerance)
+
+    if args.save_baseline:
+        # Steps that were not run this time keep their previous baseline
+        baseline.update(measurements)
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {
+                    "machine": platform.platform(),
+                    "python": platform.python_version(),
+                    "updated_at": datetime.now().isoformat(timespec="seconds"),
+                    "measurements": baseline,
+                },
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+        print(f"\nSaved baseline to {args.baseline}")
+    elif regressions:
+        print(f"\n{len(regressions)} steps regressed by more than {args.tolerance:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
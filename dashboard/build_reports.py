@@ -0,0 +1,82 @@
+"""Render the Performance Metrics report of completed runs into static snapshots.
+
+Every figure and table of the page (including the percentiles of each metric
+and the significance tests against each baseline) is stored once as Plotly
+JSON plus summary tables: in benchmark_run_reports when DATABASE_URL is set,
+otherwise as report.json next to the run's results.json. The page then serves
+the snapshot instead of loading and aggregating the run on every view.
+
+    python dashboard/build_reports.py                        # completed runs without a snapshot
+    python dashboard/build_reports.py 2025-02-20-10-00-00    # specific runs
+    python dashboard/build_reports.py --force                # re-render every completed run
+
+Run it from the repository root, like the dashboard itself.
+"""
+
+import time
+import argparse
+
+from utils.aggregations import result_metrics_frame
+from utils.data_loader import (
+    load_model_stats_for_run,
+    load_result_scores_for_run,
+    load_results_for_run,
+    load_run_list,
+    load_run_report,
+    save_run_report,
+)
+from utils.report import (
+    ReportSnapshot,
+    RunReport,
+    aggregate_completed_run,
+    has_complete_stats,
+)
+
+
+def build_report(run: dict) -> dict:
+    """Snapshot of the Performance Metrics report of one run"""
+    timestamp = run["timestamp"]
+    precomputed_stats = load_model_stats_for_run(timestamp)
+    # The full results are only read when the precomputed stats are incomplete
+    if has_complete_stats(precomputed_stats):
+        results = load_result_scores_for_run(timestamp)
+    else:
+        results = load_results_for_run(timestamp)["results"]
+    model_stats, json_df, text_df, percentiles_df = aggregate_completed_run(
+        results, precomputed_stats
+    )
+    report = RunReport(
+        model_stats, json_df, text_df, percentiles_df, result_metrics_frame(results)
+    )
+    return report.to_snapshot(run)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("timestamps", nargs="*", help="runs to render (default: all)")
+    parser.add_argument(
+        "--force", action="store_true", help="re-render runs that have a snapshot"
+    )
+    args = parser.parse_args()
+
+    runs = {run["timestamp"]: run for run in load_run_list()}
+    for timestamp in args.timestamps:
+        if timestamp not in runs:
+            parser.error(f"Run {timestamp} not found")
+    timestamps = args.timestamps or list(runs)
+
+    for timestamp in timestamps:
+        # Live runs change with every refresh and are never served from a snapshot
+        if runs[timestamp]["status"] != "completed":
+            print(f"{timestamp}: skipped ({runs[timestamp]['status']})")
+            continue
+        if not args.force and ReportSnapshot.load(load_run_report(timestamp)):
+            print(f"{timestamp}: up to date")
+            continue
+        start = time.perf_counter()
+        save_run_report(timestamp, build_report(runs[timestamp]))
+        print(f"{timestamp}: rendered in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
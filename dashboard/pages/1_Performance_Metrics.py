@@ -1,188 +1,69 @@
 import streamlit as st
 from datetime import datetime
-import plotly.express as px
 import pandas as pd
 
-from utils.data_loader import load_run_list, load_results_for_run
+from utils.data_loader import (
+    load_run_list,
+    format_run,
+    load_results_for_run,
+    load_result_scores_for_run,
+    load_model_stats_for_run,
+    load_new_results_for_run,
+    load_model_keys_for_run,
+    load_result_metadata,
+    load_results_page_for_run,
+    load_run_report,
+)
+from utils.aggregations import LiveRun, result_metrics_frame
+from utils.bootstrap import DEFAULT_CONFIDENCE as CONFIDENCE
+from utils.debug_panel import instrumented_page
+from utils.instrumentation import timed
+from utils.report import (
+    ACCURACY_METRICS,
+    PERCENTILE_METRICS,
+    ReportSnapshot,
+    RunReport,
+    aggregate_completed_run,
+    has_complete_stats,
+    metric_confidence_intervals,
+    paired_differences,
+)
 from utils.style import SIDEBAR_STYLE
 
 st.set_page_config(page_title="Performance Metrics")
 st.markdown(SIDEBAR_STYLE, unsafe_allow_html=True)
 
-
-def create_results_table(results):
-    """Create a DataFrame from test results"""
-    rows = []
-
-    for test in results:  # Results is a list of test cases
-        row = {
-            "Image": test["fileUrl"],
-            "OCR Model": test["ocrModel"],
-            "Extraction Model": test["extractionModel"],
-            "Levenshtein Score": test.get("levenshteinDistance", 0),
-            "JSON Accuracy": test.get("jsonAccuracy", 0),
-            "Total Cost": test.get("usage", {}).get("totalCost", 0),
-            "Duration (ms)": test.get("usage", {}).get("duration", 0),
-            "Metadata": test.get("metadata", {}),
-        }
-        rows.append(row)
-
-    return pd.DataFrame(rows)
-
-
-def create_model_comparison_table(results):
-    """Create a DataFrame comparing different model combinations"""
-    model_stats = {}
-
-    for test in results:
-        if "error" in test and test["error"]:
-            continue
-
-        model_key = (
-            f"{test['extractionModel']} (IMG2JSON)"
-            if test.get("directImageExtraction", False)
-            else f"{test['ocrModel']} → {test['extractionModel']}"
-        )
-        if model_key not in model_stats:
-            model_stats[model_key] = {
-                "count": 0,
-                "json_accuracy": 0,
-                "text_accuracy": 0,
-                "total_cost": 0.0,
-                "ocr_cost": 0.0,
-                "extraction_cost": 0.0,
-                "ocr_latency": 0,
-                "extraction_latency": 0,
-                "extraction_count": 0,
-                "ocr_input_tokens": 0,
-                "ocr_output_tokens": 0,
-                "extraction_input_tokens": 0,
-                "extraction_output_tokens": 0,
-            }
-
-        stats = model_stats[model_key]
-        stats["count"] += 1
-        stats["text_accuracy"] += test.get("levenshteinDistance", 0) or 0
-        # Ensure None values are converted to 0.0
-        totalCost = test.get("usage", {}).get("totalCost")
-        stats["total_cost"] += 0.0 if totalCost is None else totalCost
-        usage = test.get("usage", {})
-
-        # Handle possible None values in ocr cost
-        ocrCost = usage.get("ocr", {}).get("totalCost")
-        stats["ocr_cost"] += 0.0 if ocrCost is None else ocrCost
-
-        stats["ocr_latency"] += usage.get("ocr", {}).get("duration", 0) / 1000
-        stats["ocr_input_tokens"] += usage.get("ocr", {}).get("inputTokens", 0)
-        stats["ocr_output_tokens"] += usage.get("ocr", {}).get("outputTokens", 0)
-
-        # Add token counting
-        if usage.get("extraction"):
-            stats["extraction_input_tokens"] += usage.get("extraction", {}).get(
-                "inputTokens", 0
-            )
-            stats["extraction_output_tokens"] += usage.get("extraction", {}).get(
-                "outputTokens", 0
-            )
-
-        # Only add JSON accuracy and extraction stats if extraction was performed
-        if "jsonAccuracy" in test and usage.get("extraction"):
-            stats["extraction_count"] += 1
-            stats["json_accuracy"] += test["jsonAccuracy"]
-            # Handle possible None values in extraction cost
-            extractionCost = usage.get("extraction", {}).get("totalCost")
-            stats["extraction_cost"] += (
-                0.0 if extractionCost is None else extractionCost
-            )
-            stats["extraction_latency"] += (
-                usage.get("extraction", {}).get("duration", 0) / 1000
-            )
-
-    # Calculate averages
-    for stats in model_stats.values():
-        stats["text_accuracy"] /= stats["count"]
-        stats["ocr_latency"] /= stats["count"]
-        stats["ocr_cost"] /= stats["count"]
-        stats["total_cost"] /= stats["count"]
-        stats["ocr_input_tokens"] /= stats["count"]
-        stats["ocr_output_tokens"] /= stats["count"]
-
-        # Calculate extraction-related averages only if there were extractions
-        if stats["extraction_count"] > 0:
-            stats["json_accuracy"] /= stats["extraction_count"]
-            stats["extraction_latency"] /= stats["extraction_count"]
-            stats["extraction_cost"] /= stats["extraction_count"]
-            stats["extraction_input_tokens"] /= stats["extraction_count"]
-            stats["extraction_output_tokens"] /= stats["extraction_count"]
-
-    # Convert to DataFrame
-    df = pd.DataFrame.from_dict(model_stats, orient="index")
-    df.index.name = "Model Combination"
-    return df
-
-
-def create_accuracy_comparison_charts(results):
-    """Create separate DataFrames for JSON and Text accuracy comparisons"""
-    model_accuracies = {}
-
-    for test in results:
-        if "error" in test and test["error"]:
-            continue
-
-        model_key = (
-            f"{test['extractionModel']} (IMG2JSON)"
-            if test.get("directImageExtraction", False)
-            else f"{test['ocrModel']} → {test['extractionModel']}"
-        )
-        if model_key not in model_accuracies:
-            model_accuracies[model_key] = {
-                "count": 0,
-                "json_accuracy": 0,
-                "text_similarity": 0,
-                "total_matched_items": 0,
-                "total_items": 0,
-                "extraction_count": 0,
-            }
-
-        stats = model_accuracies[model_key]
-        stats["count"] += 1
-        stats["text_similarity"] += test.get("levenshteinDistance", 0) or 0
-
-        # Handle JSON accuracy if present
-        if "jsonAccuracy" in test:
-            stats["extraction_count"] += 1
-            stats["json_accuracy"] += test["jsonAccuracy"] or 0
-
-    # Calculate final averages
-    for stats in model_accuracies.values():
-        stats["text_similarity"] /= stats["count"]
-
-        # Calculate JSON accuracy only if there were extractions
-        if stats["extraction_count"] > 0:
-            stats["json_accuracy"] /= stats["extraction_count"]
-        else:
-            stats["json_accuracy"] = 0
-
-    # Create DataFrames
-    json_df = pd.DataFrame(
+# How often the page polls a run that is still in progress
+LIVE_REFRESH_SECONDS = 10
+
+# Detailed results table: loader field and column label, and rows per page
+RESULTS_TABLE_COLUMNS = {
+    "id": "ID",
+    "fileUrl": "Image",
+    "ocrModel": "OCR Model",
+    "extractionModel": "Extraction Model",
+    "levenshteinDistance": "Levenshtein Score",
+    "jsonAccuracy": "JSON Accuracy",
+    "totalCost": "Total Cost",
+    "duration": "Duration (ms)",
+}
+RESULTS_PAGE_SIZE = 100
+ALL_MODELS = "All models"
+ERROR_FILTERS = {"All": None, "Only errors": True, "Without errors": False}
+
+
+def create_results_table(rows):
+    """Create a typed DataFrame from one page of the detailed results table"""
+    df = pd.DataFrame(rows, columns=list(RESULTS_TABLE_COLUMNS))
+    df = df.astype(
         {
-            "Model": model_accuracies.keys(),
-            "JSON Accuracy": [
-                stats["json_accuracy"] for stats in model_accuracies.values()
-            ],
+            "levenshteinDistance": "float64",
+            "jsonAccuracy": "float64",
+            "totalCost": "float64",
+            "duration": "float64",
         }
-    ).set_index("Model")
-
-    text_df = pd.DataFrame(
-        {
-            "Model": model_accuracies.keys(),
-            "Text Similarity": [
-                stats["text_similarity"] for stats in model_accuracies.values()
-            ],
-        }
-    ).set_index("Model")
-
-    return json_df, text_df
+    )
+    return df.rename(columns=RESULTS_TABLE_COLUMNS)
 
 
 def main():
@@ -195,6 +76,8 @@ def main():
         st.warning("No benchmark runs found.")
         return
 
+    runs_by_timestamp = {run["timestamp"]: run for run in runs}
+
     # Create columns for the header section
     col1, col2 = st.columns([2, 3])
 
@@ -203,60 +86,194 @@ def main():
         selected_timestamp = st.selectbox(
             "Select Test Run",
             [run["timestamp"] for run in runs],
-            format_func=lambda x: datetime.strptime(x, "%Y-%m-%d-%H-%M-%S").strftime(
-                "%Y-%m-%d %H:%M:%S"
-            ),
+            format_func=lambda x: format_run(runs_by_timestamp[x]),
         )
 
-    # Load the detailed results only when a run is selected
-    run_data = load_results_for_run(selected_timestamp)
+    selected_run = runs_by_timestamp[selected_timestamp]
+    if selected_run["status"] == "running":
+        with col1:
+            auto_refresh = st.toggle(
+                "Auto-refresh",
+                value=True,
+                help=f"Load new results every {LIVE_REFRESH_SECONDS} seconds",
+            )
+        if auto_refresh:
+            st.fragment(run_every=LIVE_REFRESH_SECONDS)(render_live_run)(
+                selected_timestamp
+            )
+        else:
+            render_live_run(selected_timestamp)
+        return
+
+    # Completed runs rendered by build_reports.py are served from their snapshot
+    report = ReportSnapshot.load(load_run_report(selected_timestamp))
+    if report is not None:
+        with col2:
+            st.markdown('<div style="margin-top: 24px;">', unsafe_allow_html=True)
+            render_run_details(report.run)
+        render_report(report)
+        render_results_table(selected_timestamp)
+        return
 
     with col2:
         st.markdown('<div style="margin-top: 24px;">', unsafe_allow_html=True)
-        with st.expander("Run Details", expanded=True):
-            if run_data.get("run_by"):
-                st.markdown(f"**Run By:** {run_data['run_by']}")
-            if run_data.get("description"):
-                st.markdown(f"**Description:** {run_data['description']}")
-            st.markdown(f"**Total # of documents:** {run_data['total_documents']}")
-            st.markdown(f"**Status:** {run_data['status'].title()}")
-            st.markdown(f"**Created:** {run_data['created_at']}")
-            if run_data.get("completed_at"):
-                st.markdown(f"**Completed:** {run_data['completed_at']}")
-
-    results = run_data["results"]
+        render_run_details(selected_run)
+
+    # Completed runs have their per-model aggregates precomputed; the charts'
+    # confidence intervals then only need each result's scores. The full
+    # results are loaded and aggregated only when the stats are incomplete.
+    precomputed_stats = load_model_stats_for_run(selected_timestamp)
+    if has_complete_stats(precomputed_stats):
+        results = load_result_scores_for_run(selected_timestamp)
+    else:
+        results = load_results_for_run(selected_timestamp)["results"]
+    model_stats, json_df, text_df, percentiles_df = aggregate_completed_run(
+        results, precomputed_stats
+    )
 
-    st.header("Evaluation Metrics by Model")
-    json_df, text_df = create_accuracy_comparison_charts(results)
-    fig1 = px.bar(
-        json_df.reset_index().sort_values("JSON Accuracy", ascending=False),
-        x="Model",
-        y="JSON Accuracy",
-        title="JSON Accuracy by Model",
-        height=600,
-        color_discrete_sequence=["#636EFA"],
+    render_metrics(
+        selected_timestamp, model_stats, json_df, text_df, percentiles_df, results
     )
-    fig1.update_layout(showlegend=False)
-    fig1.update_traces(texttemplate="%{y:.1%}", textposition="outside")
-    st.plotly_chart(fig1)
-
-    fig2 = px.bar(
-        text_df.reset_index().sort_values("Text Similarity", ascending=False),
-        x="Model",
-        y="Text Similarity",
-        title="Text Similarity by Model",
-        height=600,
-        color_discrete_sequence=["#636EFA"],
+
+
+def render_run_details(run_data):
+    with st.expander("Run Details", expanded=True):
+        if run_data.get("run_by"):
+            st.markdown(f"**Run By:** {run_data['run_by']}")
+        if run_data.get("description"):
+            st.markdown(f"**Description:** {run_data['description']}")
+        st.markdown(f"**Total # of documents:** {run_data['total_documents']}")
+        st.markdown(f"**Status:** {run_data['status'].title()}")
+        st.markdown(f"**Created:** {run_data['created_at']}")
+        if run_data.get("completed_at"):
+            st.markdown(f"**Completed:** {run_data['completed_at']}")
+
+
+def render_live_run(timestamp):
+    """Render a run in progress, loading only the results added since the last refresh"""
+    live_runs = st.session_state.setdefault("live_runs", {})
+    if timestamp not in live_runs:
+        live_runs[timestamp] = LiveRun(timestamp)
+    live_run = live_runs[timestamp]
+    delta = load_new_results_for_run(timestamp, live_run.watermark)
+    with timed("aggregate", "LiveRun.apply") as span:
+        added = span["rows"] = live_run.apply(delta)
+
+    if not live_run.run:
+        st.warning("Run not found.")
+        return
+    render_run_details(live_run.run)
+
+    total = live_run.run.get("total_documents")
+    loaded = len(live_run.results)
+    if total:
+        st.progress(min(loaded / total, 1.0), text=f"{loaded} of {total} results")
+    st.caption(
+        f"{added} new results, last refreshed {datetime.now().strftime('%H:%M:%S')}"
     )
-    fig2.update_layout(showlegend=False)
-    fig2.update_traces(texttemplate="%{y:.1%}", textposition="outside")
-    st.plotly_chart(fig2)
+
+    if live_run.run.get("status") != "running":
+        # The run just finished; reload the page to show its final summary
+        live_runs.pop(timestamp)
+        st.rerun()
+
+    if not live_run.aggregates.models:
+        st.info("No results yet.")
+        return
+
+    json_df, text_df = live_run.aggregates.accuracy_frames()
+    render_metrics(
+        timestamp,
+        live_run.aggregates.model_stats_frame(),
+        json_df,
+        text_df,
+        live_run.aggregates.percentile_frame(),
+        live_run.results,
+    )
+
+
+@st.cache_data(show_spinner=False)
+def get_confidence_intervals(timestamp, result_count, _metrics_df):
+    """Bootstrap intervals of each model's mean, per accuracy metric"""
+    with timed("aggregate", "confidence_intervals") as span:
+        span["rows"] = len(_metrics_df)
+        return metric_confidence_intervals(_metrics_df)
+
+
+@st.cache_data(show_spinner=False)
+def get_paired_differences(timestamp, result_count, metric, baseline, _metrics_df):
+    """Paired bootstrap test of every model against the baseline on shared documents"""
+    with timed("aggregate", "paired_differences") as span:
+        span["rows"] = len(_metrics_df)
+        return paired_differences(_metrics_df, metric, baseline)
+
+
+def render_significance(report):
+    with st.expander("Significance of Model Differences"):
+        st.caption(
+            "Paired bootstrap over the documents both models processed: "
+            f"{CONFIDENCE:.0%} interval of the mean difference to the baseline "
+            "and a two-sided p-value."
+        )
+        col1, col2 = st.columns(2)
+        with col1:
+            metric = st.radio("Metric", ACCURACY_METRICS, horizontal=True)
+        with col2:
+            baseline = st.selectbox("Baseline", report.models)
+        differences = report.paired_differences(metric, baseline)
+        if differences.empty:
+            st.info("No other model combinations to compare against.")
+            return
+        st.dataframe(
+            differences.style.format(
+                {
+                    "Difference": "{:+.2%}",
+                    "CI Low": "{:+.2%}",
+                    "CI High": "{:+.2%}",
+                    "p-value": "{:.4f}",
+                }
+            ),
+            hide_index=True,
+        )
+
+
+def render_metrics(timestamp, model_stats, json_df, text_df, percentiles_df, results):
+    with timed("aggregate", "result_metrics_frame") as span:
+        metrics_df = result_metrics_frame(results)
+        span["rows"] = len(results)
+    report = RunReport(
+        model_stats,
+        json_df,
+        text_df,
+        percentiles_df,
+        metrics_df,
+        intervals=get_confidence_intervals(timestamp, len(metrics_df), metrics_df),
+        differences=lambda metric, baseline: get_paired_differences(
+            timestamp, len(metrics_df), metric, baseline, metrics_df
+        ),
+    )
+    render_report(report)
+    render_results_table(timestamp)
+
+
+def render_chart(report, name, label):
+    with timed("chart", label):
+        st.plotly_chart(report.figure(name))
+
+
+def render_report(report):
+    """Figures and tables of a RunReport, or of a ReportSnapshot of one"""
+    st.header("Evaluation Metrics by Model")
+    st.caption(f"Error bars show {CONFIDENCE:.0%} bootstrap confidence intervals.")
+    render_chart(report, "json_accuracy", "JSON Accuracy")
+    render_chart(report, "text_similarity", "Text Similarity")
+
+    render_significance(report)
 
     # Model Statistics Table
     st.header("Model Performance Statistics")
-    model_stats = create_model_comparison_table(results)
     st.dataframe(
-        model_stats.style.format(
+        report.model_stats.style.format(
             {
                 "json_accuracy": "{:.2%}",
                 "text_accuracy": "{:.2%}",
@@ -269,162 +286,119 @@ def main():
 
     # Cost and Latency Charts
     st.header("Cost and Latency Analysis")
-
-    # Cost per document chart
-    cost_df = pd.DataFrame(model_stats["total_cost"] * 1000).reset_index()
-    cost_df.columns = ["Model", "Cost per 1,000 Pages"]
-    fig4 = px.bar(
-        cost_df.sort_values("Cost per 1,000 Pages", ascending=True),
-        x="Model",
-        y="Cost per 1,000 Pages",
-        title="Cost per 1,000 Pages by Model Combination",
-        height=600,
-        color_discrete_sequence=["#EE553B"],
-    )
-    fig4.update_layout(showlegend=False)
-    fig4.update_traces(texttemplate="$%{y:.2f}", textposition="outside")
-    st.plotly_chart(fig4)
-
-    # Create stacked bar chart for cost breakdown per document
-    cost_breakdown_df = pd.DataFrame(
-        {
-            "Model": model_stats.index,
-            "OCR": model_stats["ocr_cost"] * 1000,
-            "Extraction": model_stats["extraction_cost"] * 1000,
-        }
-    )
-
-    # Calculate cost per 1k documents for sorting
-    cost_breakdown_df["Total"] = (
-        cost_breakdown_df["OCR"] + cost_breakdown_df["Extraction"]
-    )
-    fig_cost = px.bar(
-        cost_breakdown_df.sort_values("Total", ascending=True),
-        x="Model",
-        y=["OCR", "Extraction"],
-        title="Cost per 1,000 Pages Breakdown by Model Combination (OCR + Extraction)",
-        height=600,
-        color_discrete_sequence=["#636EFA", "#EF553B"],
-    )
-    fig_cost.update_layout(
-        barmode="stack",
-        showlegend=True,
-        legend_title="Phase",
-        yaxis=dict(
-            title="Cost per 1,000 Pages (USD)",
-            range=[
-                0,
-                cost_breakdown_df["Total"].max() * 1.2,
-            ],
-        ),
-    )
-    fig_cost.update_traces(texttemplate="$%{y:.2f}", textposition="inside")
-    st.plotly_chart(fig_cost)
-
-    # Create stacked bar chart for latency
-    latency_df = pd.DataFrame(
-        {
-            "Model": model_stats.index,
-            "OCR": model_stats["ocr_latency"],
-            "Extraction": model_stats["extraction_latency"],
-        }
-    )
-
-    # Calculate total latency for labels
-    latency_df["Total"] = latency_df.get("OCR", 0) + latency_df.get("Extraction", 0)
-    fig5 = px.bar(
-        latency_df.sort_values("Total", ascending=True),
-        x="Model",
-        y=["OCR", "Extraction"],
-        title="Latency by Model Combination (OCR + Extraction)",
-        height=600,
-        color_discrete_sequence=["#636EFA", "#EF553B"],
+    render_chart(report, "cost", "Cost per 1,000 Pages")
+    render_chart(report, "cost_breakdown", "Cost Breakdown")
+    render_chart(report, "latency", "Latency")
+    render_chart(report, "total_latency", "Total Latency")
+
+    # Percentiles from the per-model sketches
+    st.header("Latency and Cost Percentiles")
+    metric = st.selectbox(
+        "Metric",
+        list(PERCENTILE_METRICS),
+        format_func=lambda m: PERCENTILE_METRICS[m][0],
     )
-    fig5.update_layout(
-        barmode="stack",
-        showlegend=True,
-        legend_title="Phase",
-        yaxis=dict(
-            range=[
-                0,
-                latency_df["Total"].max() * 1.2,
-            ]  # Set y-axis range to 120% of max value
-        ),
-    )
-    fig5.update_traces(texttemplate="%{y:.2f}s", textposition="inside")
-    st.plotly_chart(fig5)
-
-    # Total latency chart
-    total_latency_df = pd.DataFrame(
-        {
-            "Model": model_stats.index,
-            "Total Latency": model_stats["ocr_latency"]
-            + model_stats["extraction_latency"],
-        }
-    )
-    fig6 = px.bar(
-        total_latency_df.sort_values("Total Latency", ascending=True),
-        x="Model",
-        y="Total Latency",
-        title="Total Latency by Model Combination",
-        height=600,
-        color_discrete_sequence=["#636EFA"],
-    )
-    fig6.update_layout(showlegend=False)
-    fig6.update_traces(texttemplate="%{y:.2f}s", textposition="outside")
-    st.plotly_chart(fig6)
+    with timed("chart", "Percentiles"):
+        fig_percentiles = report.percentile_figure(metric)
+        if fig_percentiles is None:
+            metric_label = PERCENTILE_METRICS[metric][0]
+            st.info(f"No {metric_label.lower()} recorded for this run.")
+        else:
+            st.plotly_chart(fig_percentiles)
 
     # Add new token usage chart at the bottom
     st.header("Token Usage Analysis")
-    token_df = pd.DataFrame(
-        {
-            "Model": model_stats.index,
-            "Input Tokens": model_stats["ocr_input_tokens"],
-            "Output Tokens": model_stats["ocr_output_tokens"],
-            "Extraction Input Tokens": model_stats["extraction_input_tokens"],
-            "Extraction Output Tokens": model_stats["extraction_output_tokens"],
-        }
-    )
+    render_chart(report, "token_usage", "Token Usage")
 
-    # Calculate total tokens for sorting
-    token_df["Total"] = (
-        token_df["Input Tokens"]
-        + token_df["Output Tokens"]
-        + token_df["Extraction Input Tokens"]
-        + token_df["Extraction Output Tokens"]
-    )
 
-    fig_tokens = px.bar(
-        token_df.sort_values("Total", ascending=True),
-        x="Model",
-        y=[
-            "Input Tokens",
-            "Output Tokens",
-            "Extraction Input Tokens",
-            "Extraction Output Tokens",
-        ],
-        title="Average Token Usage per Page by Model Combination",
-        height=600,
-        color_discrete_sequence=["#636EFA", "#EF553B", "#7B83FB", "#F76D57"],
+def render_results_table(timestamp):
+    """Detailed results, one page at a time, sorted and filtered by the loader"""
+    st.header("Test Results")
+    col1, col2, col3, col4 = st.columns([3, 2, 2, 1])
+    with col1:
+        model_key = st.selectbox(
+            "Model", [ALL_MODELS] + load_model_keys_for_run(timestamp)
+        )
+    with col2:
+        error_filter = st.selectbox("Errors", list(ERROR_FILTERS))
+    with col3:
+        sort_by = st.selectbox(
+            "Sort by",
+            list(RESULTS_TABLE_COLUMNS),
+            format_func=RESULTS_TABLE_COLUMNS.get,
+        )
+    with col4:
+        st.markdown('<div style="margin-top: 32px;">', unsafe_allow_html=True)
+        descending = st.toggle("Descending")
+
+    filters = {
+        "model_key": None if model_key == ALL_MODELS else model_key,
+        "has_error": ERROR_FILTERS[error_filter],
+        "only_with_diffs": False,
+    }
+
+    # Go back to the first page whenever the run, filters or sort change
+    selection_key = (timestamp, tuple(sorted(filters.items())), sort_by, descending)
+    if st.session_state.get("results_table_key") != selection_key:
+        st.session_state.results_table_key = selection_key
+        st.session_state.results_table_page = 1
+
+    # The page input is not rendered (and its state is dropped) while no
+    # results match, so the page may be missing on the next rerun
+    page_number = st.session_state.get("results_table_page", 1)
+    page = load_results_page_for_run(
+        timestamp,
+        filters,
+        sort_by=sort_by,
+        descending=descending,
+        offset=(page_number - 1) * RESULTS_PAGE_SIZE,
+        limit=RESULTS_PAGE_SIZE,
     )
+    page_count = max(-(-page["total"] // RESULTS_PAGE_SIZE), 1)
+    if page_number > page_count:
+        # The run shrank below the current page, e.g. after filtering
+        st.session_state.results_table_page = page_count
+        st.rerun()
+    if not page["rows"]:
+        st.info("No results match the selected filters.")
+        return
 
-    fig_tokens.update_layout(
-        barmode="stack",
-        showlegend=True,
-        legend_title="Token Type",
-        yaxis=dict(
-            title="Number of Tokens",
-            range=[0, token_df["Total"].max() * 1.2],
-        ),
-    )
-    fig_tokens.update_traces(texttemplate="%{y:.0f}", textposition="inside")
-    st.plotly_chart(fig_tokens)
+    with timed("table", "Test Results") as span:
+        df = create_results_table(page["rows"])
+        event = st.dataframe(
+            df,
+            column_config={
+                "Image": st.column_config.LinkColumn("Image"),
+                "JSON Accuracy": st.column_config.NumberColumn(format="%.4f"),
+                "Total Cost": st.column_config.NumberColumn(format="$%.4f"),
+                "Duration (ms)": st.column_config.NumberColumn(format="%.0f"),
+            },
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+        )
+        span["rows"] = len(df)
 
-    # Detailed Results Table
-    st.header("Test Results")
-    df = create_results_table(results)
-    st.dataframe(df)
+    first = (page_number - 1) * RESULTS_PAGE_SIZE + 1
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.caption(
+            f"Results {first}-{first + len(df) - 1} of {page['total']}. "
+            "Select a row to show its metadata."
+        )
+    with col2:
+        st.number_input(
+            "Page", min_value=1, max_value=page_count, key="results_table_page"
+        )
+
+    # Metadata is only loaded for the selected row
+    selected_rows = event.selection.rows
+    if selected_rows:
+        result_id = df["ID"].iloc[selected_rows[0]]
+        with st.expander(f"Metadata of result {result_id}", expanded=True):
+            st.json(load_result_metadata(timestamp, str(result_id)))
 
 
 if __name__ == "__main__":
-    main()
+    with instrumented_page("Performance Metrics"):
+        main()
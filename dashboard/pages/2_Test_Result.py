@@ -1,20 +1,58 @@
 import base64
-import requests
 import streamlit as st
-from difflib import HtmlDiff
 from utils.data_loader import (
     load_run_list,
-    load_results_for_run,
-    format_timestamp,
+    load_result_ids_for_run,
+    load_model_keys_for_run,
+    format_run,
     load_one_result,
+    load_result_payload,
 )
+from utils.markdown_diff import (
+    HTML_DIFF_MAX_CHARS,
+    build_html_diff,
+    markdown_similarity,
+    summarize_markdown_diff,
+)
+from utils.prefetch import ResultPrefetcher, neighbour_ids
+from utils.preview import PreviewCache
+from utils.debug_panel import instrumented_page
+from utils.instrumentation import timed
 from utils.style import SIDEBAR_STYLE
 
+# Number of test case ids fetched per page for the case selector
+PAGE_SIZE = 100
+
+# Number of test cases on each side of the selected one loaded in the background
+PREFETCH_NEIGHBOURS = 3
+
+# Width in pixels of rendered document previews
+PREVIEW_WIDTH = 700
+
+# Number of changed hunks shown per page in the summarized markdown diff
+DIFF_HUNKS_PER_PAGE = 20
+
+ALL_MODELS = "All models"
+
+ERROR_FILTERS = {"All": None, "Errors only": True, "Without errors": False}
+
 
 st.set_page_config(page_title="Test Results", layout="wide")
 st.markdown(SIDEBAR_STYLE, unsafe_allow_html=True)
 
 
+@st.cache_resource
+def get_result_prefetcher():
+    """Prefetcher shared across reruns and sessions"""
+    return ResultPrefetcher(load_one_result)
+
+
+@st.cache_resource
+def get_preview_cache():
+    """On-disk preview cache shared across reruns and sessions"""
+    return PreviewCache()
+
+
 def display_json_diff(test_case, container):
     """Display JSON differences in a readable format"""
     # First check for errors
@@ -91,43 +129,114 @@ def display_file_preview(test_case, container):
             f"**Direct Image Extraction:** {'Yes' if direct_image else 'No'}"
         )
 
+    preview_cache = get_preview_cache()
+
     def show_pdf(url):
 
         try:
-            response = requests.get(url)
-            response.raise_for_status()  # Raise an exception for bad status codes
-            base64_pdf = base64.b64encode(response.content).decode("utf-8")
-            pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="520" height="1000" type="application/pdf"></iframe>'
-            st.markdown(pdf_display, unsafe_allow_html=True)
+            if not preview_cache.supports_pdf_thumbnails:
+                # Without a renderer, embed the cached file instead of refetching it
+                base64_pdf = base64.b64encode(
+                    preview_cache.fetch(url).read_bytes()
+                ).decode("utf-8")
+                pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="520" height="1000" type="application/pdf"></iframe>'
+                st.markdown(pdf_display, unsafe_allow_html=True)
+                return
+
+            # Render only the page being looked at
+            page_count = preview_cache.page_count(url)
+            page = 1
+            if page_count > 1:
+                page = st.number_input(
+                    f"Page (of {page_count})",
+                    min_value=1,
+                    max_value=page_count,
+                    value=1,
+                    key=f"preview_page_{url}",
+                )
+            st.image(str(preview_cache.thumbnail(url, page - 1, PREVIEW_WIDTH)))
+            st.markdown(f"You can [view the full PDF]({url}) in a new tab.")
         except Exception as e:
             st.error(f"Failed to load PDF: {str(e)}")
             st.markdown(f"You can [view the PDF directly]({url}) in a new tab.")
 
+    def show_image(url):
+        try:
+            st.image(str(preview_cache.thumbnail(url, 0, PREVIEW_WIDTH)))
+        except Exception as e:
+            st.error(f"Failed to load image: {str(e)}")
+            st.markdown(f"You can [view the image directly]({url}) in a new tab.")
+
     # Display file preview
     if "fileUrl" in test_case:
         file_url = test_case["fileUrl"]
-        if file_url.lower().endswith(".pdf"):
-            with container:
+        with container:
+            if file_url.lower().endswith(".pdf"):
                 show_pdf(file_url)
-        else:
-            container.image(file_url, width=700)
+            else:
+                show_image(file_url)
     else:
         container.warning("No file preview available")
 
 
-def display_markdown_diff(test_case):
+@st.cache_data(max_entries=32, show_spinner="Computing diff...")
+def get_markdown_diff_html(timestamp, result_id, _true_markdown, _predicted_markdown):
+    """Side-by-side HTML diff of a test case, cached per (timestamp, id)"""
+    with timed("diff", "build_html_diff") as span:
+        span["bytes"] = len(_true_markdown) + len(_predicted_markdown)
+        return build_html_diff(_true_markdown, _predicted_markdown)
+
+
+@st.cache_data(max_entries=32, show_spinner="Computing diff...")
+def get_markdown_diff_summary(
+    timestamp, result_id, _true_markdown, _predicted_markdown
+):
+    """Summarized diff of a large test case, cached per (timestamp, id)"""
+    with timed("diff", "summarize_markdown_diff") as span:
+        span["bytes"] = len(_true_markdown) + len(_predicted_markdown)
+        return summarize_markdown_diff(_true_markdown, _predicted_markdown)
+
+
+@st.cache_data(max_entries=32, show_spinner="Computing text similarity...")
+def get_markdown_similarity(timestamp, result_id, _true_markdown, _predicted_markdown):
+    """Text similarity of a test case, cached per (timestamp, id)"""
+    with timed("aggregate", "markdown_similarity") as span:
+        span["bytes"] = len(_true_markdown) + len(_predicted_markdown)
+        return markdown_similarity(_true_markdown, _predicted_markdown)
+
+
+def display_text_similarity(test_case, timestamp, result_id):
+    """Stored text similarity, or one computed here for results without it"""
+    stored = test_case.get("levenshteinDistance")
+    if stored is not None:
+        st.metric("Text Similarity", f"{stored:.2%}")
+        return
+    estimate = get_markdown_similarity(
+        timestamp,
+        result_id,
+        test_case["trueMarkdown"] or "",
+        test_case["predictedMarkdown"] or "",
+    )
+    if estimate is None:
+        st.metric("Text Similarity", "-")
+    elif estimate.exact:
+        st.metric("Text Similarity", f"{estimate.similarity:.2%}")
+    else:
+        st.metric(
+            "Text Similarity",
+            f"{estimate.similarity:.2%}",
+            help="Not stored with the result. Estimated on aligned chunks of "
+            f"the document: the exact value is between {estimate.lower:.2%} "
+            f"and {estimate.upper:.2%}, usually within a few hundredths of a "
+            "percent of the estimate.",
+        )
+
+
+def display_markdown_diff(test_case, timestamp, result_id):
     """Display markdown differences in a side-by-side view"""
     if "trueMarkdown" in test_case and "predictedMarkdown" in test_case:
         st.subheader("Markdown Differences")
-
-        # Create HTML diff
-        differ = HtmlDiff()
-        diff_html = differ.make_file(
-            test_case["trueMarkdown"].splitlines(),
-            test_case["predictedMarkdown"].splitlines(),
-            fromdesc="True Markdown",
-            todesc="Predicted Markdown",
-        )
+        display_text_similarity(test_case, timestamp, result_id)
 
         # Display side-by-side view
         st.markdown("### Side by Side Comparison")
@@ -141,9 +250,50 @@ def display_markdown_diff(test_case):
                 "", test_case["predictedMarkdown"], height=400, key="predicted_markdown"
             )
 
-        # Display HTML diff (optional, behind expander)
-        with st.expander("View HTML Diff"):
+        # Compute the diff only once it is asked for
+        if not st.toggle("View HTML Diff", key="view_markdown_diff"):
+            return
+
+        true_markdown = test_case["trueMarkdown"] or ""
+        predicted_markdown = test_case["predictedMarkdown"] or ""
+        if len(true_markdown) + len(predicted_markdown) <= HTML_DIFF_MAX_CHARS:
+            diff_html = get_markdown_diff_html(
+                timestamp, result_id, true_markdown, predicted_markdown
+            )
             st.components.v1.html(diff_html, height=600, scrolling=True)
+            return
+
+        # Large documents: only the changed hunks, a page at a time
+        summary = get_markdown_diff_summary(
+            timestamp, result_id, true_markdown, predicted_markdown
+        )
+        unit = summary["unit"]
+        st.info(
+            f"Document too large for a side-by-side diff, showing changed {unit}s only."
+        )
+        cols = st.columns(3)
+        cols[0].metric(f"Added {unit}s", summary["added"])
+        cols[1].metric(f"Removed {unit}s", summary["removed"])
+        cols[2].metric(f"Unchanged {unit}s", summary["unchanged"])
+
+        hunks = summary["hunks"]
+        if not hunks:
+            st.success("No differences.")
+            return
+        page_count = (len(hunks) + DIFF_HUNKS_PER_PAGE - 1) // DIFF_HUNKS_PER_PAGE
+        page = 1
+        if page_count > 1:
+            page = st.number_input(
+                f"Diff page (of {page_count})",
+                min_value=1,
+                max_value=page_count,
+                value=1,
+                key="markdown_diff_page",
+            )
+        start = (page - 1) * DIFF_HUNKS_PER_PAGE
+        st.code(
+            "\n\n".join(hunks[start : start + DIFF_HUNKS_PER_PAGE]), language="diff"
+        )
 
 
 def main():
@@ -159,42 +309,69 @@ def main():
     # 1. Select which test run (timestamp)
     col1, col2 = st.columns(2)
     with col1:
+        runs_by_timestamp = {run["timestamp"]: run for run in runs}
         selected_timestamp = st.selectbox(
             "Select Test Run",
-            [run["timestamp"] for run in runs],
-            format_func=format_timestamp,
+            list(runs_by_timestamp),
+            format_func=lambda x: format_run(runs_by_timestamp[x]),
         )
 
-    # Load minimal results for the selected run (just for the dropdown)
-    run_data = load_results_for_run(selected_timestamp, include_metrics_only=True)
-
-    # Get all test cases
-    all_test_cases = run_data.get("results", [])
+    # 2. Filter test cases in the loader; only ids of matching cases are fetched
+    with st.expander("Filters", expanded=False):
+        filter_cols = st.columns(4)
+        model_keys = load_model_keys_for_run(selected_timestamp)
+        model_key = filter_cols[0].selectbox(
+            "Model", [ALL_MODELS] + model_keys, key="filter_model_key"
+        )
+        min_accuracy, max_accuracy = filter_cols[1].slider(
+            "JSON Accuracy", 0.0, 1.0, (0.0, 1.0), step=0.05, key="filter_accuracy"
+        )
+        error_filter = filter_cols[2].selectbox(
+            "Errors", list(ERROR_FILTERS.keys()), key="filter_errors"
+        )
+        only_with_diffs = filter_cols[3].checkbox(
+            "Only cases with differences", value=True, key="filter_only_diffs"
+        )
 
-    # Filter out None values and then filter for diffs
-    all_test_cases = [test for test in all_test_cases if test is not None]
+    filters = {
+        "model_key": None if model_key == ALL_MODELS else model_key,
+        "min_accuracy": None if min_accuracy <= 0.0 else min_accuracy,
+        "max_accuracy": None if max_accuracy >= 1.0 else max_accuracy,
+        "has_error": ERROR_FILTERS[error_filter],
+        "only_with_diffs": only_with_diffs,
+    }
 
-    # 2. Filter test cases for ones that have a non-empty JSON diff
-    results_with_diffs = [
-        test
-        for test in all_test_cases
-        if isinstance(test, dict)
-        and isinstance(test.get("jsonDiffStats"), dict)
-        and test["jsonDiffStats"].get("total", 0) > 0
-    ]
+    # Reset paging whenever the run or the filters change
+    selection_key = (selected_timestamp, tuple(sorted(filters.items())))
+    if st.session_state.get("case_selection_key") != selection_key:
+        st.session_state.case_selection_key = selection_key
+        st.session_state.case_page_cursors = [None]
+        st.session_state.case_page = 0
+        st.session_state.selected_test_idx = 0
 
-    if not results_with_diffs:
-        st.warning("No test cases have JSON differences for this run.")
+    # 3. Load the current page of test case ids (keyset pagination)
+    page_number = st.session_state.case_page
+    page = load_result_ids_for_run(
+        selected_timestamp,
+        filters,
+        after_id=st.session_state.case_page_cursors[page_number],
+        limit=PAGE_SIZE,
+    )
+    page_ids = page["ids"]
+
+    if not page_ids:
+        st.warning("No test cases match the selected filters for this run.")
         return
 
-    # 3. Build the dropdown items from only those filtered test cases
-    test_case_labels = {
-        f"{test['id']}": idx for idx, test in enumerate(results_with_diffs)
-    }
+    st.session_state.selected_test_idx = min(
+        st.session_state.selected_test_idx, len(page_ids) - 1
+    )
 
-    # Initialize session state for selected index if it doesn't exist
-    if "selected_test_idx" not in st.session_state:
-        st.session_state.selected_test_idx = 0
+    def go_to_page(new_page, selected_idx):
+        if new_page == len(st.session_state.case_page_cursors):
+            st.session_state.case_page_cursors.append(page["next_cursor"])
+        st.session_state.case_page = new_page
+        st.session_state.selected_test_idx = selected_idx
 
     with col2:
         # Create a row for the dropdown and navigation buttons
@@ -203,23 +380,26 @@ def main():
         with dropdown_col:
             # Update session state when dropdown changes
             selected_test_id = st.selectbox(
-                "Select Test Case (Only Cases with Differences)",
-                options=list(test_case_labels.keys()),
+                f"Select Test Case (Page {page_number + 1})",
+                options=page_ids,
                 format_func=lambda x: f"{x}",
                 index=st.session_state.selected_test_idx,
             )
-            st.session_state.selected_test_idx = test_case_labels[selected_test_id]
+            st.session_state.selected_test_idx = page_ids.index(selected_test_id)
 
         with nav_col_1:
             st.write(
                 '<div style="display: flex; justify-content: center; align-items: center;">',
                 unsafe_allow_html=True,
             )
-            # Add navigation buttons
+            # Add navigation buttons, crossing page boundaries when needed
             if st.button("←"):
                 if st.session_state.selected_test_idx > 0:
                     st.session_state.selected_test_idx -= 1
                     st.rerun()
+                elif page_number > 0:
+                    go_to_page(page_number - 1, PAGE_SIZE - 1)
+                    st.rerun()
 
         with nav_col_2:
             st.write(
@@ -227,14 +407,28 @@ def main():
                 unsafe_allow_html=True,
             )
             if st.button("→"):
-                if st.session_state.selected_test_idx < len(results_with_diffs) - 1:
+                if st.session_state.selected_test_idx < len(page_ids) - 1:
                     st.session_state.selected_test_idx += 1
                     st.rerun()
+                elif page["next_cursor"] is not None:
+                    go_to_page(page_number + 1, 0)
+                    st.rerun()
 
     # 4. Load only the selected test case
-    selected_result_id = results_with_diffs[st.session_state.selected_test_idx]["id"]
-    detailed_data = load_one_result(selected_timestamp, selected_result_id)
-    test_case = detailed_data["result"]
+    selected_result_id = page_ids[st.session_state.selected_test_idx]
+    prefetcher = get_result_prefetcher()
+    detailed_data = prefetcher.get(selected_timestamp, selected_result_id)
+
+    # Warm the cache with the cases the arrow buttons lead to next
+    prefetcher.prefetch(
+        selected_timestamp,
+        neighbour_ids(
+            page_ids, st.session_state.selected_test_idx, PREFETCH_NEIGHBOURS
+        ),
+    )
+
+    # Cached and prefetched results keep their payload compressed until shown
+    test_case = load_result_payload(selected_timestamp, detailed_data["result"])
 
     # Display run metadata if available
     if detailed_data.get("description") or detailed_data.get("run_by"):
@@ -268,8 +462,9 @@ def main():
 
     # Display markdown diff at the bottom
     st.markdown("---")  # Add a separator
-    display_markdown_diff(test_case)
+    display_markdown_diff(test_case, selected_timestamp, selected_result_id)
 
 
 if __name__ == "__main__":
-    main()
+    with instrumented_page("Test Results"):
+        main()
@@ -0,0 +1,202 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+
+from utils.data_loader import load_run_list, load_run_comparison, format_run
+from utils.debug_panel import instrumented_page
+from utils.instrumentation import timed
+from utils.style import SIDEBAR_STYLE
+
+# Maximum number of changed documents listed
+CHANGED_LIMIT = 1000
+
+CHANGE_FILTERS = {
+    "Regressions": "regression",
+    "Improvements": "improvement",
+    "All changes": None,
+}
+
+DELTA_COLUMNS = [
+    "model_key",
+    "documents",
+    "regressions",
+    "improvements",
+    "base_json_accuracy",
+    "compare_json_accuracy",
+    "json_accuracy_delta",
+    "base_text_accuracy",
+    "compare_text_accuracy",
+    "text_accuracy_delta",
+    "base_latency",
+    "compare_latency",
+    "latency_delta",
+    "base_cost",
+    "compare_cost",
+    "cost_delta",
+    "base_errors",
+    "compare_errors",
+]
+
+CHANGED_COLUMNS = [
+    "file_url",
+    "model_key",
+    "base_json_accuracy",
+    "compare_json_accuracy",
+    "json_accuracy_delta",
+    "base_text_accuracy",
+    "compare_text_accuracy",
+    "text_accuracy_delta",
+    "base_latency",
+    "compare_latency",
+    "latency_delta",
+    "base_error",
+    "compare_error",
+]
+
+st.set_page_config(page_title="Run Comparison", layout="wide")
+st.markdown(SIDEBAR_STYLE, unsafe_allow_html=True)
+
+
+@st.cache_data(ttl=60, show_spinner="Comparing runs...")
+def get_run_comparison(
+    base_timestamp, compare_timestamp, accuracy_threshold, latency_threshold
+):
+    return load_run_comparison(
+        base_timestamp,
+        compare_timestamp,
+        accuracy_threshold,
+        latency_threshold,
+        CHANGED_LIMIT,
+    )
+
+
+def main():
+    st.title("Run Comparison")
+
+    runs = load_run_list()
+    if len(runs) < 2:
+        st.warning("At least two benchmark runs are needed for a comparison.")
+        return
+
+    runs_by_timestamp = {run["timestamp"]: run for run in runs}
+    timestamps = list(runs_by_timestamp)
+    col1, col2 = st.columns(2)
+    with col1:
+        base_timestamp = st.selectbox(
+            "Base Run",
+            timestamps,
+            index=1,
+            format_func=lambda x: format_run(runs_by_timestamp[x]),
+        )
+    with col2:
+        compare_timestamp = st.selectbox(
+            "Compared Run",
+            timestamps,
+            index=0,
+            format_func=lambda x: format_run(runs_by_timestamp[x]),
+        )
+    if base_timestamp == compare_timestamp:
+        st.info("Select two different runs to compare.")
+        return
+
+    col1, col2 = st.columns(2)
+    with col1:
+        accuracy_threshold = st.slider(
+            "Accuracy change threshold",
+            0.0,
+            0.5,
+            0.05,
+            0.01,
+            help="Minimum change in JSON accuracy or text similarity that counts as a regression or improvement",
+        )
+    with col2:
+        latency_threshold = st.number_input(
+            "Latency change threshold (s)",
+            min_value=0.0,
+            value=1.0,
+            step=0.5,
+        )
+
+    comparison = get_run_comparison(
+        base_timestamp, compare_timestamp, accuracy_threshold, latency_threshold
+    )
+    model_deltas = pd.DataFrame(comparison["model_deltas"], columns=DELTA_COLUMNS)
+    if model_deltas.empty:
+        st.warning("The two runs have no documents and model combinations in common.")
+        return
+
+    st.header("Changes by Model")
+    st.dataframe(
+        model_deltas.set_index("model_key").style.format(
+            {
+                "base_json_accuracy": "{:.2%}",
+                "compare_json_accuracy": "{:.2%}",
+                "json_accuracy_delta": "{:+.2%}",
+                "base_text_accuracy": "{:.2%}",
+                "compare_text_accuracy": "{:.2%}",
+                "text_accuracy_delta": "{:+.2%}",
+                "base_latency": "{:.2f} s",
+                "compare_latency": "{:.2f} s",
+                "latency_delta": "{:+.2f} s",
+                "base_cost": "${:.4f}",
+                "compare_cost": "${:.4f}",
+                "cost_delta": "${:+.4f}",
+            },
+            na_rep="-",
+        )
+    )
+
+    delta_chart_df = model_deltas.rename(
+        columns={
+            "model_key": "Model",
+            "json_accuracy_delta": "JSON Accuracy",
+            "text_accuracy_delta": "Text Similarity",
+        }
+    )
+    with timed("chart", "Accuracy Change"):
+        fig = px.bar(
+            delta_chart_df,
+            x="Model",
+            y=["JSON Accuracy", "Text Similarity"],
+            barmode="group",
+            title="Accuracy Change by Model (Compared - Base)",
+            height=500,
+            color_discrete_sequence=["#636EFA", "#EF553B"],
+        )
+        fig.update_layout(legend_title="Metric", yaxis=dict(title="Change"))
+        fig.update_traces(texttemplate="%{y:+.1%}", textposition="outside")
+        st.plotly_chart(fig)
+
+    st.header("Changed Documents")
+    changed = pd.DataFrame(comparison["changed"])
+    change_filter = st.radio("Show", list(CHANGE_FILTERS), horizontal=True)
+    if not changed.empty and CHANGE_FILTERS[change_filter]:
+        changed = changed[changed[CHANGE_FILTERS[change_filter]]]
+    if changed.empty:
+        st.success("No documents changed beyond the thresholds.")
+        return
+
+    if len(comparison["changed"]) >= CHANGED_LIMIT:
+        st.caption(f"Showing the {CHANGED_LIMIT} changes with the largest drops.")
+    st.dataframe(
+        changed[CHANGED_COLUMNS].style.format(
+            {
+                "base_json_accuracy": "{:.2%}",
+                "compare_json_accuracy": "{:.2%}",
+                "json_accuracy_delta": "{:+.2%}",
+                "base_text_accuracy": "{:.2%}",
+                "compare_text_accuracy": "{:.2%}",
+                "text_accuracy_delta": "{:+.2%}",
+                "base_latency": "{:.2f} s",
+                "compare_latency": "{:.2f} s",
+                "latency_delta": "{:+.2f} s",
+            }
+        ),
+        column_config={"file_url": st.column_config.LinkColumn("Document")},
+        hide_index=True,
+    )
+
+
+if __name__ == "__main__":
+    with instrumented_page("Run Comparison"):
+        main()
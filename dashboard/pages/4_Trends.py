@@ -0,0 +1,175 @@
+import streamlit as st
+import plotly.express as px
+import pandas as pd
+
+from utils.aggregations import PERCENTILES, merged_model_sketches, percentile_frame
+from utils.data_loader import load_model_sketches, load_model_stats_history
+from utils.debug_panel import instrumented_page
+from utils.instrumentation import timed
+from utils.report import PERCENTILE_METRICS
+from utils.style import SIDEBAR_STYLE
+
+# Metric label: history column and plotly number format
+TREND_METRICS = {
+    "JSON Accuracy": ("json_accuracy", ".1%"),
+    "Text Similarity": ("text_accuracy", ".1%"),
+    "Cost per 1,000 Pages": ("cost_per_1000", "$.2f"),
+    "Latency (s)": ("latency", ".2f"),
+}
+
+# Models preselected when the latest run has none
+DEFAULT_MODEL_COUNT = 5
+
+# Above this many points the chart is drawn with WebGL
+WEBGL_MIN_POINTS = 1000
+
+st.set_page_config(page_title="Trends", layout="wide")
+st.markdown(SIDEBAR_STYLE, unsafe_allow_html=True)
+
+
+@st.cache_data(ttl=300, show_spinner="Loading run summaries...")
+def get_history():
+    """Per-model summaries of all runs as a DataFrame, oldest first"""
+    history = pd.DataFrame(load_model_stats_history())
+    if history.empty:
+        return history
+    history["created_at"] = pd.to_datetime(history["created_at"])
+    history["cost_per_1000"] = history["total_cost"] * 1000
+    history["latency"] = history["ocr_latency"] + history["extraction_latency"]
+    return history
+
+
+@st.cache_data(ttl=300, show_spinner="Merging run sketches...")
+def get_percentiles(timestamps):
+    """Latency and cost percentiles of each model over all the given runs"""
+    merged = merged_model_sketches(load_model_sketches(list(timestamps)))
+    return percentile_frame(merged, PERCENTILES)
+
+
+def main():
+    st.title("Trends")
+
+    history = get_history()
+    if history.empty:
+        st.warning("No completed benchmark runs with summaries found.")
+        return
+
+    latest_run = history["timestamp"].iloc[-1]
+    models = sorted(history["model_key"].unique())
+    default_models = sorted(
+        history.loc[history["timestamp"] == latest_run, "model_key"].unique()
+    ) or list(history["model_key"].value_counts().index[:DEFAULT_MODEL_COUNT])
+
+    col1, col2 = st.columns([1, 2])
+    with col1:
+        metric_label = st.selectbox("Metric", list(TREND_METRICS))
+        first_day = history["created_at"].min().date()
+        last_day = history["created_at"].max().date()
+        date_range = st.date_input(
+            "Runs between",
+            (first_day, last_day),
+            min_value=first_day,
+            max_value=last_day,
+        )
+    with col2:
+        selected_models = st.multiselect("Model Combinations", models, default_models)
+
+    metric, value_format = TREND_METRICS[metric_label]
+    trend = history[history["model_key"].isin(selected_models)]
+    if len(date_range) == 2:
+        start, end = (pd.Timestamp(day) for day in date_range)
+        trend = trend[
+            (trend["created_at"] >= start)
+            & (trend["created_at"] < end + pd.Timedelta(days=1))
+        ]
+    if trend.empty:
+        st.info("No runs match the selected models and dates.")
+        return
+
+    with timed("chart", "Trend") as span:
+        fig = px.line(
+            trend,
+            x="created_at",
+            y=metric,
+            color="model_key",
+            markers=True,
+            hover_data={"timestamp": True, "count": True},
+            render_mode="webgl" if len(trend) > WEBGL_MIN_POINTS else "svg",
+            title=f"{metric_label} by Model Combination over Time",
+            height=600,
+            labels={"created_at": "Run", "model_key": "Model", metric: metric_label},
+        )
+        fig.update_layout(yaxis=dict(tickformat=value_format))
+        st.plotly_chart(fig, use_container_width=True)
+        span["rows"] = len(trend)
+
+    # Latest value of each model against its previous run
+    st.header("Latest Runs")
+    latest = trend.groupby("model_key").tail(2)
+    summary = latest.groupby("model_key").agg(
+        last_run=("timestamp", "last"),
+        runs=("timestamp", "size"),
+        latest=(metric, "last"),
+        previous=(metric, "first"),
+    )
+    summary["change"] = (summary["latest"] - summary["previous"]).where(
+        summary["runs"] > 1
+    )
+    summary["runs"] = trend.groupby("model_key").size()
+    summary = summary.drop(columns="previous").rename(
+        columns={
+            "last_run": "Last Run",
+            "runs": "Runs",
+            "latest": metric_label,
+            "change": "Change vs. Previous Run",
+        }
+    )
+    number_format = "{:.2%}" if value_format.endswith("%") else "{:.4f}"
+    st.dataframe(
+        summary.style.format(
+            {metric_label: number_format, "Change vs. Previous Run": number_format},
+            na_rep="-",
+        )
+    )
+
+    # Stored sketches merge into the distribution of all the selected runs,
+    # which averaging each run's percentiles would not give
+    st.header("Percentiles over the Selected Runs")
+    percentile_metric = st.selectbox(
+        "Metric",
+        list(PERCENTILE_METRICS),
+        format_func=lambda key: PERCENTILE_METRICS[key][0],
+        key="percentile_metric",
+    )
+    percentile_label, percentile_format = PERCENTILE_METRICS[percentile_metric]
+    run_timestamps = tuple(sorted(trend["timestamp"].unique()))
+    percentiles = get_percentiles(run_timestamps)
+    percentiles = percentiles[
+        (percentiles["Metric"] == percentile_metric)
+        & percentiles["Model"].isin(selected_models)
+    ]
+    if percentiles.empty:
+        st.info("The selected runs recorded no sketches for this metric.")
+        return
+
+    with timed("chart", "Percentiles") as span:
+        quantile_columns = [c for c in percentiles.columns if c.startswith("p")]
+        fig = px.bar(
+            percentiles.sort_values(quantile_columns[0], ascending=True),
+            x="Model",
+            y=quantile_columns,
+            barmode="group",
+            hover_data={"Count": True},
+            title=f"{percentile_label} Percentiles over {len(run_timestamps)} Runs",
+            height=600,
+            color_discrete_sequence=["#636EFA", "#7B83FB", "#EF553B"],
+        )
+        fig.update_layout(legend_title="Percentile", yaxis=dict(title=percentile_label))
+        fig.update_traces(texttemplate=percentile_format, textposition="outside")
+        st.plotly_chart(fig, use_container_width=True)
+        span["rows"] = len(percentiles)
+
+
+if __name__ == "__main__":
+    with instrumented_page("Trends"):
+        main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The dashboard imports its modules as utils.*, relative to dashboard/
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.aggregations import RunAggregates, result_metrics_frame
+from utils.bootstrap import confidence_interval, confidence_intervals
+from utils.report import metric_confidence_intervals, paired_differences
+
+
+def test_intervals_cover_the_true_mean_at_the_stated_rate():
+    # Bernoulli(0.3) and uniform scores, as JSON accuracy and text similarity
+    # look like; 95% intervals should miss the true mean about 5% of the time
+    rng = np.random.default_rng(1)
+    trials = 400
+    for draw, true_mean in (
+        (lambda: rng.random(200) < 0.3, 0.3),
+        (lambda: rng.random(200), 0.5),
+    ):
+        covered = 0
+        for _ in range(trials):
+            ci = confidence_interval(draw(), n_resamples=2000, seed=None)
+            covered += ci["low"] <= true_mean <= ci["high"]
+        assert 0.91 <= covered / trials <= 0.98
+
+
+def test_fixed_seed_is_reproducible():
+    values = {"a": np.random.default_rng(2).random(500), "b": np.arange(10) / 10}
+    assert confidence_intervals(values) == confidence_intervals(values)
+    assert confidence_intervals(values, seed=7) == confidence_intervals(values, seed=7)
+    assert (
+        confidence_intervals(values, seed=7)["a"]
+        != confidence_intervals(values, seed=8)["a"]
+    )
+
+
+def test_single_sample_and_empty_groups():
+    intervals = confidence_intervals({"one": [0.7], "none": [np.nan]})
+    assert intervals["one"] == {"mean": 0.7, "low": 0.7, "high": 0.7, "n": 1}
+    assert intervals["none"]["n"] == 0
+    assert np.isnan(intervals["none"]["mean"])
+
+
+def test_intervals_and_bars_average_the_same_results():
+    def result(model, json_accuracy, text, error=None, extraction=True):
+        test = {
+            "ocrModel": model,
+            "extractionModel": model,
+            "fileUrl": f"{model}-{json_accuracy}-{text}-{error}",
+            "levenshteinDistance": text,
+            "usage": {"extraction": {"duration": 10}} if extraction else {},
+            "error": error,
+        }
+        if json_accuracy != "missing":
+            test["jsonAccuracy"] = json_accuracy
+        return test
+
+    results = [
+        result("a", 1.0, 0.5),
+        result("a", 0.5, None),
+        result("a", None, 1.0),
+        result("a", "missing", 0.25),
+        result("a", 0.0, 0.0, error="timeout"),
+        result("a", 0.25, 0.75, extraction=False),
+        result("b", None, 0.5),
+    ]
+    json_df, text_df = RunAggregates.from_results(results).accuracy_frames()
+    intervals = metric_confidence_intervals(result_metrics_frame(results))
+
+    assert intervals["JSON Accuracy"]["a → a"]["mean"] == pytest.approx(
+        json_df.loc["a → a", "JSON Accuracy"]
+    )
+    # A null score counts as 0 and a missing one is left out
+    assert intervals["JSON Accuracy"]["a → a"]["n"] == 4
+    assert json_df.loc["a → a", "JSON Accuracy"] == pytest.approx(1.75 / 4)
+    assert intervals["Text Similarity"]["a → a"]["mean"] == pytest.approx(
+        text_df.loc["a → a", "Text Similarity"]
+    )
+    assert intervals["Text Similarity"]["a → a"]["n"] == 5
+    # Only a null score: a single 0, and a bar at 0
+    assert intervals["JSON Accuracy"]["b → b"]["n"] == 1
+    assert intervals["JSON Accuracy"]["b → b"]["mean"] == 0
+    assert json_df.loc["b → b", "JSON Accuracy"] == 0
+
+
+def test_models_without_scores_can_be_the_baseline():
+    metrics_df = pd.DataFrame(
+        {
+            "Model": ["ocr", "ocr", "llm", "llm"],
+            "fileUrl": ["a.pdf", "b.pdf", "a.pdf", "b.pdf"],
+            # OCR-only runs have no JSON accuracy
+            "JSON Accuracy": [np.nan, np.nan, 1.0, 0.5],
+        }
+    )
+    (row,) = paired_differences(metrics_df, "JSON Accuracy", "ocr").to_dict("records")
+    assert row["Model"] == "llm"
+    assert row["Documents"] == 0
+    (row,) = paired_differences(metrics_df, "JSON Accuracy", "llm").to_dict("records")
+    assert row["Model"] == "ocr"
+    assert row["Documents"] == 0
+    assert not row["Significant"]
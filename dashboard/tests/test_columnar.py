@@ -0,0 +1,71 @@
+import json
+
+from utils.columnar import read_metric_record, read_metric_records, read_result
+from utils.data_loader import load_model_stats_for_run_from_folder
+
+RESULTS = [
+    {
+        "fileUrl": "scored.pdf",
+        "ocrModel": "gpt-4o",
+        "extractionModel": "gpt-4o",
+        "jsonAccuracy": 1.0,
+        "levenshteinDistance": 0.5,
+        "usage": {"duration": 1000},
+        "error": None,
+        "trueMarkdown": "# Scored",
+    },
+    {
+        "fileUrl": "unscored.pdf",
+        "ocrModel": "gpt-4o",
+        "extractionModel": "gpt-4o",
+        "jsonAccuracy": None,
+        "directImageExtraction": None,
+        "usage": None,
+        "trueMarkdown": "# Unscored",
+    },
+]
+
+
+def write_results(tmp_path, results=RESULTS):
+    run_dir = tmp_path / "2025-01-01-00-00-00"
+    run_dir.mkdir()
+    path = run_dir / "results.json"
+    path.write_text(json.dumps(results))
+    return path
+
+
+def test_null_and_missing_values_round_trip(tmp_path):
+    path = write_results(tmp_path)
+    records = read_metric_records(path)
+    for record, result in zip(records, RESULTS):
+        assert record == {
+            "id": record["id"],
+            **{k: v for k, v in result.items() if k != "trueMarkdown"},
+        }
+    # Null scalars and JSON values are kept; keys the result lacked are not
+    assert records[1]["jsonAccuracy"] is None
+    assert records[1]["usage"] is None
+    assert "error" not in records[1]
+    assert "levenshteinDistance" not in records[1]
+
+
+def test_column_subsets_keep_null_values(tmp_path):
+    path = write_results(tmp_path)
+    records = read_metric_records(path, ["jsonAccuracy", "levenshteinDistance"])
+    assert records == [
+        {"id": 0, "jsonAccuracy": 1.0, "levenshteinDistance": 0.5},
+        {"id": 1, "jsonAccuracy": None},
+    ]
+    assert read_metric_record(path, 1, ["jsonAccuracy"]) == {
+        "id": 1,
+        "jsonAccuracy": None,
+    }
+    result = read_result(path, 1)
+    assert result["jsonAccuracy"] is None
+    assert "_present" not in result
+
+
+def test_summary_counts_null_json_accuracy_as_zero(tmp_path):
+    path = write_results(tmp_path)
+    (stats,) = load_model_stats_for_run_from_folder(path.parent.name, str(tmp_path))
+    assert stats["chart_json_accuracy"] == 0.5
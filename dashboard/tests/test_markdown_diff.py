@@ -0,0 +1,115 @@
+import random
+from difflib import SequenceMatcher
+
+import pytest
+
+from utils import markdown_diff
+from utils.markdown_diff import PatienceMatcher, summarize_markdown_diff
+
+
+def apply_opcodes(a, b, opcodes):
+    out = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            assert a[i1:i2] == b[j1:j2]
+            out.extend(a[i1:i2])
+        else:
+            out.extend(b[j1:j2])
+    return out
+
+
+def edited(lines, rng, edits):
+    lines = list(lines)
+    for _ in range(edits):
+        i = rng.randrange(len(lines) + 1)
+        action = rng.choice(["insert", "delete", "replace"])
+        if action == "insert" or not lines[i:]:
+            lines.insert(i, f"new {rng.random()}")
+        elif action == "delete":
+            del lines[i]
+        else:
+            lines[i] = f"changed {rng.random()}"
+    return lines
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_opcodes_rebuild_the_target(seed):
+    rng = random.Random(seed)
+    # Repeated lines (table separators, blank lines) as well as unique ones
+    a = [rng.choice(["", "|---|---|", f"line {i}"]) for i in range(200)]
+    b = edited(a, rng, rng.randrange(1, 30))
+    matcher = PatienceMatcher(a, b)
+
+    assert apply_opcodes(a, b, matcher.get_opcodes()) == b
+    blocks = matcher.get_matching_blocks()
+    assert blocks[-1] == (len(a), len(b), 0)
+    for block in blocks[:-1]:
+        assert block.size > 0
+        assert a[block.a : block.a + block.size] == b[block.b : block.b + block.size]
+
+
+@pytest.mark.parametrize(
+    "a,b",
+    [
+        ([], []),
+        (["x"], []),
+        ([], ["x"]),
+        (["x", "y"], ["x", "y"]),
+        (["a", "b"], ["c", "d"]),
+    ],
+)
+def test_edge_cases(a, b):
+    matcher = PatienceMatcher(a, b)
+    assert apply_opcodes(a, b, matcher.get_opcodes()) == b
+
+
+def test_unique_lines_anchor_the_alignment():
+    a = ["def f():", "}", "}", "}", "}", "def g():", "x"]
+    b = ["def g():", "}", "}", "}", "}", "def f():", "x"]
+    # difflib aligns on the longest common block, the repeated "}" lines
+    difflib_blocks = SequenceMatcher(None, a, b, autojunk=False).get_matching_blocks()
+    assert [tuple(block) for block in difflib_blocks] == [
+        (1, 1, 4),
+        (6, 6, 1),
+        (7, 7, 0),
+    ]
+    # The patience diff aligns on "def g():", which occurs once on each side
+    blocks = PatienceMatcher(a, b).get_matching_blocks()
+    assert [tuple(block) for block in blocks] == [(5, 0, 1), (6, 6, 1), (7, 7, 0)]
+
+
+def test_moved_unique_line_is_an_anchor():
+    a = ["header", "a", "b", "c", "footer"]
+    b = ["header", "c", "a", "b", "footer"]
+    anchors = markdown_diff._unique_common_anchors(a, 1, 4, b, 1, 4)
+    # The longest run of unique lines in the same order on both sides
+    assert anchors == [(1, 2), (2, 3)]
+
+
+def test_large_unanchored_regions_are_replaced_whole(monkeypatch):
+    monkeypatch.setattr(markdown_diff, "EXACT_REGION_MAX_PAIRS", 10)
+    a = ["x", "y"] * 10
+    b = ["y", "x"] * 10 + ["z"]
+    matcher = PatienceMatcher(a, b)
+    assert [op[0] for op in matcher.get_opcodes()] == ["replace"]
+    assert apply_opcodes(a, b, matcher.get_opcodes()) == b
+
+
+def test_summary_counts_words_of_short_documents():
+    summary = summarize_markdown_diff(
+        "# Title\n\nOne two three", "# Title\n\nOne 2 three"
+    )
+    assert summary["unit"] == "word"
+    assert (summary["added"], summary["removed"]) == (1, 1)
+    assert summary["unchanged"] == 4
+    assert "- two" in summary["hunks"][0] and "+ 2" in summary["hunks"][0]
+
+
+def test_summary_counts_lines_of_long_documents():
+    true_lines = [f"line {i}" for i in range(50)]
+    predicted_lines = true_lines[:10] + ["inserted"] + true_lines[11:]
+    summary = summarize_markdown_diff("\n".join(true_lines), "\n".join(predicted_lines))
+    assert summary["unit"] == "line"
+    assert (summary["added"], summary["removed"], summary["unchanged"]) == (1, 1, 49)
+    (hunk,) = summary["hunks"]
+    assert hunk.startswith("@@ -8,7 +8,7 @@")
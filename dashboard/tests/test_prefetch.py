@@ -0,0 +1,86 @@
+import threading
+from collections import Counter
+
+import pytest
+
+from utils.prefetch import ResultPrefetcher, neighbour_ids
+
+
+class Loader:
+    """Counts loads; loads of the ids in `blocked` wait until released"""
+
+    def __init__(self, blocked=(), failing=()):
+        self.calls = Counter()
+        self.blocked = set(blocked)
+        self.failing = set(failing)
+        self.release = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, timestamp, id):
+        with self._lock:
+            self.calls[timestamp, id] += 1
+        if id in self.blocked:
+            self.release.wait(5)
+        if id in self.failing:
+            self.failing.discard(id)
+            raise ConnectionError("reset")
+        return {"timestamp": timestamp, "id": id}
+
+
+def test_get_loads_once_and_then_hits_the_cache():
+    loader = Loader()
+    prefetcher = ResultPrefetcher(loader)
+    assert prefetcher.get("run", 1) == {"timestamp": "run", "id": 1}
+    assert prefetcher.get("run", 1) == {"timestamp": "run", "id": 1}
+    assert prefetcher.get("other", 1) == {"timestamp": "other", "id": 1}
+    assert loader.calls == {("run", 1): 1, ("other", 1): 1}
+
+
+def test_get_waits_for_an_in_flight_prefetch():
+    loader = Loader(blocked={2})
+    prefetcher = ResultPrefetcher(loader)
+    prefetcher.prefetch("run", [2, 3])
+    # Scheduling again while the load is running does not load twice
+    prefetcher.prefetch("run", [2])
+    loader.release.set()
+    assert prefetcher.get("run", 2) == {"timestamp": "run", "id": 2}
+    assert prefetcher.get("run", 3) == {"timestamp": "run", "id": 3}
+    assert loader.calls == {("run", 2): 1, ("run", 3): 1}
+
+
+def test_failed_prefetch_is_retried_in_the_foreground():
+    loader = Loader(failing={4})
+    prefetcher = ResultPrefetcher(loader)
+    prefetcher.prefetch("run", [4])
+    assert prefetcher.get("run", 4) == {"timestamp": "run", "id": 4}
+    assert loader.calls["run", 4] == 2
+    # The foreground result is cached
+    prefetcher.get("run", 4)
+    assert loader.calls["run", 4] == 2
+
+
+def test_least_recently_used_entries_are_evicted():
+    loader = Loader()
+    prefetcher = ResultPrefetcher(loader, max_entries=2)
+    prefetcher.get("run", 1)
+    prefetcher.get("run", 2)
+    prefetcher.get("run", 1)  # 2 is now the least recently used
+    prefetcher.get("run", 3)
+
+    prefetcher.get("run", 1)
+    assert loader.calls["run", 1] == 1
+    prefetcher.get("run", 2)
+    assert loader.calls["run", 2] == 2
+
+
+@pytest.mark.parametrize(
+    "index,count,expected",
+    [
+        (2, 2, ["d", "b", "e", "a"]),
+        (0, 2, ["b", "c"]),
+        (4, 3, ["d", "c", "b"]),
+        (2, 0, []),
+    ],
+)
+def test_neighbour_ids(index, count, expected):
+    assert neighbour_ids(["a", "b", "c", "d", "e"], index, count) == expected
@@ -0,0 +1,120 @@
+import os
+
+import pytest
+from PIL import Image
+
+from utils import preview
+from utils.preview import PreviewCache
+
+
+class Response:
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+
+@pytest.fixture
+def downloads(monkeypatch):
+    """Serve documents from a dict instead of the network, counting requests"""
+    documents = {}
+    requests = []
+
+    def get(url, timeout, stream):
+        requests.append(url)
+        return Response(documents[url])
+
+    monkeypatch.setattr(preview.requests, "get", get)
+    return documents, requests
+
+
+def age(path, seconds):
+    """Make a cached file look last used `seconds` ago"""
+    mtime = path.stat().st_mtime - seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_fetch_downloads_once(tmp_path, downloads):
+    documents, requests = downloads
+    documents["https://example.com/a.PDF?sig=1"] = b"%PDF-1.4"
+    cache = PreviewCache(str(tmp_path))
+
+    path = cache.fetch("https://example.com/a.PDF?sig=1")
+    assert path.name == "source.pdf"
+    assert path.read_bytes() == b"%PDF-1.4"
+    assert cache.fetch("https://example.com/a.PDF?sig=1") == path
+    assert requests == ["https://example.com/a.PDF?sig=1"]
+
+
+def test_image_thumbnail(tmp_path, downloads):
+    documents, requests = downloads
+    source = tmp_path / "page.png"
+    Image.new("RGB", (1400, 2000), "white").save(source)
+    documents["https://example.com/page.png"] = source.read_bytes()
+    cache = PreviewCache(str(tmp_path / "cache"))
+
+    thumbnail = cache.thumbnail("https://example.com/page.png", width=700)
+    with Image.open(thumbnail) as image:
+        assert image.size == (700, 1000)
+    assert cache.page_count("https://example.com/page.png") == 1
+    assert cache.thumbnail("https://example.com/page.png", width=700) == thumbnail
+    assert len(requests) == 1
+
+
+def test_least_recently_used_files_are_evicted(tmp_path, downloads):
+    documents, _ = downloads
+    for name in "abc":
+        documents[f"https://example.com/{name}.png"] = name.encode() * 400
+    cache = PreviewCache(str(tmp_path), max_bytes=1000)
+
+    a = cache.fetch("https://example.com/a.png")
+    b = cache.fetch("https://example.com/b.png")
+    age(a, 20)
+    age(b, 30)
+    cache.fetch("https://example.com/a.png")  # a is used again
+    assert cache._total_bytes == 800
+
+    # 1200 bytes is over budget: b, the least recently used, goes first and
+    # the cache is trimmed to EVICTION_TARGET of max_bytes
+    c = cache.fetch("https://example.com/c.png")
+    assert not b.exists()
+    assert a.exists() and c.exists()
+    assert cache._total_bytes == 800
+
+
+def test_size_is_tracked_without_rescanning(tmp_path, downloads, monkeypatch):
+    documents, _ = downloads
+    for name in "abc":
+        documents[f"https://example.com/{name}.png"] = b"x" * 100
+    # Files from an earlier session are counted by the first scan
+    PreviewCache(str(tmp_path)).fetch("https://example.com/a.png")
+    cache = PreviewCache(str(tmp_path), max_bytes=10_000)
+
+    scans = []
+    scan = cache._scan
+    monkeypatch.setattr(cache, "_scan", lambda: scans.append(1) or scan())
+    cache.fetch("https://example.com/b.png")
+    cache.fetch("https://example.com/c.png")
+    assert cache._total_bytes == 300
+    assert len(scans) == 1
+
+
+def test_eviction_corrects_the_running_total(tmp_path, downloads):
+    documents, _ = downloads
+    for name in "ab":
+        documents[f"https://example.com/{name}.png"] = b"x" * 600
+    cache = PreviewCache(str(tmp_path), max_bytes=1000)
+    a = cache.fetch("https://example.com/a.png")
+    # Another process removed the file; the total still counts it
+    a.unlink()
+    assert cache._total_bytes == 600
+
+    # Over budget by the running total, but the scan finds only 600 bytes
+    b = cache.fetch("https://example.com/b.png")
+    assert b.exists()
+    assert cache._total_bytes == 600
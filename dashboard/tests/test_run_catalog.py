@@ -0,0 +1,110 @@
+import json
+import os
+
+import pytest
+
+from utils.aggregations import merged_model_sketches
+from utils.data_loader import (
+    RUN_CATALOG_FILENAME,
+    load_model_sketches_from_folder,
+    load_model_stats_for_run_from_folder,
+    load_run_list_from_folder,
+)
+
+
+def result(i, error=None):
+    return {
+        "fileUrl": f"doc-{i}.pdf",
+        "ocrModel": "gpt-4o",
+        "extractionModel": "gpt-4o",
+        "directImageExtraction": False,
+        "levenshteinDistance": 0.9,
+        "jsonAccuracy": 0.8,
+        "usage": {"duration": 1000, "totalCost": 0.01, "ocr": {"duration": 400}},
+        "error": error,
+        "trueMarkdown": "# Title",
+    }
+
+
+def write_run(results_dir, timestamp, count, mtime=None):
+    run_dir = results_dir / timestamp
+    run_dir.mkdir(parents=True, exist_ok=True)
+    path = run_dir / "results.json"
+    path.write_text(json.dumps([result(i) for i in range(count)]))
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return path
+
+
+def documents(results_dir):
+    return {
+        run["timestamp"]: run["total_documents"]
+        for run in load_run_list_from_folder(str(results_dir))
+    }
+
+
+def test_listing_counts_runs_without_building_sidecars(tmp_path):
+    write_run(tmp_path, "2025-01-01-00-00-00", 3)
+    write_run(tmp_path, "2025-01-02-00-00-00", 5)
+    (tmp_path / "2025-01-03-00-00-00").mkdir()  # run without results yet
+
+    assert documents(tmp_path) == {
+        "2025-01-01-00-00-00": 3,
+        "2025-01-02-00-00-00": 5,
+    }
+    assert (tmp_path / RUN_CATALOG_FILENAME).exists()
+    assert sorted(p.name for p in tmp_path.rglob("*") if p.is_file()) == [
+        "results.json",
+        "results.json",
+        RUN_CATALOG_FILENAME,
+    ]
+
+
+def test_listing_refreshes_modified_runs(tmp_path):
+    write_run(tmp_path, "2025-01-01-00-00-00", 3, mtime=1_700_000_000)
+    write_run(tmp_path, "2025-01-02-00-00-00", 5, mtime=1_700_000_000)
+    assert documents(tmp_path)["2025-01-02-00-00-00"] == 5
+
+    # Same modification time, different size
+    write_run(tmp_path, "2025-01-02-00-00-00", 7, mtime=1_700_000_000)
+    assert documents(tmp_path) == {
+        "2025-01-01-00-00-00": 3,
+        "2025-01-02-00-00-00": 7,
+    }
+
+    (tmp_path / "2025-01-01-00-00-00" / "results.json").unlink()
+    assert documents(tmp_path) == {"2025-01-02-00-00-00": 7}
+
+
+def test_listing_uses_existing_summaries(tmp_path):
+    write_run(tmp_path, "2025-01-01-00-00-00", 4)
+    stats = load_model_stats_for_run_from_folder("2025-01-01-00-00-00", str(tmp_path))
+    assert [s["count"] for s in stats] == [4]
+
+    # Summarizing a run records its per-model summary in the catalog
+    catalog = json.loads((tmp_path / RUN_CATALOG_FILENAME).read_text())
+    entry = catalog["runs"]["2025-01-01-00-00-00"]
+    assert entry["total_documents"] == 4
+    assert entry["models"][0]["model_key"] == "gpt-4o → gpt-4o"
+
+    (tmp_path / RUN_CATALOG_FILENAME).unlink()
+    assert documents(tmp_path) == {"2025-01-01-00-00-00": 4}
+    catalog = json.loads((tmp_path / RUN_CATALOG_FILENAME).read_text())
+    assert catalog["runs"]["2025-01-01-00-00-00"]["models"] is not None
+
+
+def test_sketches_merge_across_runs(tmp_path):
+    write_run(tmp_path, "2025-01-01-00-00-00", 3)
+    write_run(tmp_path, "2025-01-02-00-00-00", 5)
+    rows = load_model_sketches_from_folder(
+        ["2025-01-01-00-00-00", "2025-01-02-00-00-00"], str(tmp_path)
+    )
+    assert [row["timestamp"] for row in rows] == [
+        "2025-01-01-00-00-00",
+        "2025-01-02-00-00-00",
+    ]
+
+    merged = merged_model_sketches(rows)
+    sketch = merged["gpt-4o → gpt-4o"]["total_latency"]
+    assert sketch.count == 8
+    assert sketch.quantile(0.5) == pytest.approx(1.0, rel=0.01)
@@ -0,0 +1,89 @@
+import math
+import re
+from decimal import Decimal, localcontext
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from utils.sketches import MIN_INDEXABLE_VALUE, DDSketch, merge_sketches
+
+REPO = Path(__file__).resolve().parents[2]
+
+# SQL that builds sketches when a run completes, and its bucket formula
+REFRESH_SQL = "prisma/sql/005_refresh_run_model_stats.sql"
+SQL_KEY = re.compile(r"CEIL\(LN\(value\) / LN\(([\d.]+) / ([\d.]+)\)\)::int")
+
+QUANTILES = [0, 0.01, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1]
+
+
+def distributions():
+    rng = np.random.default_rng(0)
+    return {
+        # Latencies in seconds and costs in USD span several orders of magnitude
+        "lognormal": rng.lognormal(0, 1.5, 20_000),
+        "uniform": rng.uniform(0.001, 0.01, 5_000),
+        "exponential": rng.exponential(2.0, 5_000),
+        "with zeros": np.concatenate([np.zeros(500), rng.lognormal(-3, 1, 1_500)]),
+        "single value": np.array([1.234]),
+    }
+
+
+@pytest.mark.parametrize("name,values", distributions().items())
+def test_quantiles_are_within_the_relative_accuracy(name, values):
+    sketch = DDSketch()
+    sketch.add_all(values)
+    ordered = np.sort(values)
+    for q in QUANTILES:
+        # The sketch answers with the value at rank floor(q * (n - 1))
+        exact = ordered[math.floor(q * (len(values) - 1))]
+        estimate = sketch.quantile(q)
+        if exact <= MIN_INDEXABLE_VALUE:
+            assert estimate == 0
+        else:
+            assert abs(estimate - exact) <= sketch.relative_accuracy * exact, q
+
+
+def test_merge_and_serialization_keep_the_sketch():
+    values = distributions()["lognormal"]
+    whole = DDSketch()
+    whole.add_all(values)
+    parts = []
+    for chunk in np.array_split(values, 7):
+        part = DDSketch()
+        part.add_all(chunk)
+        parts.append(DDSketch.from_dict(part.to_dict()))
+    merged = merge_sketches(parts)
+    assert merged.to_dict() == whole.to_dict()
+    assert [merged.quantile(q) for q in QUANTILES] == [
+        whole.quantile(q) for q in QUANTILES
+    ]
+
+    assert DDSketch().quantile(0.5) is None
+    with pytest.raises(ValueError):
+        whole.merge(DDSketch(0.02))
+
+
+def test_sql_bucket_formula_matches_key():
+    matches = SQL_KEY.findall((REPO / REFRESH_SQL).read_text())
+    assert matches, f"bucket formula not found in {REFRESH_SQL}"
+    sketch = DDSketch()
+    for numerator, denominator in matches:
+        # Postgres divides the literals and takes LN in numeric, then divides
+        # LN(value), a double, by the result rounded to a double
+        with localcontext() as context:
+            context.prec = 40
+            log_gamma = float((Decimal(numerator) / Decimal(denominator)).ln())
+        assert (
+            (Decimal(numerator) - 1)
+            == 1 - Decimal(denominator)
+            == Decimal(repr(sketch.relative_accuracy))
+        )
+
+        rng = np.random.default_rng(1)
+        samples = list(10 ** rng.uniform(-8, 5, 10_000))
+        # Values on bucket boundaries, where rounding decides the bucket
+        samples += [sketch.gamma**i for i in range(-900, 600)]
+        samples += [0.5, 1.0, 2.0, 0.001, 0.01, 1.5, 12.0, 120.0]
+        for value in samples:
+            assert math.ceil(math.log(value) / log_gamma) == sketch.key(value), value
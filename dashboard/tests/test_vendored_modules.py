@@ -0,0 +1,17 @@
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parents[2]
+
+# Runner modules the dashboard keeps a copy of under utils/, so neither side
+# depends on the other's directory being importable. Edit the runner's module
+# and copy it over.
+VENDORED_MODULES = ["payload_codec.py", "text_similarity.py"]
+
+
+@pytest.mark.parametrize("name", VENDORED_MODULES)
+def test_vendored_copy_matches_the_runner(name):
+    runner = (REPO / "tensorlake" / name).read_text()
+    vendored = (REPO / "dashboard" / "utils" / name).read_text()
+    assert vendored == runner, f"copy tensorlake/{name} to dashboard/utils/{name}"
@@ -0,0 +1,314 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.data_loader import ModelSketches, ModelStats, ResultDelta, get_model_key
+from utils.sketches import SKETCH_METRICS, DDSketch, merge_sketches
+
+# Percentiles shown on the Performance Metrics page
+PERCENTILES = [0.5, 0.9, 0.99]
+
+# Columns of the model comparison table, in display order
+MODEL_STATS_COLUMNS = [
+    "count",
+    "json_accuracy",
+    "text_accuracy",
+    "total_cost",
+    "ocr_cost",
+    "extraction_cost",
+    "ocr_latency",
+    "extraction_latency",
+    "extraction_count",
+    "ocr_input_tokens",
+    "ocr_output_tokens",
+    "extraction_input_tokens",
+    "extraction_output_tokens",
+]
+
+# Sums averaged over every successful result vs. over results with extraction
+_PER_RESULT_SUMS = [
+    "text_accuracy",
+    "ocr_latency",
+    "ocr_cost",
+    "total_cost",
+    "ocr_input_tokens",
+    "ocr_output_tokens",
+]
+_PER_EXTRACTION_SUMS = [
+    "json_accuracy",
+    "extraction_latency",
+    "extraction_cost",
+    "extraction_input_tokens",
+    "extraction_output_tokens",
+]
+
+
+def _chart_json_accuracy(sums: Dict[str, float]) -> float:
+    if sums["chart_json_count"] == 0:
+        return 0
+    return sums["chart_json_accuracy"] / sums["chart_json_count"]
+
+
+class RunAggregates:
+    """Running per-model sums for the Performance Metrics page.
+
+    Results can be added in any number of batches (e.g. as a live run
+    progresses) and the tables are derived from the sums on demand, so new
+    results never require re-aggregating the ones already seen.
+    """
+
+    def __init__(self):
+        self.models: Dict[str, Dict[str, float]] = {}
+        self.sketches: Dict[str, Dict[str, DDSketch]] = {}
+        self.error_counts: Dict[str, int] = {}
+
+    @classmethod
+    def from_results(cls, results: Iterable[Dict[str, Any]]) -> "RunAggregates":
+        aggregates = cls()
+        aggregates.add_all(results)
+        return aggregates
+
+    def add_all(self, results: Iterable[Dict[str, Any]]) -> None:
+        for result in results:
+            self.add(result)
+
+    def add(self, test: Dict[str, Any]) -> None:
+        model_key = get_model_key(test)
+        if "error" in test and test["error"]:
+            self.error_counts[model_key] = self.error_counts.get(model_key, 0) + 1
+            return
+
+        if model_key not in self.models:
+            self.models[model_key] = {
+                "count": 0,
+                "json_accuracy": 0,
+                "text_accuracy": 0,
+                "total_cost": 0.0,
+                "ocr_cost": 0.0,
+                "extraction_cost": 0.0,
+                "ocr_latency": 0,
+                "extraction_latency": 0,
+                "extraction_count": 0,
+                "ocr_input_tokens": 0,
+                "ocr_output_tokens": 0,
+                "extraction_input_tokens": 0,
+                "extraction_output_tokens": 0,
+                # Accuracy charts average every result that has a JSON accuracy
+                # key, counting a null score as 0, as chart_json_accuracy of
+                # benchmark_run_model_stats does
+                "chart_json_accuracy": 0,
+                "chart_json_count": 0,
+            }
+            self.sketches[model_key] = {metric: DDSketch() for metric in SKETCH_METRICS}
+
+        stats = self.models[model_key]
+        stats["count"] += 1
+        stats["text_accuracy"] += test.get("levenshteinDistance", 0) or 0
+        usage = test.get("usage") or {}
+        # Ensure None values are converted to 0.0
+        stats["total_cost"] += usage.get("totalCost") or 0.0
+
+        ocr_usage = usage.get("ocr") or {}
+        stats["ocr_cost"] += ocr_usage.get("totalCost") or 0.0
+        stats["ocr_latency"] += (ocr_usage.get("duration") or 0) / 1000
+        stats["ocr_input_tokens"] += ocr_usage.get("inputTokens") or 0
+        stats["ocr_output_tokens"] += ocr_usage.get("outputTokens") or 0
+
+        extraction_usage = usage.get("extraction") or {}
+        if extraction_usage:
+            stats["extraction_input_tokens"] += extraction_usage.get("inputTokens") or 0
+            stats["extraction_output_tokens"] += (
+                extraction_usage.get("outputTokens") or 0
+            )
+
+        # Only add JSON accuracy and extraction stats if extraction was performed
+        if "jsonAccuracy" in test and extraction_usage:
+            stats["extraction_count"] += 1
+            stats["json_accuracy"] += test["jsonAccuracy"] or 0
+            stats["extraction_cost"] += extraction_usage.get("totalCost") or 0.0
+            stats["extraction_latency"] += (
+                extraction_usage.get("duration") or 0
+            ) / 1000
+
+        if "jsonAccuracy" in test:
+            stats["chart_json_count"] += 1
+            stats["chart_json_accuracy"] += test["jsonAccuracy"] or 0
+
+        sketches = self.sketches[model_key]
+        sketches["ocr_latency"].add((ocr_usage.get("duration") or 0) / 1000)
+        sketches["total_latency"].add((usage.get("duration") or 0) / 1000)
+        sketches["ocr_cost"].add(ocr_usage.get("totalCost") or 0.0)
+        sketches["total_cost"].add(usage.get("totalCost") or 0.0)
+        if extraction_usage:
+            sketches["extraction_latency"].add(
+                (extraction_usage.get("duration") or 0) / 1000
+            )
+            sketches["extraction_cost"].add(extraction_usage.get("totalCost") or 0.0)
+
+    def model_stats_frame(self) -> pd.DataFrame:
+        """DataFrame comparing model combinations (averages of the sums)"""
+        rows = {}
+        for model_key, sums in self.models.items():
+            stats = {column: sums[column] for column in MODEL_STATS_COLUMNS}
+            for column in _PER_RESULT_SUMS:
+                stats[column] /= sums["count"]
+            # Calculate extraction-related averages only if there were extractions
+            if sums["extraction_count"] > 0:
+                for column in _PER_EXTRACTION_SUMS:
+                    stats[column] /= sums["extraction_count"]
+            rows[model_key] = stats
+
+        df = pd.DataFrame.from_dict(rows, orient="index", columns=MODEL_STATS_COLUMNS)
+        df.index.name = "Model Combination"
+        return df
+
+    def accuracy_frames(self) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Separate DataFrames for the JSON and Text accuracy charts"""
+        json_accuracy = {
+            model_key: _chart_json_accuracy(sums)
+            for model_key, sums in self.models.items()
+        }
+        text_similarity = {
+            model_key: sums["text_accuracy"] / sums["count"]
+            for model_key, sums in self.models.items()
+        }
+
+        json_df = pd.DataFrame(
+            {"Model": json_accuracy.keys(), "JSON Accuracy": json_accuracy.values()}
+        ).set_index("Model")
+        text_df = pd.DataFrame(
+            {
+                "Model": text_similarity.keys(),
+                "Text Similarity": text_similarity.values(),
+            }
+        ).set_index("Model")
+        return json_df, text_df
+
+    def model_stats_rows(self) -> List[ModelStats]:
+        """Per-model summary in the format of benchmark_run_model_stats rows"""
+        rows = []
+        for model_key, stats in self.model_stats_frame().iterrows():
+            row = {"model_key": model_key, **stats.to_dict()}
+            for column in ("count", "extraction_count"):
+                row[column] = int(row[column])
+            row["error_count"] = self.error_counts.get(model_key, 0)
+            row["chart_json_accuracy"] = _chart_json_accuracy(self.models[model_key])
+            row["sketches"] = {
+                metric: sketch.to_dict()
+                for metric, sketch in self.sketches[model_key].items()
+            }
+            rows.append(row)
+        return rows
+
+    def percentile_frame(self, quantiles: List[float] = PERCENTILES) -> pd.DataFrame:
+        """Latency and cost percentiles per model combination and stage"""
+        return percentile_frame(self.sketches, quantiles)
+
+
+def sketches_from_model_stats(
+    model_stats_rows: List[Dict[str, Any]],
+) -> Dict[str, Dict[str, DDSketch]]:
+    """Deserialize the sketches stored with precomputed run stats"""
+    return {
+        row["model_key"]: {
+            metric: DDSketch.from_dict(sketch)
+            for metric, sketch in (row.get("sketches") or {}).items()
+        }
+        for row in model_stats_rows
+    }
+
+
+def merged_model_sketches(
+    rows: Iterable[ModelSketches],
+) -> Dict[str, Dict[str, DDSketch]]:
+    """Sketches of each model merged across runs, as if from one run"""
+    by_model: Dict[str, Dict[str, List[DDSketch]]] = defaultdict(
+        lambda: defaultdict(list)
+    )
+    for row in rows:
+        for metric, sketch in (row.get("sketches") or {}).items():
+            by_model[row["model_key"]][metric].append(DDSketch.from_dict(sketch))
+    return {
+        model_key: {
+            metric: merge_sketches(sketches) for metric, sketches in metrics.items()
+        }
+        for model_key, metrics in by_model.items()
+    }
+
+
+def percentile_frame(
+    sketches: Dict[str, Dict[str, DDSketch]], quantiles: List[float] = PERCENTILES
+) -> pd.DataFrame:
+    """Long DataFrame with one row per model and metric and a column per quantile"""
+    rows = []
+    for model_key, metrics in sketches.items():
+        for metric, sketch in metrics.items():
+            if sketch.count == 0:
+                continue
+            row = {"Model": model_key, "Metric": metric, "Count": sketch.count}
+            for q in quantiles:
+                row[f"p{q * 100:g}"] = sketch.quantile(q)
+            rows.append(row)
+    return pd.DataFrame(
+        rows,
+        columns=["Model", "Metric", "Count"] + [f"p{q * 100:g}" for q in quantiles],
+    )
+
+
+def result_metrics_frame(results: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """One row per successful result with the scores the accuracy charts average"""
+    rows = [
+        {
+            "Model": get_model_key(test),
+            "fileUrl": test.get("fileUrl"),
+            # Like the JSON bar: a null score counts as 0, a missing one is
+            # left out
+            "JSON Accuracy": (
+                (test["jsonAccuracy"] or 0) if "jsonAccuracy" in test else np.nan
+            ),
+            "Text Similarity": test.get("levenshteinDistance", 0) or 0,
+        }
+        for test in results
+        if not test.get("error")
+    ]
+    return pd.DataFrame(
+        rows, columns=["Model", "fileUrl", "JSON Accuracy", "Text Similarity"]
+    )
+
+
+class LiveRun:
+    """Results and aggregates of a run that grow as new results are loaded.
+
+    Feed it the deltas returned by load_new_results_for_run(); results already
+    seen (by id) are skipped, and only new ones are added to the aggregates.
+    """
+
+    def __init__(self, timestamp: str):
+        self.timestamp = timestamp
+        self.run: Dict[str, Any] = {}
+        self.results: List[Dict[str, Any]] = []
+        self.aggregates = RunAggregates()
+        self.watermark: Optional[Any] = None
+        self._seen_ids: Set[Any] = set()
+
+    def apply(self, delta: ResultDelta) -> int:
+        """Merge a delta and return the number of new results"""
+        if delta["reset"]:
+            self.results = []
+            self.aggregates = RunAggregates()
+            self._seen_ids = set()
+        if delta["run"]:
+            self.run = delta["run"]
+        self.watermark = delta["watermark"]
+
+        added = 0
+        for result in delta["results"]:
+            if result.get("id") in self._seen_ids:
+                continue
+            self._seen_ids.add(result.get("id"))
+            self.results.append(result)
+            self.aggregates.add(result)
+            added += 1
+        return added
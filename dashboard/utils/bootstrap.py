@@ -0,0 +1,140 @@
+from typing import Dict, Optional, Tuple, TypedDict
+
+import numpy as np
+
+DEFAULT_RESAMPLES = 10_000
+DEFAULT_CONFIDENCE = 0.95
+
+# Samples with more distinct values than this are resampled over this many
+# equal-width bins, each standing in for its values by their mean. The mean is
+# unchanged and the variance shrinks by at most (bin width)^2 / 12, which is
+# negligible for scores in [0, 1], while the cost no longer grows with n.
+DEFAULT_MAX_LEVELS = 100
+
+# Fixed so the error bars do not jitter between page reruns
+DEFAULT_SEED = 0
+
+
+class ConfidenceInterval(TypedDict):
+    mean: float
+    low: float
+    high: float
+    n: int
+
+
+class PairedDifference(TypedDict):
+    mean: float
+    low: float
+    high: float
+    n: int
+    p_value: float
+
+
+def _levels(values: np.ndarray, max_levels: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct values (or bin means) of a sample and how often each occurs"""
+    levels, counts = np.unique(values, return_counts=True)
+    if levels.size <= max_levels:
+        return levels, counts
+
+    edges = np.linspace(values.min(), values.max(), max_levels + 1)
+    bins = np.clip(np.searchsorted(edges, values, side="right") - 1, 0, max_levels - 1)
+    counts = np.bincount(bins, minlength=max_levels)
+    sums = np.bincount(bins, weights=values, minlength=max_levels)
+    occupied = counts > 0
+    return sums[occupied] / counts[occupied], counts[occupied]
+
+
+def bootstrap_means(
+    values: np.ndarray,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    max_levels: int = DEFAULT_MAX_LEVELS,
+    seed: Optional[int] = DEFAULT_SEED,
+) -> np.ndarray:
+    """Means of n_resamples bootstrap resamples of values.
+
+    Resampling n values with replacement only matters through how many times
+    each distinct value is drawn, so every resample is one row of a
+    (n_resamples, levels) multinomial count matrix and all the means come out
+    of a single matrix product.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return np.full(n_resamples, np.nan)
+
+    levels, counts = _levels(values, max_levels)
+    rng = np.random.default_rng(seed)
+    draws = rng.multinomial(values.size, counts / values.size, size=n_resamples)
+    return draws @ levels / values.size
+
+
+def confidence_interval(
+    values: np.ndarray,
+    confidence: float = DEFAULT_CONFIDENCE,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    seed: Optional[int] = DEFAULT_SEED,
+) -> ConfidenceInterval:
+    """Percentile bootstrap confidence interval of the mean"""
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    if values.size == 0:
+        return {"mean": np.nan, "low": np.nan, "high": np.nan, "n": 0}
+
+    means = bootstrap_means(values, n_resamples, seed=seed)
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(means, [tail, 1 - tail])
+    return {
+        "mean": float(values.mean()),
+        "low": float(low),
+        "high": float(high),
+        "n": int(values.size),
+    }
+
+
+def confidence_intervals(
+    values_by_model: Dict[str, np.ndarray],
+    confidence: float = DEFAULT_CONFIDENCE,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    seed: Optional[int] = DEFAULT_SEED,
+) -> Dict[str, ConfidenceInterval]:
+    """Confidence interval of the mean of each model's values"""
+    return {
+        model_key: confidence_interval(values, confidence, n_resamples, seed)
+        for model_key, values in values_by_model.items()
+    }
+
+
+def paired_difference(
+    a: np.ndarray,
+    b: np.ndarray,
+    confidence: float = DEFAULT_CONFIDENCE,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    seed: Optional[int] = DEFAULT_SEED,
+) -> PairedDifference:
+    """Bootstrap test of the mean difference a - b over paired observations.
+
+    a[i] and b[i] must be scores of the same document. Resampling documents
+    (rather than each model independently) removes the variance shared by both
+    models, which makes the test much more sensitive than comparing two
+    separate intervals. The p-value is two-sided.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if a.shape != b.shape:
+        raise ValueError("Paired samples must have the same length")
+    differences = a - b
+    differences = differences[~np.isnan(differences)]
+    if differences.size == 0:
+        return {"mean": np.nan, "low": np.nan, "high": np.nan, "n": 0, "p_value": 1.0}
+
+    means = bootstrap_means(differences, n_resamples, seed=seed)
+    tail = (1 - confidence) / 2
+    low, high = np.quantile(means, [tail, 1 - tail])
+    p_value = 2 * min(np.mean(means <= 0), np.mean(means >= 0))
+    return {
+        "mean": float(differences.mean()),
+        "low": float(low),
+        "high": float(high),
+        "n": int(differences.size),
+        "p_value": float(min(p_value, 1.0)),
+    }
@@ -0,0 +1,328 @@
+import os
+import json
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import zstandard
+
+from utils.instrumentation import add_bytes
+from utils.payload_codec import (
+    DICTIONARY_SIZE,
+    PayloadCodec,
+    train_dictionary,
+    training_samples,
+)
+
+# Sidecars written next to a run's results.json
+METRICS_SUFFIX = ".metrics.parquet"
+PAYLOADS_SUFFIX = ".payloads.parquet"
+DICTIONARY_SUFFIX = ".payloads.zdict"
+
+# Bumped when the layout of a sidecar changes, so older ones are rebuilt
+METRICS_FORMAT = "presence-1"
+PAYLOADS_FORMAT = "zstd-frames-1"
+
+# Small row groups keep single-result lookups to one group read
+ROW_GROUP_SIZE = 2048
+
+# Numeric and short columns the metric pages read. Values that are not scalars
+# are stored as JSON text and decoded on read.
+METRICS_SCHEMA = pa.schema(
+    [
+        ("id", pa.int64()),
+        ("fileUrl", pa.string()),
+        ("ocrModel", pa.string()),
+        ("extractionModel", pa.string()),
+        ("directImageExtraction", pa.bool_()),
+        ("levenshteinDistance", pa.float64()),
+        ("jsonAccuracy", pa.float64()),
+        ("jsonDiffStats", pa.string()),
+        ("metadata", pa.string()),
+        ("usage", pa.string()),
+        ("error", pa.string()),
+        ("_present", pa.int64()),
+    ]
+)
+
+# Bit i of the presence column is set when the result has the key
+# METRIC_COLUMNS[i], so a null value (such as an unscored jsonAccuracy) stays
+# distinct from a missing key
+PRESENCE_COLUMN = "_present"
+METRIC_COLUMNS = METRICS_SCHEMA.names[1:-1]
+
+# Large columns only needed when a single test case is opened: the payload
+# fields and any other keys of the result (so the sidecars are lossless),
+# compressed per result into one zstd frame with a dictionary trained on the
+# run. Frames are stored as they are; Parquet compression would not shrink them.
+PAYLOADS_SCHEMA = pa.schema([("id", pa.int64()), ("payload", pa.binary())])
+
+JSON_COLUMNS = {
+    "jsonDiffStats",
+    "metadata",
+    "usage",
+    "error",
+}
+
+_METRIC_KEYS = set(METRIC_COLUMNS) | {"id"}
+
+
+def sidecar_paths(results_path: Path):
+    return (
+        results_path.with_suffix(METRICS_SUFFIX),
+        results_path.with_suffix(PAYLOADS_SUFFIX),
+    )
+
+
+def _is_fresh(path: Path, source_mtime: float, format: Optional[str] = None) -> bool:
+    if not path.exists():
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    return metadata.get(b"source_mtime") == repr(source_mtime).encode() and (
+        format is None or metadata.get(b"format") == format.encode()
+    )
+
+
+def _presence(result: Dict[str, Any]) -> int:
+    return sum(1 << i for i, name in enumerate(METRIC_COLUMNS) if name in result)
+
+
+def _column(results: List[Dict[str, Any]], name: str) -> List[Any]:
+    if name in JSON_COLUMNS:
+        return [
+            json.dumps(result[name]) if name in result else None for result in results
+        ]
+    return [result.get(name) for result in results]
+
+
+def _write_table(
+    path: Path,
+    schema: pa.Schema,
+    columns: Dict[str, List[Any]],
+    mtime,
+    compression: str = "zstd",
+    **metadata: str,
+):
+    table = pa.Table.from_pydict(
+        columns,
+        schema=schema.with_metadata({"source_mtime": repr(mtime), **metadata}),
+    )
+    tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+    pq.write_table(
+        table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression=compression
+    )
+    os.replace(tmp_path, path)
+
+
+def _payload_codec_for(payloads: List[Dict[str, Any]]) -> PayloadCodec:
+    """Codec with a dictionary trained on the run, or on PAYLOAD_DICTIONARY"""
+    if os.getenv("PAYLOAD_DICTIONARY"):
+        return PayloadCodec.from_file(os.getenv("PAYLOAD_DICTIONARY"))
+    samples = training_samples(payloads)
+    # zstd wants about 100 times the dictionary size in samples; a dictionary
+    # larger than that would outweigh what it saves on a small run
+    size = min(DICTIONARY_SIZE, sum(len(sample) for sample in samples) // 100)
+    try:
+        return PayloadCodec(train_dictionary(samples, size))
+    except zstandard.ZstdError:
+        # Too few results to train on; frames are plain zstd
+        return PayloadCodec()
+
+
+def ensure_sidecars(results_path: Path) -> None:
+    """Build the Parquet sidecars of results.json if missing or out of date"""
+    source_mtime = results_path.stat().st_mtime
+    metrics_path, payloads_path = sidecar_paths(results_path)
+    if _is_fresh(metrics_path, source_mtime, METRICS_FORMAT) and _is_fresh(
+        payloads_path, source_mtime, PAYLOADS_FORMAT
+    ):
+        return
+
+    with open(results_path) as f:
+        results = json.load(f)
+
+    # Results are identified by their position in results.json
+    ids = list(range(len(results)))
+    metric_columns = {"id": ids}
+    for name in METRIC_COLUMNS:
+        metric_columns[name] = _column(results, name)
+    metric_columns[PRESENCE_COLUMN] = [_presence(result) for result in results]
+    payloads = [
+        {k: v for k, v in result.items() if k not in _METRIC_KEYS} for result in results
+    ]
+    del results
+
+    codec = _payload_codec_for(payloads)
+    dictionary_path = results_path.with_suffix(DICTIONARY_SUFFIX)
+    if codec.dictionary:
+        tmp_path = dictionary_path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(codec.dictionary)
+        os.replace(tmp_path, dictionary_path)
+    payload_columns = {
+        "id": ids,
+        "payload": [codec.compress(payload) for payload in payloads],
+    }
+    _write_table(
+        payloads_path,
+        PAYLOADS_SCHEMA,
+        payload_columns,
+        source_mtime,
+        compression="none",
+        format=PAYLOADS_FORMAT,
+        dict_id=str(codec.dict_id),
+    )
+    _write_table(
+        metrics_path,
+        METRICS_SCHEMA,
+        metric_columns,
+        source_mtime,
+        format=METRICS_FORMAT,
+    )
+
+
+def _count_json_array(path: Path, chunk_size: int = 1 << 20) -> int:
+    """Items of the top-level JSON array in path, decoding one item at a time
+    so memory stays bounded by the largest item"""
+    decoder = json.JSONDecoder()
+    count = 0
+    with open(path) as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} does not hold a JSON array")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip()
+            if count and buffer.startswith(","):
+                buffer = buffer[1:].lstrip()
+            if buffer.startswith("]"):
+                return count
+            try:
+                _, end = decoder.raw_decode(buffer)
+                # A number cut by the chunk boundary decodes as a shorter one
+                complete = eof or buffer[end:].strip()
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                complete = False
+            if not complete:
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            count += 1
+            buffer = buffer[end:]
+
+
+def count_results(results_path: Path) -> int:
+    """Number of results in results.json, without building the sidecars: the
+    row count of an up-to-date metrics sidecar, otherwise a streaming pass"""
+    metrics_path, _ = sidecar_paths(results_path)
+    if metrics_path.exists():
+        metadata = pq.read_metadata(metrics_path)
+        source_mtime = repr(results_path.stat().st_mtime).encode()
+        if (metadata.metadata or {}).get(b"source_mtime") == source_mtime:
+            return metadata.num_rows
+    add_bytes(results_path.stat().st_size)
+    return _count_json_array(results_path)
+
+
+@lru_cache(maxsize=32)
+def _cached_payload_codec(dictionary_path: Path, dict_id: int, mtime) -> PayloadCodec:
+    return PayloadCodec(dictionary_path.read_bytes() if dict_id else None)
+
+
+def payload_codec(results_path: Path) -> PayloadCodec:
+    """Codec of the frames in the payloads sidecar of results.json"""
+    ensure_sidecars(results_path)
+    _, payloads_path = sidecar_paths(results_path)
+    dict_id = int(pq.read_schema(payloads_path).metadata[b"dict_id"])
+    dictionary_path = results_path.with_suffix(DICTIONARY_SUFFIX)
+    mtime = dictionary_path.stat().st_mtime if dict_id else None
+    return _cached_payload_codec(dictionary_path, dict_id, mtime)
+
+
+def decompress_payload(results_path: Path, frame: bytes) -> Dict[str, Any]:
+    """Payload fields (and other keys) of one result from its sidecar frame"""
+    return payload_codec(results_path).decompress(frame)
+
+
+def _column_values(table: pa.Table, name: str) -> List[Any]:
+    values = table.column(name).to_pylist()
+    if name not in JSON_COLUMNS:
+        return values
+    # One JSON parse per column instead of one per value
+    return json.loads(
+        "[" + ",".join("null" if value is None else value for value in values) + "]"
+    )
+
+
+def _to_records(table: pa.Table) -> List[Dict[str, Any]]:
+    """Rows of a sidecar table as result dicts; keys the result did not have
+    are left out"""
+    names = [name for name in table.column_names if name != PRESENCE_COLUMN]
+    columns = [_column_values(table, name) for name in names]
+    if PRESENCE_COLUMN not in table.column_names:
+        return [dict(zip(names, row)) for row in zip(*columns)]
+    presence = table.column(PRESENCE_COLUMN).to_pylist()
+    bits = [
+        1 << METRIC_COLUMNS.index(name) if name in METRIC_COLUMNS else None
+        for name in names
+    ]
+    return [
+        {
+            name: value
+            for name, bit, value in zip(names, bits, row)
+            if bit is None or present & bit
+        }
+        for present, row in zip(presence, zip(*columns))
+    ]
+
+
+def read_metric_records(
+    results_path: Path, columns: Optional[Sequence[str]] = None
+) -> List[Dict[str, Any]]:
+    """Metric columns of every result, reading only the requested columns"""
+    ensure_sidecars(results_path)
+    metrics_path, _ = sidecar_paths(results_path)
+    if columns is not None:
+        columns = ["id", *(c for c in columns if c != "id"), PRESENCE_COLUMN]
+    table = pq.read_table(metrics_path, columns=columns, memory_map=True)
+    add_bytes(table.nbytes)
+    return _to_records(table)
+
+
+def read_metric_record(
+    results_path: Path, id: int, columns: Optional[Sequence[str]] = None
+) -> Optional[Dict[str, Any]]:
+    """Metric columns of one result, reading only the row groups that hold it"""
+    ensure_sidecars(results_path)
+    metrics_path, _ = sidecar_paths(results_path)
+    if columns is not None:
+        columns = ["id", *(c for c in columns if c != "id"), PRESENCE_COLUMN]
+    table = pq.read_table(
+        metrics_path, columns=columns, filters=[("id", "=", id)], memory_map=True
+    )
+    add_bytes(table.nbytes)
+    return _to_records(table.slice(0, 1))[0] if table.num_rows else None
+
+
+def read_result(results_path: Path, id: int) -> Optional[Dict[str, Any]]:
+    """One result, reading only the row groups that hold it.
+
+    The payload stays compressed in "compressedPayload" until it is shown
+    (see decompress_payload).
+    """
+    ensure_sidecars(results_path)
+    record = {}
+    for path in sidecar_paths(results_path):
+        table = pq.read_table(path, filters=[("id", "=", id)], memory_map=True)
+        add_bytes(table.nbytes)
+        if table.num_rows == 0:
+            return None
+        record.update(_to_records(table.slice(0, 1))[0])
+    record["compressedPayload"] = record.pop("payload")
+    return record
@@ -1,12 +1,31 @@
 import os
 import json
+import base64
+import threading
+from functools import lru_cache
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from sqlalchemy.sql import text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
 from typing import Dict, Any, List, TypedDict, Optional
+import pandas as pd
+
+from utils.columnar import (
+    count_results,
+    decompress_payload,
+    read_metric_record,
+    read_metric_records,
+    read_result,
+)
+from utils.instrumentation import add_bytes, instrumented, timed
+from utils.payload_codec import (
+    DB_PAYLOAD_COLUMNS,
+    RESULT_PAYLOAD_FIELDS,
+    PayloadCodec,
+    frame_dictionary_id,
+)
 
 load_dotenv()
 
@@ -21,33 +40,298 @@ class BenchmarkRunMetadata(TypedDict):
     completed_at: Optional[str]
 
 
-def load_run_list_from_folder(
-    results_dir: str = "results",
-) -> List[BenchmarkRunMetadata]:
-    """Load list of benchmark runs from the results directory"""
-    results_path = Path(results_dir)
-    result_dirs = [d for d in results_path.iterdir() if d.is_dir()]
-    runs = []
+class ModelStats(TypedDict):
+    model_key: str
+    count: int
+    error_count: int
+    extraction_count: int
+    json_accuracy: float
+    text_accuracy: float
+    total_cost: float
+    ocr_cost: float
+    extraction_cost: float
+    ocr_latency: float
+    extraction_latency: float
+    ocr_input_tokens: float
+    ocr_output_tokens: float
+    extraction_input_tokens: float
+    extraction_output_tokens: float
+    # Serialized DDSketch per metric in utils.sketches.SKETCH_METRICS
+    sketches: Optional[Dict[str, Any]]
+    # JSON accuracy of the accuracy chart: every successful result (null
+    # scores as 0), not only those that ran extraction; None for older rows
+    chart_json_accuracy: Optional[float]
 
-    for dir_path in result_dirs:
-        timestamp = dir_path.name
-        json_path = dir_path / "results.json"
-        if json_path.exists():
-            runs.append(
-                {
-                    "timestamp": timestamp,
-                    "status": "completed",  # Assuming completed if file exists
-                    "run_by": None,
-                    "description": None,
-                    "total_documents": None,
-                    "created_at": format_timestamp(timestamp),
-                    "completed_at": format_timestamp(timestamp),
-                }
+
+class ResultFilters(TypedDict, total=False):
+    model_key: Optional[str]
+    min_accuracy: Optional[float]
+    max_accuracy: Optional[float]
+    has_error: Optional[bool]
+    only_with_diffs: bool
+
+
+class ResultIdPage(TypedDict):
+    ids: List[Any]
+    next_cursor: Optional[Any]
+
+
+class ResultTablePage(TypedDict):
+    # Narrow rows with the keys of RESULT_TABLE_FIELDS
+    rows: List[Dict[str, Any]]
+    # Results matching the filters across all pages
+    total: int
+
+
+class ResultDelta(TypedDict):
+    run: BenchmarkRunMetadata
+    results: List[Dict[str, Any]]
+    watermark: Optional[Any]
+    reset: bool
+
+
+class ModelStatsHistory(TypedDict):
+    timestamp: str
+    created_at: Optional[str]
+    model_key: str
+    count: int
+    json_accuracy: float
+    text_accuracy: float
+    total_cost: float
+    ocr_latency: float
+    extraction_latency: float
+
+
+class ModelSketches(TypedDict):
+    timestamp: str
+    model_key: str
+    # Serialized DDSketch per metric in utils.sketches.SKETCH_METRICS
+    sketches: Dict[str, Any]
+
+
+class RunComparison(TypedDict):
+    # One row per document and model whose scores changed beyond the thresholds
+    changed: List[Dict[str, Any]]
+    # One row per model combination present in both runs
+    model_deltas: List[Dict[str, Any]]
+
+
+# Per-run model stats cached next to results.json in folder mode; bumped
+# whenever the stored fields change, so older summaries are rebuilt
+RUN_SUMMARY_FILENAME = "summary.json"
+RUN_SUMMARY_VERSION = 4
+
+# Static report snapshot of a completed run, written by build_reports.py
+RUN_REPORT_FILENAME = "report.json"
+
+# Catalog of the runs in a results folder, with their document counts and
+# per-model summary, so listing runs does not read every results.json
+RUN_CATALOG_FILENAME = "runs.json"
+RUN_CATALOG_VERSION = 2
+
+# Per-model fields of summary.json kept in the run catalog
+CATALOG_MODEL_FIELDS = [
+    "model_key",
+    "count",
+    "error_count",
+    "json_accuracy",
+    "text_accuracy",
+    "total_cost",
+    "ocr_latency",
+    "extraction_latency",
+]
+
+_catalog_lock = threading.Lock()
+
+# Results are re-read from this far behind the watermark. Rows are stamped with
+# the time their insert transaction started, so a batch committed a little
+# after a newer one can still land behind the watermark; callers drop
+# duplicates by id.
+WATERMARK_OVERLAP = timedelta(seconds=60)
+
+# Result fields read by folder-mode loaders that only need a few columns
+MODEL_COLUMNS = ["ocrModel", "extractionModel", "directImageExtraction"]
+FILTER_COLUMNS = ["jsonAccuracy", "jsonDiffStats", "error"]
+COMPARISON_COLUMNS = [
+    "fileUrl",
+    "jsonAccuracy",
+    "levenshteinDistance",
+    "usage",
+    "error",
+]
+
+# Per-result scores behind the accuracy charts' bootstrap intervals
+SCORE_COLUMNS = ["fileUrl", "jsonAccuracy", "levenshteinDistance", "error"]
+
+# Columns of the detailed results table and the SQL each one is read and
+# sorted by; usage fields are flattened so every column has a scalar type
+RESULT_TABLE_FIELDS = {
+    "id": "bres.id::text",
+    "fileUrl": "bres.file_url",
+    "ocrModel": "bres.ocr_model",
+    "extractionModel": "bres.extraction_model",
+    "levenshteinDistance": "bres.levenshtein_distance",
+    "jsonAccuracy": "bres.json_accuracy",
+    "totalCost": "(bres.usage->>'totalCost')::float",
+    "duration": "(bres.usage->>'duration')::float",
+}
+RESULT_TABLE_COLUMNS = (
+    MODEL_COLUMNS
+    + [
+        "fileUrl",
+        "levenshteinDistance",
+        "usage",
+    ]
+    + FILTER_COLUMNS
+)
+
+# SQL equivalent of get_model_key() over a benchmark_results row aliased "bres"
+MODEL_KEY_SQL = """
+    CASE
+        WHEN bres.direct_image_extraction
+            THEN COALESCE(bres.extraction_model, '') || ' (IMG2JSON)'
+        ELSE bres.ocr_model || ' → ' || COALESCE(bres.extraction_model, '')
+    END
+"""
+
+
+def get_model_key(result: Dict[str, Any]) -> str:
+    """Label of the model combination that produced a result"""
+    if result.get("directImageExtraction", False):
+        return f"{result.get('extractionModel')} (IMG2JSON)"
+    return f"{result.get('ocrModel')} → {result.get('extractionModel')}"
+
+
+def _read_run_catalog(results_path: Path) -> Dict[str, Dict[str, Any]]:
+    catalog_path = results_path / RUN_CATALOG_FILENAME
+    if not catalog_path.exists():
+        return {}
+    add_bytes(catalog_path.stat().st_size)
+    try:
+        with open(catalog_path) as f:
+            catalog = json.load(f)
+    except ValueError:
+        return {}
+    if catalog.get("version") != RUN_CATALOG_VERSION:
+        return {}
+    return catalog["runs"]
+
+
+def _update_run_catalog(
+    results_path: Path, changes: Dict[str, Optional[Dict[str, Any]]]
+) -> Dict[str, Dict[str, Any]]:
+    """Add or replace catalog entries (None removes one) and return the catalog.
+
+    Concurrent writers in other processes can drop each other's entries; those
+    runs are simply found again by the next listing.
+    """
+    catalog_path = results_path / RUN_CATALOG_FILENAME
+    with _catalog_lock:
+        runs = _read_run_catalog(results_path)
+        for timestamp, entry in changes.items():
+            if entry is None:
+                runs.pop(timestamp, None)
+            else:
+                runs[timestamp] = entry
+        tmp_path = catalog_path.with_suffix(f".{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"version": RUN_CATALOG_VERSION, "runs": runs}, f)
+            os.replace(tmp_path, catalog_path)
+        except OSError as e:
+            # A read-only results folder still works, just without the catalog
+            print(f"Could not write {catalog_path}: {e}")
+    return runs
+
+
+def _catalog_entry(
+    timestamp: str,
+    source: os.stat_result,
+    total_documents: int,
+    model_stats: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    return {
+        "timestamp": timestamp,
+        "status": "completed",  # Assuming completed if results.json exists
+        "run_by": None,
+        "description": None,
+        "total_documents": total_documents,
+        "created_at": format_timestamp(timestamp),
+        "completed_at": format_timestamp(timestamp),
+        # results.json the entry was made from; a different one is re-read
+        "source_mtime": source.st_mtime,
+        "source_size": source.st_size,
+        # None until the run is summarized
+        "models": (
+            None
+            if model_stats is None
+            else [
+                {field: stats[field] for field in CATALOG_MODEL_FIELDS}
+                for stats in model_stats
+            ]
+        ),
+    }
+
+
+def _load_run_catalog_from_folder(results_dir: str) -> Dict[str, Dict[str, Any]]:
+    """Catalog entries of every run with a results.json, by timestamp.
+
+    Listing costs one directory read plus one stat of each run's results.json.
+    Entries whose results.json changed size or modification time, and runs not
+    in the catalog yet, are recounted: from summary.json or the Parquet
+    sidecar when either is up to date, otherwise by streaming over
+    results.json. Listing never builds sidecars or summaries. Runs whose
+    results.json is gone are dropped.
+    """
+    results_path = Path(results_dir)
+    runs = _read_run_catalog(results_path)
+    changes = {}
+    listed = set()
+    for entry in os.scandir(results_path):
+        if not entry.is_dir():
+            continue
+        run_dir = Path(entry.path)
+        try:
+            source = (run_dir / "results.json").stat()
+        except FileNotFoundError:
+            continue
+        listed.add(entry.name)
+        cached = runs.get(entry.name)
+        if (
+            cached is not None
+            and cached["source_mtime"] == source.st_mtime
+            and cached["source_size"] == source.st_size
+        ):
+            continue
+        summary = _read_run_summary(run_dir, source.st_mtime)
+        if summary is not None:
+            changes[entry.name] = _catalog_entry(
+                entry.name, source, summary["total_documents"], summary["model_stats"]
             )
+        else:
+            changes[entry.name] = _catalog_entry(
+                entry.name, source, count_results(run_dir / "results.json")
+            )
+    for timestamp in runs.keys() - listed:
+        changes[timestamp] = None
+    if changes:
+        runs = _update_run_catalog(results_path, changes)
+    return runs
 
+
+@instrumented()
+def load_run_list_from_folder(
+    results_dir: str = "results",
+) -> List[BenchmarkRunMetadata]:
+    """Load list of benchmark runs from the results directory's run catalog"""
+    runs = [
+        {field: run[field] for field in BenchmarkRunMetadata.__annotations__}
+        for run in _load_run_catalog_from_folder(results_dir).values()
+    ]
     return sorted(runs, key=lambda x: x["timestamp"], reverse=True)
 
 
+@instrumented()
 def load_run_list_from_db() -> List[BenchmarkRunMetadata]:
     """Load list of benchmark runs from database"""
     database_url = os.getenv("DATABASE_URL")
@@ -98,31 +382,50 @@ def load_run_list_from_db() -> List[BenchmarkRunMetadata]:
     return runs
 
 
+def _load_metric_records_from_folder(
+    timestamp: str, columns: Optional[List[str]] = None, results_dir: str = "results"
+) -> List[Dict[str, Any]]:
+    """Read only the given metric columns of a run from its Parquet sidecar"""
+    results_path = Path(results_dir) / timestamp / "results.json"
+    if not results_path.exists():
+        return []
+    return read_metric_records(results_path, columns)
+
+
+@instrumented()
 def load_results_for_run_from_folder(
-    timestamp: str, results_dir: str = "results"
+    timestamp: str, results_dir: str = "results", include_metrics_only: bool = True
 ) -> Dict[str, Any]:
-    """Load results for a specific run from folder"""
+    """Load results for a specific run from folder.
+
+    Metric-only loads read the run's Parquet sidecar (built on first access)
+    instead of parsing results.json with all its payloads.
+    """
     results_path = Path(results_dir) / timestamp / "results.json"
     if results_path.exists():
-        with open(results_path) as f:
-            results = json.load(f)
+        if include_metrics_only:
+            results = read_metric_records(results_path)
+        else:
+            add_bytes(results_path.stat().st_size)
+            with open(results_path) as f:
+                results = json.load(f)
             # Assign id to each result if not already present
             for idx, result in enumerate(results):
                 if "id" not in result:
                     result["id"] = idx
-            total_documents = len(results)
-            return {
-                "results": results,
-                "status": "completed",
-                "run_by": None,
-                "description": None,
-                "total_documents": total_documents,
-                "created_at": format_timestamp(timestamp),
-                "completed_at": format_timestamp(timestamp),
-            }
+        return {
+            "results": results,
+            "status": "completed",
+            "run_by": None,
+            "description": None,
+            "total_documents": len(results),
+            "created_at": format_timestamp(timestamp),
+            "completed_at": format_timestamp(timestamp),
+        }
     return {}
 
 
+@instrumented()
 def load_results_for_run_from_db(
     timestamp: str, include_metrics_only: bool = True
 ) -> Dict[str, Any]:
@@ -132,17 +435,24 @@ def load_results_for_run_from_db(
     Session = sessionmaker(bind=engine)
     session = Session()
 
+    # Payloads live in benchmark_result_payloads; metric queries never touch it
     if not include_metrics_only:
         output_string = """
-        'trueMarkdown', bres.true_markdown,
-        'predictedMarkdown', bres.predicted_markdown,
-        'trueJson', bres.true_json,
-        'predictedJson', bres.predicted_json,
-        'jsonDiff', bres.json_diff,
-        'fullJsonDiff', bres.full_json_diff,
+        'trueMarkdown', bpay.true_markdown,
+        'predictedMarkdown', bpay.predicted_markdown,
+        'trueJson', bpay.true_json,
+        'predictedJson', bpay.predicted_json,
+        'jsonDiff', bpay.json_diff,
+        'fullJsonDiff', bpay.full_json_diff,
+        'jsonAccuracyResult', bpay.json_accuracy_result,
+        'compressedPayload', encode(bpay.compressed, 'base64'),
         """
+        payload_join = (
+            "LEFT JOIN benchmark_result_payloads bpay ON bpay.result_id = bres.id"
+        )
     else:
         output_string = ""
+        payload_join = ""
 
     query = text(
         f"""
@@ -169,7 +479,6 @@ def load_results_for_run_from_db(
                     {output_string}
                     'levenshteinDistance', bres.levenshtein_distance,
                     'jsonAccuracy', bres.json_accuracy,
-                    'jsonAccuracyResult', bres.json_accuracy_result,
                     'jsonDiffStats', bres.json_diff_stats,
                     'metadata', bres.metadata,
                     'usage', bres.usage,
@@ -178,6 +487,7 @@ def load_results_for_run_from_db(
             ) as results
         FROM filtered_run fr
         LEFT JOIN benchmark_results bres ON fr.id = bres.benchmark_run_id
+        {payload_join}
         GROUP BY fr.id, fr.timestamp, fr.status, fr.run_by, fr.description, fr.total_documents, fr.created_at, fr.completed_at
     """
     )
@@ -186,8 +496,20 @@ def load_results_for_run_from_db(
     session.close()
 
     if row:
+        results = row.results
+        if not include_metrics_only and results:
+            results = [
+                (
+                    _merge_payload_from_db(
+                        result, base64.b64decode(result["compressedPayload"])
+                    )
+                    if result.get("compressedPayload")
+                    else result
+                )
+                for result in results
+            ]
         return {
-            "results": row.results,
+            "results": results,
             "status": row.status,
             "total_documents": row.total_documents,
             "run_by": row.run_by,
@@ -204,6 +526,47 @@ def load_results_for_run_from_db(
     return {}
 
 
+@instrumented()
+def load_result_scores_for_run_from_folder(
+    timestamp: str, results_dir: str = "results"
+) -> List[Dict[str, Any]]:
+    """Load the model and scores of every result of a run from folder"""
+    return _load_metric_records_from_folder(
+        timestamp, MODEL_COLUMNS + SCORE_COLUMNS, results_dir
+    )
+
+
+@instrumented()
+def load_result_scores_for_run_from_db(timestamp: str) -> List[Dict[str, Any]]:
+    """Load the model and scores of every result of a run from database"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        """
+        SELECT
+            bres.ocr_model AS "ocrModel",
+            bres.extraction_model AS "extractionModel",
+            bres.direct_image_extraction AS "directImageExtraction",
+            bres.file_url AS "fileUrl",
+            bres.json_accuracy AS "jsonAccuracy",
+            bres.levenshtein_distance AS "levenshteinDistance",
+            bres.error
+        FROM benchmark_results bres
+        INNER JOIN benchmark_runs br ON br.id = bres.benchmark_run_id
+        WHERE br.timestamp = :timestamp
+    """
+    )
+
+    rows = session.execute(query, {"timestamp": timestamp})
+    results = [dict(row._mapping) for row in rows]
+    session.close()
+    return results
+
+
+@instrumented()
 def load_one_result_from_db(timestamp: str, id: str) -> Dict[str, Any]:
     """Load one test case result from database for a specific run and file"""
     database_url = os.getenv("DATABASE_URL")
@@ -232,23 +595,25 @@ def load_one_result_from_db(timestamp: str, id: str) -> Dict[str, Any]:
                 'ocrModel', fr.ocr_model,
                 'extractionModel', fr.extraction_model,
                 'directImageExtraction', fr.direct_image_extraction,
-                'trueMarkdown', fr.true_markdown,
-                'predictedMarkdown', fr.predicted_markdown,
-                'trueJson', fr.true_json,
-                'predictedJson', fr.predicted_json,
-                'jsonDiff', fr.json_diff,
-                'fullJsonDiff', fr.full_json_diff,
+                'trueMarkdown', bpay.true_markdown,
+                'predictedMarkdown', bpay.predicted_markdown,
+                'trueJson', bpay.true_json,
+                'predictedJson', bpay.predicted_json,
+                'jsonDiff', bpay.json_diff,
+                'fullJsonDiff', bpay.full_json_diff,
                 'jsonDiffStats', fr.json_diff_stats,
                 'levenshteinDistance', fr.levenshtein_distance,
                 'jsonAccuracy', fr.json_accuracy,
-                'jsonAccuracyResult', fr.json_accuracy_result,
-                'jsonSchema', fr.json_schema,
+                'jsonAccuracyResult', bpay.json_accuracy_result,
+                'jsonSchema', bpay.json_schema,
                 'metadata', fr.metadata,
                 'usage', fr.usage,
                 'error', fr.error
-            ) as result
+            ) as result,
+            bpay.compressed
         FROM benchmark_runs br
         INNER JOIN filtered_results fr ON br.id = fr.benchmark_run_id
+        LEFT JOIN benchmark_result_payloads bpay ON bpay.result_id = fr.id
         WHERE br.timestamp = :timestamp
         LIMIT 1
     """
@@ -258,8 +623,12 @@ def load_one_result_from_db(timestamp: str, id: str) -> Dict[str, Any]:
     session.close()
 
     if row:
+        result = row.result
+        # Decompressed by load_result_payload when the payload is shown
+        if row.compressed is not None:
+            result["compressedPayload"] = bytes(row.compressed)
         return {
-            "result": row.result,
+            "result": result,
             "status": row.status,
             "run_by": row.run_by,
             "description": row.description,
@@ -275,27 +644,1038 @@ def load_one_result_from_db(timestamp: str, id: str) -> Dict[str, Any]:
     return {}
 
 
+@instrumented()
 def load_one_result_from_folder(
     timestamp: str, id: str, results_dir: str = "results"
 ) -> Dict[str, Any]:
     """Load one test case result from folder for a specific run and file"""
     results_path = Path(results_dir) / timestamp / "results.json"
     if results_path.exists():
-        with open(results_path) as f:
-            results = json.load(f)
-            for idx, result in enumerate(results):
-                if idx == id:
-                    return {
-                        "result": result,
-                        "status": "completed",
-                        "run_by": None,
-                        "description": None,
-                        "created_at": format_timestamp(timestamp),
-                        "completed_at": format_timestamp(timestamp),
-                    }
+        result = read_result(results_path, int(id))
+        if result is not None:
+            return {
+                "result": result,
+                "status": "completed",
+                "run_by": None,
+                "description": None,
+                "created_at": format_timestamp(timestamp),
+                "completed_at": format_timestamp(timestamp),
+            }
     return {}
 
 
+@lru_cache(maxsize=8)
+def _payload_codec_from_db(dict_id: int) -> PayloadCodec:
+    """Codec with a dictionary of payload_dictionaries; dictionaries never change"""
+    if dict_id == 0:
+        return PayloadCodec()
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text("SELECT dictionary FROM payload_dictionaries WHERE id = :id")
+    row = session.execute(query, {"id": dict_id}).first()
+    session.close()
+    if row is None:
+        raise ValueError(f"Payload dictionary {dict_id} not found")
+    return PayloadCodec(bytes(row.dictionary))
+
+
+def _merge_payload_from_db(result: Dict[str, Any], frame: bytes) -> Dict[str, Any]:
+    payload = _payload_codec_from_db(frame_dictionary_id(frame)).decompress(frame)
+    merged = {k: v for k, v in result.items() if k != "compressedPayload"}
+    for column, field in zip(DB_PAYLOAD_COLUMNS, RESULT_PAYLOAD_FIELDS):
+        merged[field] = payload.get(column)
+    return merged
+
+
+@instrumented()
+def load_result_payload_from_db(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Result with its compressed payload row decompressed"""
+    if "compressedPayload" not in result:
+        return result
+    return _merge_payload_from_db(result, result["compressedPayload"])
+
+
+@instrumented()
+def load_result_payload_from_folder(
+    timestamp: str, result: Dict[str, Any], results_dir: str = "results"
+) -> Dict[str, Any]:
+    """Result with its payload decompressed from the run's payloads sidecar"""
+    if "compressedPayload" not in result:
+        return result
+    results_path = Path(results_dir) / timestamp / "results.json"
+    merged = {k: v for k, v in result.items() if k != "compressedPayload"}
+    merged.update(decompress_payload(results_path, result["compressedPayload"]))
+    return merged
+
+
+@instrumented()
+def load_model_stats_for_run_from_db(timestamp: str) -> List[ModelStats]:
+    """Load precomputed per-model aggregates of a run from benchmark_run_model_stats"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        """
+        SELECT
+            ms.model_key,
+            ms.count,
+            ms.error_count,
+            ms.extraction_count,
+            ms.json_accuracy,
+            ms.text_accuracy,
+            ms.total_cost,
+            ms.ocr_cost,
+            ms.extraction_cost,
+            ms.ocr_latency,
+            ms.extraction_latency,
+            ms.ocr_input_tokens,
+            ms.ocr_output_tokens,
+            ms.extraction_input_tokens,
+            ms.extraction_output_tokens,
+            ms.sketches,
+            ms.chart_json_accuracy
+        FROM benchmark_run_model_stats ms
+        INNER JOIN benchmark_runs br ON br.id = ms.benchmark_run_id
+        WHERE br.timestamp = :timestamp AND ms.count > 0
+        ORDER BY ms.model_key
+    """
+    )
+
+    rows = session.execute(query, {"timestamp": timestamp})
+    stats = [dict(row._mapping) for row in rows]
+    session.close()
+    return stats
+
+
+def _read_run_summary(run_dir: Path, source_mtime: float) -> Optional[Dict[str, Any]]:
+    """summary.json of a run if it is up to date with results.json"""
+    summary_path = run_dir / RUN_SUMMARY_FILENAME
+    if not summary_path.exists():
+        return None
+    add_bytes(summary_path.stat().st_size)
+    with open(summary_path) as f:
+        summary = json.load(f)
+    if (
+        summary.get("version") == RUN_SUMMARY_VERSION
+        and summary.get("source_mtime") == source_mtime
+    ):
+        return summary
+    return None
+
+
+def _load_run_summary_from_folder(run_dir: Path):
+    """summary.json of a run and whether it was just (re)built; (None, False)
+    without results.json.
+
+    The summary holds the per-model aggregates and the number of results. It
+    is built from results.json the first time a run is read and whenever
+    results.json changes, so each run is aggregated once.
+    """
+    results_path = run_dir / "results.json"
+    if not results_path.exists():
+        return None, False
+
+    summary_path = run_dir / RUN_SUMMARY_FILENAME
+    source_mtime = results_path.stat().st_mtime
+    summary = _read_run_summary(run_dir, source_mtime)
+    if summary is not None:
+        return summary, False
+
+    # Imported here because utils.aggregations builds on this module
+    from utils.aggregations import RunAggregates
+
+    run_data = load_results_for_run_from_folder(run_dir.name, str(run_dir.parent))
+    with timed("aggregate", "RunAggregates.from_results") as span:
+        model_stats = RunAggregates.from_results(run_data["results"]).model_stats_rows()
+        span["rows"] = len(run_data["results"])
+
+    summary = {
+        "version": RUN_SUMMARY_VERSION,
+        "source_mtime": source_mtime,
+        "total_documents": len(run_data["results"]),
+        "model_stats": model_stats,
+    }
+    tmp_path = summary_path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(summary, f)
+        os.replace(tmp_path, summary_path)
+    except OSError as e:
+        # A read-only results folder still works, just without the cache
+        print(f"Could not write {summary_path}: {e}")
+    return summary, True
+
+
+@instrumented()
+def load_model_stats_for_run_from_folder(
+    timestamp: str, results_dir: str = "results"
+) -> List[ModelStats]:
+    """Load per-model aggregates of a run from its summary.json sidecar.
+
+    A summary rebuilt because results.json changed also refreshes the run's
+    entry in the run catalog.
+    """
+    summary, rebuilt = _load_run_summary_from_folder(Path(results_dir) / timestamp)
+    if summary is None:
+        return []
+    if rebuilt:
+        run_dir = Path(results_dir) / timestamp
+        entry = _catalog_entry(
+            timestamp,
+            (run_dir / "results.json").stat(),
+            summary["total_documents"],
+            summary["model_stats"],
+        )
+        _update_run_catalog(Path(results_dir), {timestamp: entry})
+    return summary["model_stats"]
+
+
+@instrumented()
+def load_model_stats_history_from_db() -> List[ModelStatsHistory]:
+    """Load the per-model summaries of every completed run from database"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        """
+        SELECT
+            br.timestamp,
+            br.created_at,
+            ms.model_key,
+            ms.count,
+            ms.json_accuracy,
+            ms.text_accuracy,
+            ms.total_cost,
+            ms.ocr_latency,
+            ms.extraction_latency
+        FROM benchmark_runs br
+        INNER JOIN benchmark_run_model_stats ms ON ms.benchmark_run_id = br.id
+        WHERE br.status = 'completed' AND ms.count > 0
+        ORDER BY br.created_at, ms.model_key
+    """
+    )
+
+    history = []
+    for row in session.execute(query):
+        entry = dict(row._mapping)
+        entry["created_at"] = (
+            row.created_at.strftime("%Y-%m-%d %H:%M:%S") if row.created_at else None
+        )
+        history.append(entry)
+    session.close()
+    return history
+
+
+@instrumented()
+def load_model_stats_history_from_folder(
+    results_dir: str = "results",
+) -> List[ModelStatsHistory]:
+    """Load the per-model summaries of every run from the run catalog.
+
+    Runs listed but not summarized yet are summarized here, once.
+    """
+    results_path = Path(results_dir)
+    runs = _load_run_catalog_from_folder(results_dir)
+    changes = {}
+    for timestamp, run in runs.items():
+        if run["models"] is None:
+            summary, _ = _load_run_summary_from_folder(results_path / timestamp)
+            if summary is not None:
+                changes[timestamp] = _catalog_entry(
+                    timestamp,
+                    (results_path / timestamp / "results.json").stat(),
+                    summary["total_documents"],
+                    summary["model_stats"],
+                )
+    if changes:
+        runs = _update_run_catalog(results_path, changes)
+
+    history = []
+    for timestamp in sorted(runs):
+        for stats in runs[timestamp]["models"] or []:
+            history.append(
+                {
+                    "timestamp": timestamp,
+                    "created_at": runs[timestamp]["created_at"],
+                    "model_key": stats["model_key"],
+                    "count": stats["count"],
+                    "json_accuracy": stats["json_accuracy"],
+                    "text_accuracy": stats["text_accuracy"],
+                    "total_cost": stats["total_cost"],
+                    "ocr_latency": stats["ocr_latency"],
+                    "extraction_latency": stats["extraction_latency"],
+                }
+            )
+    return history
+
+
+@instrumented()
+def load_model_sketches_from_db(timestamps: List[str]) -> List[ModelSketches]:
+    """Load the stored latency and cost sketches of each model in the given runs"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        """
+        SELECT br.timestamp, ms.model_key, ms.sketches
+        FROM benchmark_runs br
+        INNER JOIN benchmark_run_model_stats ms ON ms.benchmark_run_id = br.id
+        WHERE br.timestamp = ANY(:timestamps)
+            AND ms.count > 0
+            AND ms.sketches IS NOT NULL
+        ORDER BY br.created_at, ms.model_key
+    """
+    )
+
+    rows = session.execute(query, {"timestamps": list(timestamps)})
+    sketches = [dict(row._mapping) for row in rows]
+    session.close()
+    return sketches
+
+
+@instrumented()
+def load_model_sketches_from_folder(
+    timestamps: List[str], results_dir: str = "results"
+) -> List[ModelSketches]:
+    """Load the latency and cost sketches of each model in the given runs from
+    their summary.json sidecars"""
+    return [
+        {
+            "timestamp": timestamp,
+            "model_key": stats["model_key"],
+            "sketches": stats["sketches"],
+        }
+        for timestamp in timestamps
+        for stats in load_model_stats_for_run_from_folder(timestamp, results_dir)
+        if stats.get("sketches")
+    ]
+
+
+@instrumented()
+def load_run_report_from_folder(
+    timestamp: str, results_dir: str = "results"
+) -> Optional[Dict[str, Any]]:
+    """Load the report snapshot of a run, unless results.json changed since"""
+    run_dir = Path(results_dir) / timestamp
+    report_path = run_dir / RUN_REPORT_FILENAME
+    results_path = run_dir / "results.json"
+    if not report_path.exists() or not results_path.exists():
+        return None
+    add_bytes(report_path.stat().st_size)
+    with open(report_path) as f:
+        report = json.load(f)
+    if report.get("source_mtime") != results_path.stat().st_mtime:
+        return None
+    return report
+
+
+@instrumented()
+def load_run_report_from_db(timestamp: str) -> Optional[Dict[str, Any]]:
+    """Load the report snapshot of a run from benchmark_run_reports"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        """
+        SELECT rep.report
+        FROM benchmark_run_reports rep
+        INNER JOIN benchmark_runs br ON br.id = rep.benchmark_run_id
+        WHERE br.timestamp = :timestamp
+    """
+    )
+
+    row = session.execute(query, {"timestamp": timestamp}).first()
+    session.close()
+    return row.report if row else None
+
+
+def save_run_report_to_folder(
+    timestamp: str, report: Dict[str, Any], results_dir: str = "results"
+) -> None:
+    """Write the report snapshot of a run next to its results.json"""
+    run_dir = Path(results_dir) / timestamp
+    report = {
+        **report,
+        "source_mtime": (run_dir / "results.json").stat().st_mtime,
+    }
+    report_path = run_dir / RUN_REPORT_FILENAME
+    tmp_path = report_path.with_suffix(f".{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(report, f)
+    os.replace(tmp_path, report_path)
+
+
+def save_run_report_to_db(timestamp: str, report: Dict[str, Any]) -> None:
+    """Store the report snapshot of a run in benchmark_run_reports"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+
+    query = text(
+        """
+        INSERT INTO benchmark_run_reports (benchmark_run_id, report, created_at)
+        SELECT id, CAST(:report AS jsonb), now()
+        FROM benchmark_runs
+        WHERE timestamp = :timestamp
+        ON CONFLICT (benchmark_run_id)
+        DO UPDATE SET report = EXCLUDED.report, created_at = EXCLUDED.created_at
+    """
+    )
+
+    with engine.begin() as conn:
+        conn.execute(query, {"timestamp": timestamp, "report": json.dumps(report)})
+
+
+def _matches_result_filters(result: Dict[str, Any], filters: ResultFilters) -> bool:
+    """Python equivalent of the WHERE clause built by _result_filter_conditions"""
+    if filters.get("only_with_diffs", True):
+        stats = result.get("jsonDiffStats")
+        if not isinstance(stats, dict) or not (stats.get("total") or 0) > 0:
+            return False
+    if filters.get("model_key") and get_model_key(result) != filters["model_key"]:
+        return False
+    accuracy = result.get("jsonAccuracy")
+    if filters.get("min_accuracy") is not None and (
+        accuracy is None or accuracy < filters["min_accuracy"]
+    ):
+        return False
+    if filters.get("max_accuracy") is not None and (
+        accuracy is None or accuracy > filters["max_accuracy"]
+    ):
+        return False
+    if filters.get("has_error") is not None and bool(result.get("error")) != (
+        filters["has_error"]
+    ):
+        return False
+    return True
+
+
+def _result_filter_conditions(
+    filters: ResultFilters, params: Dict[str, Any]
+) -> List[str]:
+    """WHERE conditions of the results of run :timestamp matching the filters"""
+    conditions = ["br.timestamp = :timestamp"]
+    if filters.get("only_with_diffs", True):
+        conditions.append("(bres.json_diff_stats->>'total')::float > 0")
+    if filters.get("model_key"):
+        conditions.append(f"{MODEL_KEY_SQL} = :model_key")
+        params["model_key"] = filters["model_key"]
+    if filters.get("min_accuracy") is not None:
+        conditions.append("bres.json_accuracy >= :min_accuracy")
+        params["min_accuracy"] = filters["min_accuracy"]
+    if filters.get("max_accuracy") is not None:
+        conditions.append("bres.json_accuracy <= :max_accuracy")
+        params["max_accuracy"] = filters["max_accuracy"]
+    if filters.get("has_error") is not None:
+        conditions.append(
+            "COALESCE(bres.error, '') <> ''"
+            if filters["has_error"]
+            else "COALESCE(bres.error, '') = ''"
+        )
+    return conditions
+
+
+@instrumented()
+def load_result_ids_for_run_from_folder(
+    timestamp: str,
+    filters: ResultFilters,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    results_dir: str = "results",
+) -> ResultIdPage:
+    """Load one page of result ids matching the filters from folder"""
+    results = _load_metric_records_from_folder(
+        timestamp, MODEL_COLUMNS + FILTER_COLUMNS, results_dir
+    )
+    ids = [
+        result["id"]
+        for result in results
+        if (after_id is None or result["id"] > after_id)
+        and _matches_result_filters(result, filters)
+    ]
+    ids.sort()
+    page = ids[:limit]
+    return {
+        "ids": page,
+        "next_cursor": page[-1] if len(ids) > limit else None,
+    }
+
+
+@instrumented()
+def load_result_ids_for_run_from_db(
+    timestamp: str,
+    filters: ResultFilters,
+    after_id: Optional[str] = None,
+    limit: int = 100,
+) -> ResultIdPage:
+    """Load one page of result ids matching the filters from database.
+
+    Filtering happens in SQL and pages are fetched with keyset pagination on
+    the result id, so only ids cross the wire regardless of run size.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    params: Dict[str, Any] = {"timestamp": timestamp, "limit": limit + 1}
+    conditions = _result_filter_conditions(filters, params)
+    if after_id is not None:
+        conditions.append("bres.id > CAST(:after_id AS uuid)")
+        params["after_id"] = after_id
+
+    query = text(
+        f"""
+        SELECT bres.id
+        FROM benchmark_results bres
+        INNER JOIN benchmark_runs br ON br.id = bres.benchmark_run_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY bres.id
+        LIMIT :limit
+    """
+    )
+
+    ids = [str(row.id) for row in session.execute(query, params)]
+    session.close()
+
+    page = ids[:limit]
+    return {
+        "ids": page,
+        "next_cursor": page[-1] if len(ids) > limit else None,
+    }
+
+
+@instrumented()
+def load_model_keys_for_run_from_folder(
+    timestamp: str, results_dir: str = "results"
+) -> List[str]:
+    """Load the model combinations present in a run from folder"""
+    results = _load_metric_records_from_folder(timestamp, MODEL_COLUMNS, results_dir)
+    return sorted({get_model_key(result) for result in results})
+
+
+@instrumented()
+def load_model_keys_for_run_from_db(timestamp: str) -> List[str]:
+    """Load the model combinations present in a run from database"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        f"""
+        SELECT DISTINCT {MODEL_KEY_SQL} AS model_key
+        FROM benchmark_results bres
+        INNER JOIN benchmark_runs br ON br.id = bres.benchmark_run_id
+        WHERE br.timestamp = :timestamp
+        ORDER BY model_key
+    """
+    )
+
+    rows = session.execute(query, {"timestamp": timestamp})
+    model_keys = [row.model_key for row in rows]
+    session.close()
+    return model_keys
+
+
+def _result_table_row(result: Dict[str, Any]) -> Dict[str, Any]:
+    usage = result.get("usage") or {}
+    return {
+        "id": result["id"],
+        "fileUrl": result.get("fileUrl"),
+        "ocrModel": result.get("ocrModel"),
+        "extractionModel": result.get("extractionModel"),
+        "levenshteinDistance": result.get("levenshteinDistance"),
+        "jsonAccuracy": result.get("jsonAccuracy"),
+        "totalCost": usage.get("totalCost"),
+        "duration": usage.get("duration"),
+    }
+
+
+@instrumented()
+def load_results_page_for_run_from_folder(
+    timestamp: str,
+    filters: ResultFilters,
+    sort_by: str = "id",
+    descending: bool = False,
+    offset: int = 0,
+    limit: int = 100,
+    results_dir: str = "results",
+) -> ResultTablePage:
+    """Load one sorted page of the detailed results table from folder.
+
+    Only the columns of the table are read from the run's Parquet sidecar;
+    metadata stays on disk until load_result_metadata asks for one row.
+    """
+    results = _load_metric_records_from_folder(
+        timestamp, RESULT_TABLE_COLUMNS, results_dir
+    )
+    rows = [
+        _result_table_row(result)
+        for result in results
+        if _matches_result_filters(result, filters)
+    ]
+    # Same order as the SQL loader: missing values last, ties by id
+    rows.sort(key=lambda row: row["id"])
+    present = [row for row in rows if row[sort_by] is not None]
+    present.sort(key=lambda row: row[sort_by], reverse=descending)
+    rows = present + [row for row in rows if row[sort_by] is None]
+    return {"rows": rows[offset : offset + limit], "total": len(rows)}
+
+
+@instrumented()
+def load_results_page_for_run_from_db(
+    timestamp: str,
+    filters: ResultFilters,
+    sort_by: str = "id",
+    descending: bool = False,
+    offset: int = 0,
+    limit: int = 100,
+) -> ResultTablePage:
+    """Load one sorted page of the detailed results table from database.
+
+    Filtering, sorting and paging happen in SQL and only the table's columns
+    are selected, so a page costs the same regardless of run size.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    params: Dict[str, Any] = {"timestamp": timestamp, "offset": offset, "limit": limit}
+    conditions = _result_filter_conditions(filters, params)
+    direction = "DESC" if descending else "ASC"
+
+    query = text(
+        f"""
+        SELECT
+            {", ".join(f'{sql} AS "{name}"' for name, sql in RESULT_TABLE_FIELDS.items())},
+            COUNT(*) OVER () AS total
+        FROM benchmark_results bres
+        INNER JOIN benchmark_runs br ON br.id = bres.benchmark_run_id
+        WHERE {" AND ".join(conditions)}
+        ORDER BY {RESULT_TABLE_FIELDS[sort_by]} {direction} NULLS LAST, bres.id
+        OFFSET :offset
+        LIMIT :limit
+    """
+    )
+
+    rows = session.execute(query, params).all()
+    session.close()
+
+    if not rows and offset > 0:
+        # Past the last page; count the matches for the caller to step back
+        total = load_results_page_for_run_from_db(timestamp, filters, limit=1)["total"]
+    else:
+        total = rows[0].total if rows else 0
+    return {
+        "rows": [
+            {name: getattr(row, name) for name in RESULT_TABLE_FIELDS} for row in rows
+        ],
+        "total": total,
+    }
+
+
+@instrumented()
+def load_result_metadata_from_folder(
+    timestamp: str, id: str, results_dir: str = "results"
+) -> Dict[str, Any]:
+    """Load the metadata of one result from the run's Parquet sidecar"""
+    results_path = Path(results_dir) / timestamp / "results.json"
+    if not results_path.exists():
+        return {}
+    record = read_metric_record(results_path, int(id), ["metadata"])
+    return (record or {}).get("metadata") or {}
+
+
+@instrumented()
+def load_result_metadata_from_db(timestamp: str, id: str) -> Dict[str, Any]:
+    """Load the metadata of one result from database"""
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    query = text(
+        """
+        SELECT bres.metadata
+        FROM benchmark_results bres
+        INNER JOIN benchmark_runs br ON br.id = bres.benchmark_run_id
+        WHERE br.timestamp = :timestamp AND bres.id = CAST(:id AS uuid)
+    """
+    )
+
+    row = session.execute(query, {"timestamp": timestamp, "id": id}).first()
+    session.close()
+    return (row.metadata if row else None) or {}
+
+
+@instrumented()
+def load_new_results_for_run_from_folder(
+    timestamp: str, watermark: Optional[float] = None, results_dir: str = "results"
+) -> ResultDelta:
+    """Load the results of a run if results.json changed since the watermark.
+
+    The runner writes results.json in one go, so the watermark is the file's
+    mtime and a changed file is returned whole with reset set.
+    """
+    results_path = Path(results_dir) / timestamp / "results.json"
+    mtime = results_path.stat().st_mtime if results_path.exists() else None
+    if mtime is None or mtime == watermark:
+        run_data = {}
+    else:
+        run_data = load_results_for_run_from_folder(timestamp, results_dir)
+
+    results = run_data.pop("results", [])
+    return {
+        "run": {"timestamp": timestamp, **run_data} if run_data else {},
+        "results": results,
+        "watermark": mtime,
+        "reset": bool(run_data),
+    }
+
+
+@instrumented()
+def load_new_results_for_run_from_db(
+    timestamp: str, watermark: Optional[datetime] = None
+) -> ResultDelta:
+    """Load the metric columns of results created since the watermark.
+
+    The watermark is the newest created_at seen so far. Rows from the last
+    WATERMARK_OVERLAP before it are returned again, so callers must skip ids
+    they already have.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    run_row = session.execute(
+        text(
+            """
+        SELECT id, timestamp, status, run_by, description, total_documents, created_at, completed_at
+        FROM benchmark_runs
+        WHERE timestamp = :timestamp
+    """
+        ),
+        {"timestamp": timestamp},
+    ).first()
+    if not run_row:
+        session.close()
+        return {"run": {}, "results": [], "watermark": watermark, "reset": False}
+
+    conditions = ["bres.benchmark_run_id = :run_id"]
+    params: Dict[str, Any] = {"run_id": run_row.id}
+    if watermark is not None:
+        conditions.append("bres.created_at >= :since")
+        params["since"] = watermark - WATERMARK_OVERLAP
+
+    query = text(
+        f"""
+        SELECT
+            bres.created_at,
+            json_build_object(
+                'id', bres.id,
+                'fileUrl', bres.file_url,
+                'ocrModel', bres.ocr_model,
+                'extractionModel', bres.extraction_model,
+                'directImageExtraction', bres.direct_image_extraction,
+                'levenshteinDistance', bres.levenshtein_distance,
+                'jsonAccuracy', bres.json_accuracy,
+                'jsonDiffStats', bres.json_diff_stats,
+                'metadata', bres.metadata,
+                'usage', bres.usage,
+                'error', bres.error
+            ) AS result
+        FROM benchmark_results bres
+        WHERE {" AND ".join(conditions)}
+        ORDER BY bres.created_at
+    """
+    )
+
+    rows = session.execute(query, params).all()
+    session.close()
+
+    return {
+        "run": {
+            "timestamp": run_row.timestamp,
+            "status": run_row.status,
+            "run_by": run_row.run_by,
+            "description": run_row.description,
+            "total_documents": run_row.total_documents,
+            "created_at": (
+                run_row.created_at.strftime("%Y-%m-%d %H:%M:%S")
+                if run_row.created_at
+                else None
+            ),
+            "completed_at": (
+                run_row.completed_at.strftime("%Y-%m-%d %H:%M:%S")
+                if run_row.completed_at
+                else None
+            ),
+        },
+        "results": [row.result for row in rows],
+        "watermark": rows[-1].created_at if rows else watermark,
+        "reset": False,
+    }
+
+
+def _comparison_scores_sql(timestamp_param: str) -> str:
+    """Per-document scores of one run, keyed by file URL and model combination"""
+    return f"""
+        SELECT DISTINCT ON (bres.file_url, {MODEL_KEY_SQL})
+            bres.id,
+            bres.file_url,
+            {MODEL_KEY_SQL} AS model_key,
+            COALESCE(bres.json_accuracy, 0) AS json_accuracy,
+            COALESCE(bres.levenshtein_distance, 0) AS text_accuracy,
+            COALESCE((bres.usage->>'duration')::float, 0) / 1000 AS latency,
+            COALESCE((bres.usage->>'totalCost')::float, 0) AS cost,
+            COALESCE(bres.error, '') <> '' AS error
+        FROM benchmark_results bres
+        INNER JOIN benchmark_runs br ON br.id = bres.benchmark_run_id
+        WHERE br.timestamp = :{timestamp_param}
+        ORDER BY bres.file_url, {MODEL_KEY_SQL}, bres.id
+    """
+
+
+# A pair regressed (improved) when an accuracy moved down (up) by more than the
+# threshold or the document started (stopped) failing
+REGRESSION_SQL = """(
+    json_accuracy_delta < -:accuracy_threshold
+    OR text_accuracy_delta < -:accuracy_threshold
+    OR (compare_error AND NOT base_error)
+)"""
+IMPROVEMENT_SQL = """(
+    json_accuracy_delta > :accuracy_threshold
+    OR text_accuracy_delta > :accuracy_threshold
+    OR (base_error AND NOT compare_error)
+)"""
+
+
+@instrumented()
+def load_run_comparison_from_db(
+    base_timestamp: str,
+    compare_timestamp: str,
+    accuracy_threshold: float = 0.05,
+    latency_threshold: float = 1.0,
+    limit: int = 1000,
+) -> RunComparison:
+    """Compare two runs document by document inside the database.
+
+    Results are paired on file URL and model combination with a join in SQL,
+    so only the changed pairs (worst regressions first, up to limit) and the
+    per-model aggregates leave the database.
+    """
+    database_url = os.getenv("DATABASE_URL")
+    engine = create_engine(database_url)
+    Session = sessionmaker(bind=engine)
+    session = Session()
+
+    paired_cte = f"""
+        WITH base AS ({_comparison_scores_sql("base_timestamp")}),
+        compare AS ({_comparison_scores_sql("compare_timestamp")}),
+        paired AS (
+            SELECT
+                b.file_url,
+                b.model_key,
+                b.id AS base_id,
+                c.id AS compare_id,
+                b.json_accuracy AS base_json_accuracy,
+                c.json_accuracy AS compare_json_accuracy,
+                c.json_accuracy - b.json_accuracy AS json_accuracy_delta,
+                b.text_accuracy AS base_text_accuracy,
+                c.text_accuracy AS compare_text_accuracy,
+                c.text_accuracy - b.text_accuracy AS text_accuracy_delta,
+                b.latency AS base_latency,
+                c.latency AS compare_latency,
+                c.latency - b.latency AS latency_delta,
+                b.cost AS base_cost,
+                c.cost AS compare_cost,
+                c.cost - b.cost AS cost_delta,
+                b.error AS base_error,
+                c.error AS compare_error
+            FROM base b
+            INNER JOIN compare c
+                ON c.file_url = b.file_url AND c.model_key = b.model_key
+        )
+    """
+    params = {
+        "base_timestamp": base_timestamp,
+        "compare_timestamp": compare_timestamp,
+        "accuracy_threshold": accuracy_threshold,
+        "latency_threshold": latency_threshold,
+        "limit": limit,
+    }
+
+    changed_query = text(
+        f"""
+        {paired_cte}
+        SELECT
+            *,
+            {REGRESSION_SQL} AS regression,
+            {IMPROVEMENT_SQL} AS improvement
+        FROM paired
+        WHERE {REGRESSION_SQL}
+            OR {IMPROVEMENT_SQL}
+            OR ABS(latency_delta) > :latency_threshold
+        ORDER BY LEAST(json_accuracy_delta, text_accuracy_delta), file_url, model_key
+        LIMIT :limit
+    """
+    )
+
+    # Accuracy, latency and cost averages skip pairs where either side failed
+    ok = "NOT base_error AND NOT compare_error"
+    deltas_query = text(
+        f"""
+        {paired_cte}
+        SELECT
+            model_key,
+            COUNT(*) AS documents,
+            AVG(base_json_accuracy) FILTER (WHERE {ok}) AS base_json_accuracy,
+            AVG(compare_json_accuracy) FILTER (WHERE {ok}) AS compare_json_accuracy,
+            AVG(json_accuracy_delta) FILTER (WHERE {ok}) AS json_accuracy_delta,
+            AVG(base_text_accuracy) FILTER (WHERE {ok}) AS base_text_accuracy,
+            AVG(compare_text_accuracy) FILTER (WHERE {ok}) AS compare_text_accuracy,
+            AVG(text_accuracy_delta) FILTER (WHERE {ok}) AS text_accuracy_delta,
+            AVG(base_latency) FILTER (WHERE {ok}) AS base_latency,
+            AVG(compare_latency) FILTER (WHERE {ok}) AS compare_latency,
+            AVG(latency_delta) FILTER (WHERE {ok}) AS latency_delta,
+            AVG(base_cost) FILTER (WHERE {ok}) AS base_cost,
+            AVG(compare_cost) FILTER (WHERE {ok}) AS compare_cost,
+            AVG(cost_delta) FILTER (WHERE {ok}) AS cost_delta,
+            COUNT(*) FILTER (WHERE base_error) AS base_errors,
+            COUNT(*) FILTER (WHERE compare_error) AS compare_errors,
+            COUNT(*) FILTER (WHERE {REGRESSION_SQL}) AS regressions,
+            COUNT(*) FILTER (WHERE {IMPROVEMENT_SQL}) AS improvements
+        FROM paired
+        GROUP BY model_key
+        ORDER BY model_key
+    """
+    )
+
+    changed = [dict(row._mapping) for row in session.execute(changed_query, params)]
+    model_deltas = [dict(row._mapping) for row in session.execute(deltas_query, params)]
+    session.close()
+
+    for row in changed:
+        row["base_id"] = str(row["base_id"])
+        row["compare_id"] = str(row["compare_id"])
+    return {"changed": changed, "model_deltas": model_deltas}
+
+
+def _comparison_scores_frame(results: List[Dict[str, Any]]) -> pd.DataFrame:
+    """Python equivalent of _comparison_scores_sql() over loaded results"""
+    usage = [result.get("usage") or {} for result in results]
+    scores = pd.DataFrame(
+        {
+            "id": [result["id"] for result in results],
+            "file_url": [result.get("fileUrl") for result in results],
+            "model_key": [get_model_key(result) for result in results],
+            "json_accuracy": [result.get("jsonAccuracy") or 0 for result in results],
+            "text_accuracy": [
+                result.get("levenshteinDistance") or 0 for result in results
+            ],
+            "latency": [(u.get("duration") or 0) / 1000 for u in usage],
+            "cost": [u.get("totalCost") or 0 for u in usage],
+            "error": [bool(result.get("error")) for result in results],
+        }
+    )
+    return scores.drop_duplicates(["file_url", "model_key"])
+
+
+@instrumented()
+def load_run_comparison_from_folder(
+    base_timestamp: str,
+    compare_timestamp: str,
+    accuracy_threshold: float = 0.05,
+    latency_threshold: float = 1.0,
+    limit: int = 1000,
+    results_dir: str = "results",
+) -> RunComparison:
+    """Compare two runs document by document with a hash join in pandas"""
+    runs = []
+    for timestamp in (base_timestamp, compare_timestamp):
+        results = _load_metric_records_from_folder(
+            timestamp, MODEL_COLUMNS + COMPARISON_COLUMNS, results_dir
+        )
+        runs.append(_comparison_scores_frame(results))
+
+    paired = runs[0].merge(runs[1], on=["file_url", "model_key"])
+    paired = paired.rename(
+        columns=lambda c: (
+            f"base_{c[:-2]}"
+            if c.endswith("_x")
+            else f"compare_{c[:-2]}" if c.endswith("_y") else c
+        )
+    )
+    for metric in ("json_accuracy", "text_accuracy", "latency", "cost"):
+        paired[f"{metric}_delta"] = (
+            paired[f"compare_{metric}"] - paired[f"base_{metric}"]
+        )
+
+    paired["regression"] = (
+        (paired["json_accuracy_delta"] < -accuracy_threshold)
+        | (paired["text_accuracy_delta"] < -accuracy_threshold)
+        | (paired["compare_error"] & ~paired["base_error"])
+    )
+    paired["improvement"] = (
+        (paired["json_accuracy_delta"] > accuracy_threshold)
+        | (paired["text_accuracy_delta"] > accuracy_threshold)
+        | (paired["base_error"] & ~paired["compare_error"])
+    )
+
+    changed = paired[
+        paired["regression"]
+        | paired["improvement"]
+        | (paired["latency_delta"].abs() > latency_threshold)
+    ]
+    changed = (
+        changed.assign(
+            worst_delta=changed[["json_accuracy_delta", "text_accuracy_delta"]].min(
+                axis=1
+            )
+        )
+        .sort_values(["worst_delta", "file_url", "model_key"])
+        .drop(columns="worst_delta")
+        .head(limit)
+    )
+
+    ok = paired[~paired["base_error"] & ~paired["compare_error"]]
+    averaged = [
+        f"{prefix}{metric}{suffix}"
+        for metric in ("json_accuracy", "text_accuracy", "latency", "cost")
+        for prefix, suffix in (("base_", ""), ("compare_", ""), ("", "_delta"))
+    ]
+    model_deltas = (
+        paired.groupby("model_key")
+        .agg(
+            documents=("file_url", "size"),
+            base_errors=("base_error", "sum"),
+            compare_errors=("compare_error", "sum"),
+            regressions=("regression", "sum"),
+            improvements=("improvement", "sum"),
+        )
+        .join(ok.groupby("model_key")[averaged].mean())
+        .reset_index()
+    )
+
+    return {
+        "changed": changed.to_dict("records"),
+        "model_deltas": model_deltas.to_dict("records"),
+    }
+
+
 def load_run_list() -> List[BenchmarkRunMetadata]:
     """Load list of benchmark runs from either database or local files"""
     if os.getenv("DATABASE_URL"):
@@ -309,7 +1689,155 @@ def load_results_for_run(
     """Load results for a specific run from either database or local files"""
     if os.getenv("DATABASE_URL"):
         return load_results_for_run_from_db(timestamp, include_metrics_only)
-    return load_results_for_run_from_folder(timestamp)
+    return load_results_for_run_from_folder(
+        timestamp, include_metrics_only=include_metrics_only
+    )
+
+
+def load_result_scores_for_run(timestamp: str) -> List[Dict[str, Any]]:
+    """Load the model and scores of every result of a run from either database or local files.
+
+    A fraction of load_results_for_run: enough for result_metrics_frame() when
+    the aggregates come from precomputed stats.
+    """
+    if os.getenv("DATABASE_URL"):
+        return load_result_scores_for_run_from_db(timestamp)
+    return load_result_scores_for_run_from_folder(timestamp)
+
+
+def load_model_stats_for_run(timestamp: str) -> List[ModelStats]:
+    """Load precomputed per-model aggregates of a run.
+
+    Returns an empty list when no summary exists (a database run that is still
+    in progress and has not been backfilled); callers then aggregate the raw
+    results themselves.
+    """
+    if os.getenv("DATABASE_URL"):
+        return load_model_stats_for_run_from_db(timestamp)
+    return load_model_stats_for_run_from_folder(timestamp)
+
+
+def load_model_stats_history() -> List[ModelStatsHistory]:
+    """Load per-model summaries of all completed runs, oldest first, from either database or local files"""
+    if os.getenv("DATABASE_URL"):
+        return load_model_stats_history_from_db()
+    return load_model_stats_history_from_folder()
+
+
+def load_model_sketches(timestamps: List[str]) -> List[ModelSketches]:
+    """Load per-model latency and cost sketches of the given runs from either database or local files"""
+    if os.getenv("DATABASE_URL"):
+        return load_model_sketches_from_db(timestamps)
+    return load_model_sketches_from_folder(timestamps)
+
+
+def load_run_report(timestamp: str) -> Optional[Dict[str, Any]]:
+    """Load the report snapshot of a completed run from either database or local files.
+
+    Returns None when build_reports.py has not rendered the run (or, in
+    folder mode, when results.json changed after it did).
+    """
+    if os.getenv("DATABASE_URL"):
+        return load_run_report_from_db(timestamp)
+    return load_run_report_from_folder(timestamp)
+
+
+def save_run_report(timestamp: str, report: Dict[str, Any]) -> None:
+    """Store the report snapshot of a run in either database or local files"""
+    if os.getenv("DATABASE_URL"):
+        save_run_report_to_db(timestamp, report)
+    else:
+        save_run_report_to_folder(timestamp, report)
+
+
+def load_result_ids_for_run(
+    timestamp: str,
+    filters: ResultFilters,
+    after_id: Optional[Any] = None,
+    limit: int = 100,
+) -> ResultIdPage:
+    """Load one page of result ids matching the filters from either database or local files"""
+    if os.getenv("DATABASE_URL"):
+        return load_result_ids_for_run_from_db(timestamp, filters, after_id, limit)
+    return load_result_ids_for_run_from_folder(timestamp, filters, after_id, limit)
+
+
+def load_model_keys_for_run(timestamp: str) -> List[str]:
+    """Load the model combinations present in a run from either database or local files"""
+    if os.getenv("DATABASE_URL"):
+        return load_model_keys_for_run_from_db(timestamp)
+    return load_model_keys_for_run_from_folder(timestamp)
+
+
+def load_results_page_for_run(
+    timestamp: str,
+    filters: ResultFilters,
+    sort_by: str = "id",
+    descending: bool = False,
+    offset: int = 0,
+    limit: int = 100,
+) -> ResultTablePage:
+    """Load one sorted page of the detailed results table from either database or local files.
+
+    sort_by is a key of RESULT_TABLE_FIELDS; results without a value sort last
+    in both directions.
+    """
+    if sort_by not in RESULT_TABLE_FIELDS:
+        raise ValueError(f"Cannot sort results by {sort_by!r}")
+    if os.getenv("DATABASE_URL"):
+        return load_results_page_for_run_from_db(
+            timestamp, filters, sort_by, descending, offset, limit
+        )
+    return load_results_page_for_run_from_folder(
+        timestamp, filters, sort_by, descending, offset, limit
+    )
+
+
+def load_result_metadata(timestamp: str, id: str) -> Dict[str, Any]:
+    """Load the metadata of one result from either database or local files"""
+    if os.getenv("DATABASE_URL"):
+        return load_result_metadata_from_db(timestamp, id)
+    return load_result_metadata_from_folder(timestamp, id)
+
+
+def load_new_results_for_run(
+    timestamp: str, watermark: Optional[Any] = None
+) -> ResultDelta:
+    """Load results added to a run since the watermark from either database or local files.
+
+    Pass the watermark of the previous call (None the first time). When reset
+    is set the results replace everything loaded before instead of adding to it.
+    """
+    if os.getenv("DATABASE_URL"):
+        return load_new_results_for_run_from_db(timestamp, watermark)
+    return load_new_results_for_run_from_folder(timestamp, watermark)
+
+
+def load_run_comparison(
+    base_timestamp: str,
+    compare_timestamp: str,
+    accuracy_threshold: float = 0.05,
+    latency_threshold: float = 1.0,
+    limit: int = 1000,
+) -> RunComparison:
+    """Compare two runs per document from either database or local files.
+
+    Results are paired on file URL and model combination. Only pairs whose
+    JSON or text accuracy moved by more than accuracy_threshold, whose total
+    latency moved by more than latency_threshold seconds, or whose error state
+    changed are returned, worst regressions first.
+    """
+    if os.getenv("DATABASE_URL"):
+        return load_run_comparison_from_db(
+            base_timestamp,
+            compare_timestamp,
+            accuracy_threshold,
+            latency_threshold,
+            limit,
+        )
+    return load_run_comparison_from_folder(
+        base_timestamp, compare_timestamp, accuracy_threshold, latency_threshold, limit
+    )
 
 
 def load_one_result(timestamp: str, id: str) -> Dict[str, Any]:
@@ -319,6 +1847,22 @@ def load_one_result(timestamp: str, id: str) -> Dict[str, Any]:
     return load_one_result_from_folder(timestamp, id)
 
 
+def load_result_payload(timestamp: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """Result from load_one_result with its payload (markdown, JSON, diffs)
+    decompressed; results are loaded with the payload still compressed"""
+    if os.getenv("DATABASE_URL"):
+        return load_result_payload_from_db(result)
+    return load_result_payload_from_folder(timestamp, result)
+
+
+def format_run(run: BenchmarkRunMetadata) -> str:
+    """Run selector label: the run's time and number of documents"""
+    label = format_timestamp(run["timestamp"])
+    if run.get("total_documents") is not None:
+        label += f" ({run['total_documents']:,} documents)"
+    return label
+
+
 def format_timestamp(timestamp: str) -> str:
     """Convert timestamp string to readable format"""
     return datetime.strptime(timestamp, "%Y-%m-%d-%H-%M-%S").strftime(
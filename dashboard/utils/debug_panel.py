@@ -0,0 +1,56 @@
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from utils.instrumentation import collected_spans, start_collecting, timed
+
+SPAN_COLUMNS = ["kind", "name", "parent", "ms", "rows", "bytes"]
+
+
+def debug_enabled() -> bool:
+    """Panel shown with DASHBOARD_DEBUG=1 or ?debug=1 in the page URL"""
+    return os.getenv("DASHBOARD_DEBUG") == "1" or st.query_params.get("debug") == "1"
+
+
+@contextmanager
+def instrumented_page(name: str):
+    """Collect the spans of one page run and show them at the end if enabled"""
+    start_collecting()
+    try:
+        with timed("page", name):
+            yield
+    finally:
+        if debug_enabled():
+            render_debug_panel(collected_spans())
+
+
+def render_debug_panel(spans):
+    spans = pd.DataFrame(spans, columns=SPAN_COLUMNS)
+    with st.expander("Performance (debug)", expanded=True):
+        if spans.empty:
+            st.info("Nothing was timed on this run.")
+            return
+
+        # Cached calls do not show up here at all
+        totals = (
+            spans[spans["kind"] != "page"].groupby("kind")["ms"].agg(["sum", "count"])
+        )
+        page_ms = spans.loc[spans["kind"] == "page", "ms"].sum()
+        columns = st.columns(len(totals) + 1)
+        columns[0].metric("Page", f"{page_ms:.0f} ms")
+        for column, (kind, row) in zip(columns[1:], totals.iterrows()):
+            column.metric(
+                kind.capitalize(),
+                f"{row['sum']:.0f} ms",
+                f"{row['count']:.0f} calls",
+                delta_color="off",
+            )
+
+        st.dataframe(
+            spans.sort_values("ms", ascending=False).style.format(
+                {"ms": "{:.1f}", "rows": "{:.0f}", "bytes": "{:,.0f}"}, na_rep="-"
+            ),
+            hide_index=True,
+        )
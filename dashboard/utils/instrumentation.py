@@ -0,0 +1,184 @@
+"""Timing and size counters for dashboard loaders, queries, aggregations and charts.
+
+Every measured step produces a span (kind, name, duration, rows, bytes) that
+is written to the "dashboard.perf" logger and, while a page run is being
+collected, kept for the debug panel. Set DASHBOARD_PERF_LOG to a file path to
+log every span there; spans slower than DASHBOARD_SLOW_MS (default 1000) are
+logged as warnings even without it.
+"""
+
+import os
+import json
+import time
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+try:
+    import psycopg2.extras
+except ImportError:  # Folder mode does not need a database driver
+    psycopg2 = None
+
+SLOW_SPAN_MS = float(os.getenv("DASHBOARD_SLOW_MS", "1000"))
+
+# Fragment reruns keep adding to the spans of their page run
+MAX_COLLECTED_SPANS = 1000
+
+logger = logging.getLogger("dashboard.perf")
+logger.setLevel(logging.INFO)
+if os.getenv("DASHBOARD_PERF_LOG"):
+    _handler = logging.FileHandler(os.getenv("DASHBOARD_PERF_LOG"))
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.propagate = False
+
+Span = Dict[str, Any]
+
+# Spans of the page run executing on this thread, and the spans open on it
+_local = threading.local()
+
+
+def _open_spans() -> List[Span]:
+    if not hasattr(_local, "open"):
+        _local.open = []
+    return _local.open
+
+
+def start_collecting() -> None:
+    """Start keeping the spans recorded on this thread (one page run)"""
+    _local.collected = []
+
+
+def collected_spans() -> List[Span]:
+    return list(getattr(_local, "collected", []))
+
+
+def _record(span: Span) -> None:
+    collected = getattr(_local, "collected", None)
+    if collected is not None and len(collected) < MAX_COLLECTED_SPANS:
+        collected.append(span)
+
+    counts = "".join(
+        f" {key}={span[key]}" for key in ("rows", "bytes") if span[key] is not None
+    )
+    message = f"{span['kind']} {span['name']} {span['ms']:.1f}ms{counts}"
+    if span["ms"] >= SLOW_SPAN_MS:
+        logger.warning("slow " + message)
+    else:
+        logger.info(message)
+
+
+@contextmanager
+def timed(kind: str, name: str) -> Iterator[Span]:
+    """Time the enclosed block; set span["rows"] / span["bytes"] inside it"""
+    open_spans = _open_spans()
+    span = {
+        "kind": kind,
+        "name": name,
+        "parent": open_spans[-1]["name"] if open_spans else None,
+        "ms": 0.0,
+        "rows": None,
+        "bytes": None,
+        "decode_ms": 0.0,
+        "decode_bytes": 0,
+    }
+    open_spans.append(span)
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span["ms"] = (time.perf_counter() - start) * 1000
+        open_spans.pop()
+        decode_ms = span.pop("decode_ms")
+        decode_bytes = span.pop("decode_bytes")
+        _record(span)
+        if decode_bytes:
+            _record(
+                {
+                    "kind": "decode",
+                    "name": f"{name} JSON",
+                    "parent": name,
+                    "ms": decode_ms,
+                    "rows": None,
+                    "bytes": decode_bytes,
+                }
+            )
+
+
+def add_bytes(count: int) -> None:
+    """Add to the byte count of the innermost open span"""
+    open_spans = _open_spans()
+    if open_spans:
+        open_spans[-1]["bytes"] = (open_spans[-1]["bytes"] or 0) + count
+
+
+def count_rows(value: Any) -> Optional[int]:
+    """Row count of a loader's return value"""
+    if isinstance(value, list):
+        return len(value)
+    if isinstance(value, dict):
+        for key in ("results", "ids", "changed"):
+            if isinstance(value.get(key), list):
+                return len(value[key])
+        return 1 if value else 0
+    return None
+
+
+def instrumented(kind: str = "loader") -> Callable:
+    """Decorator timing every call of a function as a span"""
+
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(kind, fn.__name__) as span:
+                value = fn(*args, **kwargs)
+                span["rows"] = count_rows(value)
+                return value
+
+        return wrapper
+
+    return decorator
+
+
+# SQL statements: time from execute to the end of the server round trip.
+# Decoding of json/jsonb values happens later, while rows are fetched, and is
+# attributed to the enclosing span by the typecaster below.
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start"].pop()
+    open_spans = _open_spans()
+    _record(
+        {
+            "kind": "query",
+            "name": " ".join(statement.split())[:80],
+            "parent": open_spans[-1]["name"] if open_spans else None,
+            "ms": (time.perf_counter() - start) * 1000,
+            "rows": cursor.rowcount if cursor.rowcount >= 0 else None,
+            "bytes": None,
+        }
+    )
+
+
+def _counting_loads(value):
+    start = time.perf_counter()
+    decoded = json.loads(value)
+    open_spans = _open_spans()
+    if open_spans:
+        open_spans[-1]["decode_ms"] += (time.perf_counter() - start) * 1000
+        open_spans[-1]["decode_bytes"] += len(value)
+    return decoded
+
+
+if psycopg2 is not None:
+    psycopg2.extras.register_default_json(globally=True, loads=_counting_loads)
+    psycopg2.extras.register_default_jsonb(globally=True, loads=_counting_loads)
@@ -0,0 +1,240 @@
+import re
+from collections import Counter
+from difflib import HtmlDiff, Match, SequenceMatcher
+from typing import List, Sequence, TypedDict
+
+from utils.text_similarity import (
+    DEFAULT_CHUNK_SIZE,
+    SimilarityEstimate,
+    estimate_similarity,
+)
+
+# Above this combined size the full side-by-side HTML diff is replaced by a
+# paginated summary of changed hunks
+HTML_DIFF_MAX_CHARS = 50_000
+
+# Above this combined size the similarity is estimated in chunks
+SIMILARITY_EXACT_MAX_CHARS = 50_000
+
+# Unanchored regions up to this many token pairs are matched exactly with
+# difflib; larger ones are reported as a single replacement
+EXACT_REGION_MAX_PAIRS = 250_000
+
+# Documents with fewer lines than this are diffed word by word, since OCR
+# output often puts a whole page on a handful of very long lines
+WORD_DIFF_MAX_LINES = 20
+
+
+class MarkdownDiffSummary(TypedDict):
+    unit: str
+    hunks: List[str]
+    added: int
+    removed: int
+    unchanged: int
+
+
+class PatienceMatcher(SequenceMatcher):
+    """SequenceMatcher whose matching blocks come from a patience diff.
+
+    Lines that occur exactly once on both sides anchor the alignment (longest
+    increasing subsequence), and the diff recurses between anchors. This keeps
+    large, mostly similar documents close to linear time, where difflib's
+    longest-match search degrades towards quadratic.
+    """
+
+    def __init__(self, a: Sequence, b: Sequence):
+        super().__init__(None, a, b, autojunk=False)
+
+    def set_seq2(self, b: Sequence) -> None:
+        # Skip difflib's index of b: only find_longest_match() needs it
+        if b is self.b:
+            return
+        self.b = b
+        self.matching_blocks = self.opcodes = None
+        self.fullbcount = None
+
+    def get_matching_blocks(self) -> List[Match]:
+        if self.matching_blocks is not None:
+            return self.matching_blocks
+
+        a, b = self.a, self.b
+        blocks = []
+        stack = [(0, len(a), 0, len(b))]
+        while stack:
+            alo, ahi, blo, bhi = stack.pop()
+
+            # Common prefix and suffix
+            start = 0
+            while (
+                alo + start < ahi
+                and blo + start < bhi
+                and a[alo + start] == b[blo + start]
+            ):
+                start += 1
+            if start:
+                blocks.append((alo, blo, start))
+                alo, blo = alo + start, blo + start
+            end = 0
+            while (
+                alo < ahi - end
+                and blo < bhi - end
+                and a[ahi - end - 1] == b[bhi - end - 1]
+            ):
+                end += 1
+            if end:
+                blocks.append((ahi - end, bhi - end, end))
+                ahi, bhi = ahi - end, bhi - end
+            if alo >= ahi or blo >= bhi:
+                continue
+
+            anchors = _unique_common_anchors(a, alo, ahi, b, blo, bhi)
+            if anchors:
+                prev_a, prev_b = alo, blo
+                for i, j in anchors:
+                    stack.append((prev_a, i, prev_b, j))
+                    blocks.append((i, j, 1))
+                    prev_a, prev_b = i + 1, j + 1
+                stack.append((prev_a, ahi, prev_b, bhi))
+            elif (ahi - alo) * (bhi - blo) <= EXACT_REGION_MAX_PAIRS:
+                matcher = SequenceMatcher(None, a[alo:ahi], b[blo:bhi], autojunk=False)
+                for i, j, size in matcher.get_matching_blocks():
+                    if size:
+                        blocks.append((alo + i, blo + j, size))
+
+        # Merge adjacent blocks, then terminate with the sentinel difflib expects
+        blocks.sort()
+        merged = []
+        for i, j, size in blocks:
+            if (
+                merged
+                and merged[-1][0] + merged[-1][2] == i
+                and merged[-1][1] + merged[-1][2] == j
+            ):
+                merged[-1] = (merged[-1][0], merged[-1][1], merged[-1][2] + size)
+            else:
+                merged.append((i, j, size))
+        merged.append((len(a), len(b), 0))
+
+        self.matching_blocks = [Match._make(block) for block in merged]
+        return self.matching_blocks
+
+
+def _unique_common_anchors(a, alo, ahi, b, blo, bhi):
+    """Positions of tokens unique on both sides, as the longest increasing run"""
+    a_counts = Counter(a[alo:ahi])
+    b_positions = {}
+    b_counts = Counter()
+    for j in range(blo, bhi):
+        b_counts[b[j]] += 1
+        b_positions[b[j]] = j
+    pairs = [
+        (i, b_positions[a[i]])
+        for i in range(alo, ahi)
+        if a_counts[a[i]] == 1 and b_counts.get(a[i]) == 1
+    ]
+    if not pairs:
+        return []
+
+    # Longest increasing subsequence on the b positions (patience sorting)
+    tails = []
+    tail_indices = []
+    predecessors = [-1] * len(pairs)
+    for index, (_, j) in enumerate(pairs):
+        lo, hi = 0, len(tails)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if tails[mid] < j:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo:
+            predecessors[index] = tail_indices[lo - 1]
+        if lo == len(tails):
+            tails.append(j)
+            tail_indices.append(index)
+        else:
+            tails[lo] = j
+            tail_indices[lo] = index
+
+    anchors = []
+    index = tail_indices[-1]
+    while index != -1:
+        anchors.append(pairs[index])
+        index = predecessors[index]
+    anchors.reverse()
+    return anchors
+
+
+def build_html_diff(true_markdown: str, predicted_markdown: str) -> str:
+    """Full side-by-side HTML diff, meant for inputs below HTML_DIFF_MAX_CHARS"""
+    return HtmlDiff().make_file(
+        true_markdown.splitlines(),
+        predicted_markdown.splitlines(),
+        fromdesc="True Markdown",
+        todesc="Predicted Markdown",
+    )
+
+
+def summarize_markdown_diff(
+    true_markdown: str, predicted_markdown: str, context: int = 3
+) -> MarkdownDiffSummary:
+    """Changed hunks and line/word counts of a patience diff of two documents"""
+    true_lines = true_markdown.splitlines()
+    predicted_lines = predicted_markdown.splitlines()
+    if max(len(true_lines), len(predicted_lines)) < WORD_DIFF_MAX_LINES:
+        unit = "word"
+        a = re.findall(r"\S+\s*", true_markdown)
+        b = re.findall(r"\S+\s*", predicted_markdown)
+    else:
+        unit = "line"
+        a, b = true_lines, predicted_lines
+
+    matcher = PatienceMatcher(a, b)
+    unchanged = sum(block.size for block in matcher.get_matching_blocks())
+
+    def render(prefix, tokens):
+        if unit == "word":
+            return [prefix + "".join(tokens).rstrip()]
+        return [prefix + token for token in tokens]
+
+    hunks = []
+    for group in matcher.get_grouped_opcodes(context):
+        first, last = group[0], group[-1]
+        lines = [
+            f"@@ -{first[1] + 1},{last[2] - first[1]} "
+            f"+{first[3] + 1},{last[4] - first[3]} @@"
+        ]
+        for tag, i1, i2, j1, j2 in group:
+            if tag == "equal":
+                lines.extend(render("  ", a[i1:i2]))
+            if tag in ("replace", "delete"):
+                lines.extend(render("- ", a[i1:i2]))
+            if tag in ("replace", "insert"):
+                lines.extend(render("+ ", b[j1:j2]))
+        hunks.append("\n".join(lines))
+
+    return {
+        "unit": unit,
+        "hunks": hunks,
+        "added": len(b) - unchanged,
+        "removed": len(a) - unchanged,
+        "unchanged": unchanged,
+    }
+
+
+def markdown_similarity(
+    true_markdown: str, predicted_markdown: str
+) -> SimilarityEstimate:
+    """Exact similarity of small documents, chunked estimate of large ones"""
+    if true_markdown == predicted_markdown:
+        return SimilarityEstimate(1.0, 1.0, 1.0, True)
+    if not true_markdown or not predicted_markdown:
+        return SimilarityEstimate(0.0, 0.0, 0.0, True)
+    mode = (
+        "exact"
+        if len(true_markdown) + len(predicted_markdown) <= SIMILARITY_EXACT_MAX_CHARS
+        else "approximate"
+    )
+    return estimate_similarity(
+        true_markdown, predicted_markdown, mode, chunk_size=DEFAULT_CHUNK_SIZE
+    )
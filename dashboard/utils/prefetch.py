@@ -0,0 +1,81 @@
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Tuple
+
+CacheKey = Tuple[str, Hashable]
+
+
+class ResultPrefetcher:
+    """Bounded cache of test case results filled by background threads.
+
+    Results are keyed by (timestamp, id). `prefetch` schedules loads for the
+    cases a user is likely to open next, and `get` returns a cached result,
+    waiting for an in-flight load if needed or loading synchronously on a miss.
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[str, Any], Dict[str, Any]],
+        max_entries: int = 64,
+        max_workers: int = 4,
+    ):
+        self._loader = loader
+        self._max_entries = max_entries
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="result-prefetch"
+        )
+        self._entries: "OrderedDict[CacheKey, Future]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, timestamp: str, id: Any) -> Dict[str, Any]:
+        """Return the result for (timestamp, id), loading it if not cached"""
+        key = (timestamp, id)
+        with self._lock:
+            future = self._entries.get(key)
+            if future is not None:
+                self._entries.move_to_end(key)
+
+        if future is not None and not future.cancelled():
+            try:
+                return future.result()
+            except Exception:
+                # Drop the failed prefetch and retry in the foreground
+                with self._lock:
+                    if self._entries.get(key) is future:
+                        del self._entries[key]
+
+        result = self._loader(timestamp, id)
+        completed: Future = Future()
+        completed.set_result(result)
+        with self._lock:
+            self._entries[key] = completed
+            self._evict()
+        return result
+
+    def prefetch(self, timestamp: str, ids: Iterable[Any]) -> None:
+        """Schedule background loads for ids that are not cached yet"""
+        with self._lock:
+            for id in ids:
+                key = (timestamp, id)
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    continue
+                self._entries[key] = self._executor.submit(self._loader, timestamp, id)
+            self._evict()
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_entries:
+            _, future = self._entries.popitem(last=False)
+            future.cancel()
+
+
+def neighbour_ids(ids: list, index: int, count: int) -> list:
+    """Ids around `index`, nearest first, alternating next and previous"""
+    neighbours = []
+    for offset in range(1, count + 1):
+        if index + offset < len(ids):
+            neighbours.append(ids[index + offset])
+        if index - offset >= 0:
+            neighbours.append(ids[index - offset])
+    return neighbours
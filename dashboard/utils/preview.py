@@ -0,0 +1,148 @@
+import os
+import hashlib
+import tempfile
+import threading
+from pathlib import Path
+
+import requests
+from PIL import Image
+
+try:
+    import pymupdf
+except ImportError:  # PDF thumbnails fall back to embedding the cached file
+    pymupdf = None
+
+PREVIEW_CACHE_DIR = os.getenv(
+    "PREVIEW_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "ocr-benchmark-previews"),
+)
+PREVIEW_CACHE_MAX_BYTES = int(os.getenv("PREVIEW_CACHE_MAX_MB", "512")) * 1024 * 1024
+FETCH_TIMEOUT_SECONDS = 30
+
+# Eviction trims the cache to this fraction of max_bytes, so its scan of the
+# cache directory runs once per many writes
+EVICTION_TARGET = 0.9
+
+
+class PreviewCache:
+    """Size-bounded on-disk LRU cache of fetched documents and their thumbnails.
+
+    Files are stored under a hash of their URL and recency is tracked through
+    the file mtime, so the cache survives dashboard restarts and is shared by
+    every session. Thumbnails are rendered lazily, one page at a time, and
+    cached next to the source file. The cache size is tracked as a running
+    total; the directory is only scanned once, and whenever eviction is due.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str = PREVIEW_CACHE_DIR,
+        max_bytes: int = PREVIEW_CACHE_MAX_BYTES,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Bytes in the cache, from a scan at the first write
+        self._total_bytes = None
+
+    @property
+    def supports_pdf_thumbnails(self) -> bool:
+        return pymupdf is not None
+
+    def fetch(self, url: str) -> Path:
+        """Return the local path of the document at url, downloading it on a miss"""
+        path = self._path(url, "source" + Path(url.split("?")[0]).suffix.lower())
+        if path.exists():
+            path.touch()
+            return path
+
+        response = requests.get(url, timeout=FETCH_TIMEOUT_SECONDS, stream=True)
+        response.raise_for_status()
+        self._write(path, response.iter_content(chunk_size=1024 * 1024))
+        return path
+
+    def page_count(self, url: str) -> int:
+        """Number of pages of the document at url (1 for images)"""
+        source = self.fetch(url)
+        if source.suffix != ".pdf" or pymupdf is None:
+            return 1
+        with pymupdf.open(source) as doc:
+            return doc.page_count
+
+    def thumbnail(self, url: str, page: int = 0, width: int = 700) -> Path:
+        """Return a PNG thumbnail of one page of the document, rendering it on a miss"""
+        path = self._path(url, f"page-{page}-w{width}.png")
+        if path.exists():
+            path.touch()
+            return path
+
+        source = self.fetch(url)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        if source.suffix == ".pdf":
+            if pymupdf is None:
+                raise RuntimeError("PyMuPDF is required to render PDF thumbnails")
+            with pymupdf.open(source) as doc:
+                pdf_page = doc.load_page(page)
+                zoom = width / pdf_page.rect.width
+                pixmap = pdf_page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom))
+                pixmap.save(tmp_path, output="png")
+        else:
+            with Image.open(source) as image:
+                image.thumbnail((width, width * 4))
+                image.save(tmp_path, format="PNG")
+        os.replace(tmp_path, path)
+        self._added(path)
+        return path
+
+    def _path(self, url: str, name: str) -> Path:
+        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        directory = self.cache_dir / digest[:2] / digest
+        directory.mkdir(parents=True, exist_ok=True)
+        return directory / name
+
+    def _write(self, path: Path, chunks) -> None:
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        with open(tmp_path, "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+        self._added(path)
+
+    def _scan(self):
+        """(mtime, size, path) of every cached file"""
+        files = []
+        for path in self.cache_dir.glob("*/*/*"):
+            if path.suffix == ".tmp":
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _added(self, path: Path) -> None:
+        """Count a newly written file and evict once the cache is over budget"""
+        with self._lock:
+            if self._total_bytes is None:
+                self._total_bytes = sum(size for _, size, _ in self._scan())
+            else:
+                self._total_bytes += path.stat().st_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache fits
+        EVICTION_TARGET of max_bytes. The scan also corrects the running total
+        for files other processes added or removed."""
+        files = self._scan()
+        total = sum(size for _, size, _ in files)
+        if total > self.max_bytes:
+            target = self.max_bytes * EVICTION_TARGET
+            for _, size, path in sorted(files):
+                path.unlink(missing_ok=True)
+                total -= size
+                if total <= target:
+                    break
+        self._total_bytes = total
@@ -0,0 +1,493 @@
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from utils.aggregations import (
+    MODEL_STATS_COLUMNS,
+    RunAggregates,
+    percentile_frame,
+    sketches_from_model_stats,
+)
+from utils.bootstrap import confidence_intervals, paired_difference
+from utils.instrumentation import timed
+
+# Bumped whenever the figures or tables change, so older snapshots are ignored
+REPORT_VERSION = 3
+
+# Per-result scores with bootstrap error bars and pairwise significance tests
+ACCURACY_METRICS = ["JSON Accuracy", "Text Similarity"]
+SIGNIFICANCE_LEVEL = 0.05
+
+# Sketched metrics shown in the percentile chart: label and bar text format
+PERCENTILE_METRICS = {
+    "total_latency": ("Total Latency (s)", "%{y:.2f}s"),
+    "ocr_latency": ("OCR Latency (s)", "%{y:.2f}s"),
+    "extraction_latency": ("Extraction Latency (s)", "%{y:.2f}s"),
+    "total_cost": ("Total Cost per Page", "$%{y:.4f}"),
+    "ocr_cost": ("OCR Cost per Page", "$%{y:.4f}"),
+    "extraction_cost": ("Extraction Cost per Page", "$%{y:.4f}"),
+}
+
+# Run fields shown in the Run Details panel
+RUN_DETAIL_FIELDS = [
+    "status",
+    "run_by",
+    "description",
+    "total_documents",
+    "created_at",
+    "completed_at",
+]
+
+
+def create_model_comparison_table_from_stats(model_stats_rows):
+    """Create the model comparison DataFrame from precomputed run stats"""
+    df = pd.DataFrame(model_stats_rows).set_index("model_key")[MODEL_STATS_COLUMNS]
+    df.index.name = "Model Combination"
+    return df
+
+
+def create_accuracy_comparison_charts_from_stats(model_stats_rows):
+    """Create the JSON and Text accuracy DataFrames from precomputed run stats"""
+    df = pd.DataFrame(model_stats_rows).set_index("model_key")
+    json_df = pd.DataFrame(
+        {
+            "Model": df.index,
+            "JSON Accuracy": df["chart_json_accuracy"].values,
+        }
+    ).set_index("Model")
+
+    text_df = pd.DataFrame(
+        {
+            "Model": df.index,
+            "Text Similarity": df["text_accuracy"].values,
+        }
+    ).set_index("Model")
+
+    return json_df, text_df
+
+
+def has_complete_stats(precomputed_stats) -> bool:
+    """Whether precomputed stats hold everything the report needs.
+
+    Rows summarized before sketches or the chart's JSON accuracy were stored
+    lack them until they are refreshed.
+    """
+    return bool(precomputed_stats) and all(
+        row.get("sketches") and row.get("chart_json_accuracy") is not None
+        for row in precomputed_stats
+    )
+
+
+def aggregate_completed_run(results, precomputed_stats):
+    """Model stats, accuracy frames and percentiles of a completed run.
+
+    Complete precomputed stats are used as is and results may be None; other
+    runs are aggregated from their raw results, so the charts always show the
+    same numbers for the same run.
+    """
+    if has_complete_stats(precomputed_stats):
+        model_stats = create_model_comparison_table_from_stats(precomputed_stats)
+        json_df, text_df = create_accuracy_comparison_charts_from_stats(
+            precomputed_stats
+        )
+        percentiles_df = percentile_frame(sketches_from_model_stats(precomputed_stats))
+        return model_stats, json_df, text_df, percentiles_df
+
+    with timed("aggregate", "RunAggregates.from_results") as span:
+        aggregates = RunAggregates.from_results(results)
+        span["rows"] = len(results)
+    json_df, text_df = aggregates.accuracy_frames()
+    return (
+        aggregates.model_stats_frame(),
+        json_df,
+        text_df,
+        aggregates.percentile_frame(),
+    )
+
+
+def metric_confidence_intervals(metrics_df):
+    """Bootstrap intervals of each model's mean, per accuracy metric"""
+    return {
+        metric: confidence_intervals(
+            {
+                model: group[metric].to_numpy()
+                for model, group in metrics_df.groupby("Model")
+            }
+        )
+        for metric in ACCURACY_METRICS
+    }
+
+
+def paired_differences(metrics_df, metric, baseline):
+    """Paired bootstrap test of every model against the baseline on shared documents"""
+    # dropna=False keeps models without any score of this metric (such as
+    # OCR-only ones for JSON accuracy), which are still offered as baselines
+    scores = metrics_df.pivot_table(
+        index="fileUrl",
+        columns="Model",
+        values=metric,
+        aggfunc="first",
+        dropna=False,
+    )
+    rows = []
+    for model in scores.columns:
+        if model == baseline:
+            continue
+        pairs = scores[[model, baseline]].dropna()
+        difference = paired_difference(
+            pairs[model].to_numpy(), pairs[baseline].to_numpy()
+        )
+        rows.append(
+            {
+                "Model": model,
+                "Documents": difference["n"],
+                "Difference": difference["mean"],
+                "CI Low": difference["low"],
+                "CI High": difference["high"],
+                "p-value": difference["p_value"],
+                "Significant": difference["p_value"] < SIGNIFICANCE_LEVEL,
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+def with_error_bars(df, metric, intervals):
+    """Add the distances from each bar to its confidence bounds"""
+    df = df.reset_index()
+    bounds = df["Model"].map(lambda model: intervals.get(model, {}))
+    low = bounds.map(lambda ci: ci.get("low", np.nan))
+    high = bounds.map(lambda ci: ci.get("high", np.nan))
+    df["Error Plus"] = (high - df[metric]).clip(lower=0)
+    df["Error Minus"] = (df[metric] - low).clip(lower=0)
+    return df
+
+
+class RunReport:
+    """Figures and tables of the Performance Metrics page, built from a run's aggregates.
+
+    intervals and differences default to computing the bootstrap directly; the
+    page passes cached versions of both.
+    """
+
+    def __init__(
+        self,
+        model_stats: pd.DataFrame,
+        json_df: pd.DataFrame,
+        text_df: pd.DataFrame,
+        percentiles_df: pd.DataFrame,
+        metrics_df: pd.DataFrame,
+        intervals: Optional[Dict[str, Dict[str, Any]]] = None,
+        differences: Optional[Callable[[str, str], pd.DataFrame]] = None,
+    ):
+        self.model_stats = model_stats
+        self.json_df = json_df
+        self.text_df = text_df
+        self.percentiles_df = percentiles_df
+        self.metrics_df = metrics_df
+        self.intervals = (
+            intervals
+            if intervals is not None
+            else metric_confidence_intervals(metrics_df)
+        )
+        self._differences = differences or (
+            lambda metric, baseline: paired_differences(metrics_df, metric, baseline)
+        )
+
+    @property
+    def models(self) -> List[str]:
+        """Model combinations that can serve as the significance baseline"""
+        return sorted(self.metrics_df["Model"].unique())
+
+    def paired_differences(self, metric: str, baseline: str) -> pd.DataFrame:
+        return self._differences(metric, baseline)
+
+    def figure(self, name: str) -> go.Figure:
+        return getattr(self, f"_{name}_figure")()
+
+    def _accuracy_figure(self, df, metric):
+        fig = px.bar(
+            with_error_bars(df, metric, self.intervals[metric]).sort_values(
+                metric, ascending=False
+            ),
+            x="Model",
+            y=metric,
+            error_y="Error Plus",
+            error_y_minus="Error Minus",
+            title=f"{metric} by Model",
+            height=600,
+            color_discrete_sequence=["#636EFA"],
+        )
+        fig.update_layout(showlegend=False)
+        fig.update_traces(texttemplate="%{y:.1%}", textposition="outside")
+        return fig
+
+    def _json_accuracy_figure(self):
+        return self._accuracy_figure(self.json_df, "JSON Accuracy")
+
+    def _text_similarity_figure(self):
+        return self._accuracy_figure(self.text_df, "Text Similarity")
+
+    def _cost_figure(self):
+        cost_df = pd.DataFrame(self.model_stats["total_cost"] * 1000).reset_index()
+        cost_df.columns = ["Model", "Cost per 1,000 Pages"]
+        fig = px.bar(
+            cost_df.sort_values("Cost per 1,000 Pages", ascending=True),
+            x="Model",
+            y="Cost per 1,000 Pages",
+            title="Cost per 1,000 Pages by Model Combination",
+            height=600,
+            color_discrete_sequence=["#EE553B"],
+        )
+        fig.update_layout(showlegend=False)
+        fig.update_traces(texttemplate="$%{y:.2f}", textposition="outside")
+        return fig
+
+    def _cost_breakdown_figure(self):
+        model_stats = self.model_stats
+        cost_breakdown_df = pd.DataFrame(
+            {
+                "Model": model_stats.index,
+                "OCR": model_stats["ocr_cost"] * 1000,
+                "Extraction": model_stats["extraction_cost"] * 1000,
+            }
+        )
+
+        # Calculate cost per 1k documents for sorting
+        cost_breakdown_df["Total"] = (
+            cost_breakdown_df["OCR"] + cost_breakdown_df["Extraction"]
+        )
+        fig = px.bar(
+            cost_breakdown_df.sort_values("Total", ascending=True),
+            x="Model",
+            y=["OCR", "Extraction"],
+            title="Cost per 1,000 Pages Breakdown by Model Combination (OCR + Extraction)",
+            height=600,
+            color_discrete_sequence=["#636EFA", "#EF553B"],
+        )
+        fig.update_layout(
+            barmode="stack",
+            showlegend=True,
+            legend_title="Phase",
+            yaxis=dict(
+                title="Cost per 1,000 Pages (USD)",
+                range=[
+                    0,
+                    cost_breakdown_df["Total"].max() * 1.2,
+                ],
+            ),
+        )
+        fig.update_traces(texttemplate="$%{y:.2f}", textposition="inside")
+        return fig
+
+    def _latency_figure(self):
+        model_stats = self.model_stats
+        latency_df = pd.DataFrame(
+            {
+                "Model": model_stats.index,
+                "OCR": model_stats["ocr_latency"],
+                "Extraction": model_stats["extraction_latency"],
+            }
+        )
+
+        # Calculate total latency for labels
+        latency_df["Total"] = latency_df.get("OCR", 0) + latency_df.get("Extraction", 0)
+        fig = px.bar(
+            latency_df.sort_values("Total", ascending=True),
+            x="Model",
+            y=["OCR", "Extraction"],
+            title="Latency by Model Combination (OCR + Extraction)",
+            height=600,
+            color_discrete_sequence=["#636EFA", "#EF553B"],
+        )
+        fig.update_layout(
+            barmode="stack",
+            showlegend=True,
+            legend_title="Phase",
+            yaxis=dict(
+                range=[
+                    0,
+                    latency_df["Total"].max() * 1.2,
+                ]  # Set y-axis range to 120% of max value
+            ),
+        )
+        fig.update_traces(texttemplate="%{y:.2f}s", textposition="inside")
+        return fig
+
+    def _total_latency_figure(self):
+        model_stats = self.model_stats
+        total_latency_df = pd.DataFrame(
+            {
+                "Model": model_stats.index,
+                "Total Latency": model_stats["ocr_latency"]
+                + model_stats["extraction_latency"],
+            }
+        )
+        fig = px.bar(
+            total_latency_df.sort_values("Total Latency", ascending=True),
+            x="Model",
+            y="Total Latency",
+            title="Total Latency by Model Combination",
+            height=600,
+            color_discrete_sequence=["#636EFA"],
+        )
+        fig.update_layout(showlegend=False)
+        fig.update_traces(texttemplate="%{y:.2f}s", textposition="outside")
+        return fig
+
+    def _token_usage_figure(self):
+        model_stats = self.model_stats
+        token_df = pd.DataFrame(
+            {
+                "Model": model_stats.index,
+                "Input Tokens": model_stats["ocr_input_tokens"],
+                "Output Tokens": model_stats["ocr_output_tokens"],
+                "Extraction Input Tokens": model_stats["extraction_input_tokens"],
+                "Extraction Output Tokens": model_stats["extraction_output_tokens"],
+            }
+        )
+
+        # Calculate total tokens for sorting
+        token_df["Total"] = (
+            token_df["Input Tokens"]
+            + token_df["Output Tokens"]
+            + token_df["Extraction Input Tokens"]
+            + token_df["Extraction Output Tokens"]
+        )
+
+        fig = px.bar(
+            token_df.sort_values("Total", ascending=True),
+            x="Model",
+            y=[
+                "Input Tokens",
+                "Output Tokens",
+                "Extraction Input Tokens",
+                "Extraction Output Tokens",
+            ],
+            title="Average Token Usage per Page by Model Combination",
+            height=600,
+            color_discrete_sequence=["#636EFA", "#EF553B", "#7B83FB", "#F76D57"],
+        )
+
+        fig.update_layout(
+            barmode="stack",
+            showlegend=True,
+            legend_title="Token Type",
+            yaxis=dict(
+                title="Number of Tokens",
+                range=[0, token_df["Total"].max() * 1.2],
+            ),
+        )
+        fig.update_traces(texttemplate="%{y:.0f}", textposition="inside")
+        return fig
+
+    def percentile_figure(self, metric: str) -> Optional[go.Figure]:
+        """Percentiles of one sketched metric; None when the run recorded none"""
+        metric_label, value_format = PERCENTILE_METRICS[metric]
+        percentiles_df = self.percentiles_df
+        metric_df = percentiles_df[percentiles_df["Metric"] == metric]
+        if metric_df.empty:
+            return None
+        quantile_columns = [c for c in percentiles_df.columns if c.startswith("p")]
+        fig = px.bar(
+            metric_df.sort_values(quantile_columns[0], ascending=True),
+            x="Model",
+            y=quantile_columns,
+            barmode="group",
+            title=f"{metric_label} Percentiles by Model Combination",
+            height=600,
+            color_discrete_sequence=["#636EFA", "#7B83FB", "#EF553B"],
+        )
+        fig.update_layout(legend_title="Percentile", yaxis=dict(title=metric_label))
+        fig.update_traces(texttemplate=value_format, textposition="outside")
+        return fig
+
+    def to_snapshot(self, run: Dict[str, Any]) -> Dict[str, Any]:
+        """Every figure and table of the page as JSON, for ReportSnapshot"""
+        percentiles = {}
+        for metric in PERCENTILE_METRICS:
+            figure = self.percentile_figure(metric)
+            percentiles[metric] = _figure_json(figure) if figure is not None else None
+        return {
+            "version": REPORT_VERSION,
+            "run": {field: run.get(field) for field in RUN_DETAIL_FIELDS},
+            "figures": {
+                name: _figure_json(self.figure(name)) for name in REPORT_FIGURES
+            },
+            "percentiles": percentiles,
+            "model_stats": _frame_json(self.model_stats.reset_index(), "split"),
+            "models": self.models,
+            "differences": {
+                metric: {
+                    baseline: _frame_json(
+                        self.paired_differences(metric, baseline), "records"
+                    )
+                    for baseline in self.models
+                }
+                for metric in ACCURACY_METRICS
+            },
+        }
+
+
+def _figure_json(figure: go.Figure) -> Dict[str, Any]:
+    return json.loads(figure.to_json())
+
+
+def _frame_json(df: pd.DataFrame, orient: str) -> Any:
+    # pandas' encoder turns numpy scalars and NaN into plain JSON values
+    return json.loads(df.to_json(orient=orient, index=False))
+
+
+# Figures of RunReport.figure, in page order
+REPORT_FIGURES = [
+    "json_accuracy",
+    "text_similarity",
+    "cost",
+    "cost_breakdown",
+    "latency",
+    "total_latency",
+    "token_usage",
+]
+
+
+class ReportSnapshot:
+    """A RunReport rendered ahead of time by build_reports.py.
+
+    Offers the same figures and tables as RunReport, read from the stored
+    JSON instead of recomputed from the run's results.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.run = data["run"]
+        self.models = data["models"]
+        split = data["model_stats"]
+        self.model_stats = pd.DataFrame(
+            split["data"], columns=split["columns"]
+        ).set_index(split["columns"][0])
+
+    @classmethod
+    def load(cls, data: Optional[Dict[str, Any]]) -> Optional["ReportSnapshot"]:
+        """The snapshot, or None if missing or written by another REPORT_VERSION"""
+        if not data or data.get("version") != REPORT_VERSION:
+            return None
+        return cls(data)
+
+    def paired_differences(self, metric: str, baseline: str) -> pd.DataFrame:
+        differences = pd.DataFrame(self.data["differences"][metric].get(baseline, []))
+        if differences.empty:
+            return differences
+        # Columns that were all NaN come back as None
+        return differences.astype(
+            {"Difference": float, "CI Low": float, "CI High": float, "p-value": float}
+        )
+
+    def figure(self, name: str) -> go.Figure:
+        return go.Figure(self.data["figures"][name], skip_invalid=True)
+
+    def percentile_figure(self, metric: str) -> Optional[go.Figure]:
+        figure = self.data["percentiles"].get(metric)
+        return go.Figure(figure, skip_invalid=True) if figure is not None else None
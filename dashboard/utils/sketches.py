@@ -0,0 +1,128 @@
+import math
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Optional
+
+# Quantiles are returned within 1% of the true value
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# Values at or below this (free tiers, cached calls) go to the zero bucket
+MIN_INDEXABLE_VALUE = 1e-9
+
+# Stage metrics sketched per model combination, in seconds and USD. Must match
+# the metrics written by refresh_run_model_stats in
+# prisma/sql/005_refresh_run_model_stats.sql.
+SKETCH_METRICS = [
+    "ocr_latency",
+    "extraction_latency",
+    "total_latency",
+    "ocr_cost",
+    "extraction_cost",
+    "total_cost",
+]
+
+
+class DDSketch:
+    """Mergeable quantile sketch with relative-error guarantees (DDSketch).
+
+    Values are counted in logarithmically sized buckets, so any quantile is
+    answered within relative_accuracy of the true value from a few hundred
+    counters, regardless of how many values were added. Sketches with the same
+    accuracy merge by adding bucket counts, which makes them usable across
+    batches, runs and processes. The serialized form is also produced in SQL
+    when a run completes (see prisma/sql/005_refresh_run_model_stats.sql).
+    """
+
+    def __init__(self, relative_accuracy: float = DEFAULT_RELATIVE_ACCURACY):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        # Logarithm of the exact ratio, as Postgres evaluates LN(1.01 / 0.99)
+        # in numeric, so values on a bucket boundary get the same key in SQL
+        accuracy = Decimal(repr(relative_accuracy))
+        self._log_gamma = float(((1 + accuracy) / (1 - accuracy)).ln())
+        self.bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def key(self, value: float) -> int:
+        """Bucket of a value above MIN_INDEXABLE_VALUE; the SQL that builds
+        sketches computes the same CEIL(LN(value) / LN(gamma))"""
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def add(self, value: float) -> None:
+        if value > MIN_INDEXABLE_VALUE:
+            index = self.key(value)
+            self.bins[index] = self.bins.get(index, 0) + 1
+        else:
+            self.zero_count += 1
+        self.count += 1
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def add_all(self, values: Iterable[float]) -> None:
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "DDSketch") -> None:
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("Cannot merge sketches with different accuracies")
+        for index, count in other.bins.items():
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimated value at quantile q (0 to 1), None for an empty sketch"""
+        if not 0 <= q <= 1:
+            raise ValueError("q must be between 0 and 1")
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return max(self.min, 0.0)
+        cumulative = self.zero_count
+        for index in sorted(self.bins):
+            cumulative += self.bins[index]
+            if cumulative > rank:
+                value = 2 * self.gamma**index / (self.gamma + 1)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "relativeAccuracy": self.relative_accuracy,
+            "count": self.count,
+            "zeroCount": self.zero_count,
+            "min": self.min if self.count else None,
+            "max": self.max if self.count else None,
+            "bins": {str(index): count for index, count in self.bins.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "DDSketch":
+        sketch = cls(data.get("relativeAccuracy", DEFAULT_RELATIVE_ACCURACY))
+        sketch.bins = {
+            int(index): int(count) for index, count in data.get("bins", {}).items()
+        }
+        sketch.zero_count = int(data.get("zeroCount", 0))
+        sketch.count = int(data.get("count", 0))
+        if sketch.count:
+            sketch.min = data["min"]
+            sketch.max = data["max"]
+        return sketch
+
+
+def merge_sketches(sketches: Iterable[DDSketch]) -> DDSketch:
+    """Merge sketches (e.g. of one model across runs) into a new sketch"""
+    merged = None
+    for sketch in sketches:
+        if merged is None:
+            merged = DDSketch(sketch.relative_accuracy)
+        merged.merge(sketch)
+    return merged if merged is not None else DDSketch()
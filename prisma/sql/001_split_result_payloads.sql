@@ -0,0 +1,48 @@
+-- Moves the large payload columns of benchmark_results into
+-- benchmark_result_payloads. Run once against an existing database before
+-- `npx prisma db push`, so the data is copied before the columns are dropped:
+--
+--   psql "$DATABASE_URL" -f prisma/sql/001_split_result_payloads.sql
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS benchmark_result_payloads (
+    result_id UUID NOT NULL,
+    full_json_diff JSONB,
+    json_accuracy_result JSONB,
+    json_diff JSONB,
+    json_schema JSONB NOT NULL,
+    predicted_json JSONB,
+    predicted_markdown TEXT,
+    true_json JSONB NOT NULL,
+    true_markdown TEXT NOT NULL,
+
+    CONSTRAINT benchmark_result_payloads_pkey PRIMARY KEY (result_id),
+    CONSTRAINT benchmark_result_payloads_result_id_fkey FOREIGN KEY (result_id)
+        REFERENCES benchmark_results(id) ON DELETE CASCADE ON UPDATE CASCADE
+);
+
+INSERT INTO benchmark_result_payloads (
+    result_id, full_json_diff, json_accuracy_result, json_diff, json_schema,
+    predicted_json, predicted_markdown, true_json, true_markdown
+)
+SELECT
+    id, full_json_diff, json_accuracy_result, json_diff, json_schema,
+    predicted_json, predicted_markdown, true_json, true_markdown
+FROM benchmark_results
+ON CONFLICT (result_id) DO NOTHING;
+
+ALTER TABLE benchmark_results
+    DROP COLUMN full_json_diff,
+    DROP COLUMN json_accuracy_result,
+    DROP COLUMN json_diff,
+    DROP COLUMN json_schema,
+    DROP COLUMN predicted_json,
+    DROP COLUMN predicted_markdown,
+    DROP COLUMN true_json,
+    DROP COLUMN true_markdown;
+
+COMMIT;
+
+-- Dropped columns keep their space until the table is rewritten
+VACUUM FULL benchmark_results;
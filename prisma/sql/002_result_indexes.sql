@@ -0,0 +1,31 @@
+-- Indexes for the dashboard loaders that Prisma cannot declare (INCLUDE
+-- columns, expressions and partial predicates). Safe to re-run; apply after
+-- `npx prisma db push`:
+--
+--   psql "$DATABASE_URL" -f prisma/sql/002_result_indexes.sql
+--
+-- CONCURRENTLY avoids blocking writers of a running benchmark, so this file
+-- must not be wrapped in a transaction.
+
+-- Metrics of a run straight from the index (load_results_for_run, model stats)
+CREATE INDEX CONCURRENTLY IF NOT EXISTS benchmark_results_run_metrics_idx
+    ON benchmark_results (benchmark_run_id)
+    INCLUDE (
+        ocr_model,
+        extraction_model,
+        direct_image_extraction,
+        json_accuracy,
+        levenshtein_distance
+    );
+
+-- Diff totals of a run, for range filters and sorting on the number of changes
+CREATE INDEX CONCURRENTLY IF NOT EXISTS benchmark_results_run_diff_total_idx
+    ON benchmark_results (benchmark_run_id, ((json_diff_stats->>'total')::float));
+
+-- Test case selector: ids of a run's results with differences, in keyset order.
+-- The predicate must match load_result_ids_for_run_from_db exactly.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS benchmark_results_run_with_diffs_idx
+    ON benchmark_results (benchmark_run_id, id)
+    WHERE (json_diff_stats->>'total')::float > 0;
+
+ANALYZE benchmark_results;
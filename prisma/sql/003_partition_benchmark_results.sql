@@ -0,0 +1,66 @@
+-- OPTIONAL: hash-partition benchmark_results by run once it holds hundreds of
+-- runs. Every dashboard query filters on benchmark_run_id, so each one only
+-- touches a single partition, and per-partition indexes stay small.
+--
+--   psql "$DATABASE_URL" -f prisma/sql/003_partition_benchmark_results.sql
+--
+-- Caveats:
+--   * A partitioned table's primary key must include the partition key, so the
+--     key becomes (benchmark_run_id, id). Ids stay unique (UUIDs), but the
+--     foreign key from benchmark_result_payloads can no longer reference id
+--     alone and is dropped. The schema's (benchmark_run_id, id) index is not
+--     recreated: the new primary key already covers it.
+--   * Afterwards `prisma db push` would try to restore the old key; review its
+--     plan (or use `prisma db pull`) instead of accepting it blindly.
+--   * Takes an exclusive lock while rows are copied: run it between benchmarks.
+
+BEGIN;
+
+ALTER TABLE benchmark_result_payloads
+    DROP CONSTRAINT IF EXISTS benchmark_result_payloads_result_id_fkey;
+
+ALTER TABLE benchmark_results RENAME TO benchmark_results_unpartitioned;
+ALTER TABLE benchmark_results_unpartitioned
+    RENAME CONSTRAINT benchmark_results_pkey TO benchmark_results_unpartitioned_pkey;
+
+CREATE TABLE benchmark_results (
+    LIKE benchmark_results_unpartitioned INCLUDING DEFAULTS,
+    CONSTRAINT benchmark_results_pkey PRIMARY KEY (benchmark_run_id, id),
+    CONSTRAINT benchmark_results_benchmark_run_id_fkey FOREIGN KEY (benchmark_run_id)
+        REFERENCES benchmark_runs(id) ON DELETE RESTRICT ON UPDATE CASCADE
+) PARTITION BY HASH (benchmark_run_id);
+
+DO $$
+BEGIN
+    FOR i IN 0..15 LOOP
+        EXECUTE format(
+            'CREATE TABLE benchmark_results_p%s PARTITION OF benchmark_results '
+            'FOR VALUES WITH (MODULUS 16, REMAINDER %s)',
+            i, i
+        );
+    END LOOP;
+END $$;
+
+INSERT INTO benchmark_results SELECT * FROM benchmark_results_unpartitioned;
+
+DROP TABLE benchmark_results_unpartitioned;
+
+-- Indexes created on the parent are created on every partition
+CREATE INDEX benchmark_results_run_metrics_idx
+    ON benchmark_results (benchmark_run_id)
+    INCLUDE (
+        ocr_model,
+        extraction_model,
+        direct_image_extraction,
+        json_accuracy,
+        levenshtein_distance
+    );
+CREATE INDEX benchmark_results_run_diff_total_idx
+    ON benchmark_results (benchmark_run_id, ((json_diff_stats->>'total')::float));
+CREATE INDEX benchmark_results_run_with_diffs_idx
+    ON benchmark_results (benchmark_run_id, id)
+    WHERE (json_diff_stats->>'total')::float > 0;
+
+COMMIT;
+
+ANALYZE benchmark_results;
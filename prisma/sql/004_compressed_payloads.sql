@@ -0,0 +1,32 @@
+-- Compressed payloads of benchmark_result_payloads (see
+-- tensorlake/payload_codec.py). Safe to re-run; apply after
+-- `npx prisma db push`, or on its own:
+--
+--   psql "$DATABASE_URL" -f prisma/sql/004_compressed_payloads.sql
+--
+-- Existing rows are compressed afterwards with
+--
+--   python tensorlake/payload_codec.py compress-db payloads.zdict
+
+BEGIN;
+
+ALTER TABLE benchmark_result_payloads
+    ADD COLUMN IF NOT EXISTS compressed BYTEA,
+    ALTER COLUMN json_schema DROP NOT NULL,
+    ALTER COLUMN true_json DROP NOT NULL,
+    ALTER COLUMN true_markdown DROP NOT NULL;
+
+-- Frames are already compressed; TOAST would only spend time failing to
+-- compress them again
+ALTER TABLE benchmark_result_payloads
+    ALTER COLUMN compressed SET STORAGE EXTERNAL;
+
+CREATE TABLE IF NOT EXISTS payload_dictionaries (
+    id BIGINT NOT NULL,
+    dictionary BYTEA NOT NULL,
+    created_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT payload_dictionaries_pkey PRIMARY KEY (id)
+);
+
+COMMIT;
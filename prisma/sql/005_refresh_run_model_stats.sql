@@ -0,0 +1,162 @@
+-- refresh_run_model_stats(run_id) recomputes the per-model-combination
+-- aggregates of a run into benchmark_run_model_stats. Both writers call it when
+-- a run completes (completeBenchmarkRun in src/utils/db.ts and the Python
+-- runner's tensorlake/db_sink.py), so every run gets the same stats. Safe to
+-- re-run; apply after `npx prisma db push` and again whenever it changes:
+--
+--   psql "$DATABASE_URL" -f prisma/sql/005_refresh_run_model_stats.sql
+--
+-- The averages follow the Performance Metrics page: errored results are
+-- skipped, costs/latencies/OCR tokens are averaged over all remaining results
+-- and extraction metrics over results that ran extraction. chart_json_accuracy
+-- is the JSON accuracy of the page's accuracy chart, which averages every
+-- remaining result and counts a missing score as 0. Latency and cost
+-- percentiles are stored as mergeable sketches alongside.
+
+CREATE OR REPLACE FUNCTION refresh_run_model_stats(target_run_id UUID)
+RETURNS void
+LANGUAGE sql
+AS $$
+    DELETE FROM benchmark_run_model_stats WHERE benchmark_run_id = target_run_id;
+
+    WITH scored AS (
+        SELECT
+            bres.benchmark_run_id,
+            CASE
+                WHEN bres.direct_image_extraction
+                    THEN COALESCE(bres.extraction_model, '') || ' (IMG2JSON)'
+                ELSE bres.ocr_model || ' → ' || COALESCE(bres.extraction_model, '')
+            END AS model_key,
+            bres.ocr_model,
+            bres.extraction_model,
+            bres.direct_image_extraction,
+            COALESCE(bres.error, '') <> '' AS has_error,
+            COALESCE(bres.usage->'extraction', '{}'::jsonb)
+                NOT IN ('{}'::jsonb, 'null'::jsonb) AS has_extraction,
+            COALESCE(bres.levenshtein_distance, 0) AS text_accuracy,
+            COALESCE(bres.json_accuracy, 0) AS json_accuracy,
+            COALESCE((bres.usage->>'totalCost')::float, 0) AS total_cost,
+            COALESCE((bres.usage->'ocr'->>'totalCost')::float, 0) AS ocr_cost,
+            COALESCE((bres.usage->'ocr'->>'duration')::float, 0) / 1000 AS ocr_latency,
+            COALESCE((bres.usage->'ocr'->>'inputTokens')::float, 0) AS ocr_input_tokens,
+            COALESCE((bres.usage->'ocr'->>'outputTokens')::float, 0) AS ocr_output_tokens,
+            COALESCE((bres.usage->'extraction'->>'totalCost')::float, 0) AS extraction_cost,
+            COALESCE((bres.usage->'extraction'->>'duration')::float, 0) / 1000
+                AS extraction_latency,
+            COALESCE((bres.usage->'extraction'->>'inputTokens')::float, 0)
+                AS extraction_input_tokens,
+            COALESCE((bres.usage->'extraction'->>'outputTokens')::float, 0)
+                AS extraction_output_tokens
+        FROM benchmark_runs br
+        INNER JOIN benchmark_results bres ON br.id = bres.benchmark_run_id
+        WHERE br.id = target_run_id
+    )
+    INSERT INTO benchmark_run_model_stats (
+        id, benchmark_run_id, model_key, ocr_model, extraction_model,
+        direct_image_extraction, count, error_count, extraction_count,
+        json_accuracy, text_accuracy, total_cost, ocr_cost, extraction_cost,
+        ocr_latency, extraction_latency, ocr_input_tokens, ocr_output_tokens,
+        extraction_input_tokens, extraction_output_tokens, chart_json_accuracy,
+        updated_at
+    )
+    SELECT
+        gen_random_uuid(),
+        benchmark_run_id,
+        model_key,
+        MIN(ocr_model),
+        MIN(extraction_model),
+        BOOL_OR(direct_image_extraction),
+        COUNT(*) FILTER (WHERE NOT has_error),
+        COUNT(*) FILTER (WHERE has_error),
+        COUNT(*) FILTER (WHERE NOT has_error AND has_extraction),
+        COALESCE(AVG(json_accuracy) FILTER (WHERE NOT has_error AND has_extraction), 0),
+        COALESCE(AVG(text_accuracy) FILTER (WHERE NOT has_error), 0),
+        COALESCE(AVG(total_cost) FILTER (WHERE NOT has_error), 0),
+        COALESCE(AVG(ocr_cost) FILTER (WHERE NOT has_error), 0),
+        COALESCE(AVG(extraction_cost) FILTER (WHERE NOT has_error AND has_extraction), 0),
+        COALESCE(AVG(ocr_latency) FILTER (WHERE NOT has_error), 0),
+        COALESCE(AVG(extraction_latency) FILTER (WHERE NOT has_error AND has_extraction), 0),
+        COALESCE(AVG(ocr_input_tokens) FILTER (WHERE NOT has_error), 0),
+        COALESCE(AVG(ocr_output_tokens) FILTER (WHERE NOT has_error), 0),
+        COALESCE(AVG(extraction_input_tokens) FILTER (WHERE NOT has_error AND has_extraction), 0),
+        COALESCE(AVG(extraction_output_tokens) FILTER (WHERE NOT has_error AND has_extraction), 0),
+        COALESCE(AVG(json_accuracy) FILTER (WHERE NOT has_error), 0),
+        NOW()
+    FROM scored
+    GROUP BY benchmark_run_id, model_key;
+
+    -- DDSketch (1% relative accuracy) of each latency/cost metric, in the
+    -- format read by dashboard/utils/sketches.py
+    WITH scored AS (
+        SELECT
+            CASE
+                WHEN bres.direct_image_extraction
+                    THEN COALESCE(bres.extraction_model, '') || ' (IMG2JSON)'
+                ELSE bres.ocr_model || ' → ' || COALESCE(bres.extraction_model, '')
+            END AS model_key,
+            COALESCE(bres.usage->'extraction', '{}'::jsonb)
+                NOT IN ('{}'::jsonb, 'null'::jsonb) AS has_extraction,
+            COALESCE((bres.usage->'ocr'->>'duration')::float, 0) / 1000 AS ocr_latency,
+            COALESCE((bres.usage->'extraction'->>'duration')::float, 0) / 1000
+                AS extraction_latency,
+            COALESCE((bres.usage->>'duration')::float, 0) / 1000 AS total_latency,
+            COALESCE((bres.usage->'ocr'->>'totalCost')::float, 0) AS ocr_cost,
+            COALESCE((bres.usage->'extraction'->>'totalCost')::float, 0) AS extraction_cost,
+            COALESCE((bres.usage->>'totalCost')::float, 0) AS total_cost
+        FROM benchmark_runs br
+        INNER JOIN benchmark_results bres ON br.id = bres.benchmark_run_id
+        WHERE br.id = target_run_id AND COALESCE(bres.error, '') = ''
+    ),
+    metric_values AS (
+        SELECT s.model_key, v.metric, v.value
+        FROM scored s
+        CROSS JOIN LATERAL (
+            VALUES
+                ('ocr_latency', s.ocr_latency, true),
+                ('extraction_latency', s.extraction_latency, s.has_extraction),
+                ('total_latency', s.total_latency, true),
+                ('ocr_cost', s.ocr_cost, true),
+                ('extraction_cost', s.extraction_cost, s.has_extraction),
+                ('total_cost', s.total_cost, true)
+        ) AS v(metric, value, applies)
+        WHERE v.applies
+    ),
+    bins AS (
+        SELECT
+            model_key,
+            metric,
+            CASE WHEN value > 1e-9 THEN CEIL(LN(value) / LN(1.01 / 0.99))::int END AS bin,
+            COUNT(*) AS n,
+            MIN(value) AS min_value,
+            MAX(value) AS max_value
+        FROM metric_values
+        GROUP BY 1, 2, 3
+    ),
+    sketches AS (
+        SELECT
+            model_key,
+            metric,
+            jsonb_build_object(
+                'relativeAccuracy', 0.01,
+                'count', SUM(n),
+                'zeroCount', COALESCE(SUM(n) FILTER (WHERE bin IS NULL), 0),
+                'min', MIN(min_value),
+                'max', MAX(max_value),
+                'bins', COALESCE(
+                    jsonb_object_agg(bin, n) FILTER (WHERE bin IS NOT NULL), '{}'::jsonb
+                )
+            ) AS sketch
+        FROM bins
+        GROUP BY model_key, metric
+    )
+    UPDATE benchmark_run_model_stats ms
+    SET sketches = per_model.sketches
+    FROM benchmark_runs br, (
+        SELECT model_key, jsonb_object_agg(metric, sketch) AS sketches
+        FROM sketches
+        GROUP BY model_key
+    ) per_model
+    WHERE br.id = target_run_id
+        AND ms.benchmark_run_id = br.id
+        AND ms.model_key = per_model.model_key;
+$$;
@@ -0,0 +1,26 @@
+import dotenv from 'dotenv';
+
+import { backfillRunModelStats, disconnect } from './utils';
+
+dotenv.config();
+
+// Usage: npm run backfill-stats [-- <timestamp> ...]
+// Recomputes benchmark_run_model_stats for every finished run, or only for the
+// given run timestamps (YYYY-MM-DD-HH-mm-ss).
+const main = async () => {
+  if (!process.env.DATABASE_URL) {
+    console.error('DATABASE_URL is required to backfill model stats');
+    process.exit(1);
+  }
+
+  const timestamps = process.argv.slice(2);
+  const count = await backfillRunModelStats(timestamps);
+  console.log(`Backfilled model stats for ${count} run(s)`);
+};
+
+main()
+  .catch((error) => {
+    console.error('Error backfilling model stats:', error);
+    process.exitCode = 1;
+  })
+  .finally(disconnect);
@@ -277,12 +277,14 @@ const runBenchmark = async () => {
   // Stop all progress bars
   multibar.stop();
 
+  // Results are on disk before the post-run database steps, so a failure
+  // there cannot lose them
+  writeToFile(path.join(resultFolder, 'results.json'), results);
+
   // Complete benchmark run successfully
   if (benchmarkRun) {
     await completeBenchmarkRun(benchmarkRun.id);
   }
-
-  writeToFile(path.join(resultFolder, 'results.json'), results);
 };
 
 runBenchmark();
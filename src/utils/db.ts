@@ -26,26 +26,31 @@ export async function saveResult(runId: string, result: Result) {
       metadata: result.metadata as any,
       ocrModel: result.ocrModel,
       extractionModel: result.extractionModel || '',
-      jsonSchema: result.jsonSchema as any,
       directImageExtraction: result.directImageExtraction || false,
-      trueMarkdown: result.trueMarkdown,
-      trueJson: result.trueJson,
-      predictedMarkdown: result.predictedMarkdown,
-      predictedJson: result.predictedJson,
       levenshteinDistance: result.levenshteinDistance,
       jsonAccuracy: result.jsonAccuracy,
-      jsonDiff: result.jsonDiff,
-      fullJsonDiff: result.fullJsonDiff,
       jsonDiffStats: result.jsonDiffStats,
-      jsonAccuracyResult: result.jsonAccuracyResult as any,
       usage: result.usage as any,
       error: JSON.stringify(result.error),
+      // Large fields live in a side table so metric queries stay narrow
+      payload: {
+        create: {
+          jsonSchema: result.jsonSchema as any,
+          trueMarkdown: result.trueMarkdown,
+          trueJson: result.trueJson,
+          predictedMarkdown: result.predictedMarkdown,
+          predictedJson: result.predictedJson,
+          jsonDiff: result.jsonDiff,
+          fullJsonDiff: result.fullJsonDiff,
+          jsonAccuracyResult: result.jsonAccuracyResult as any,
+        },
+      },
     },
   });
 }
 
 export async function completeBenchmarkRun(runId: string, error?: string) {
-  return prisma.benchmarkRun.update({
+  const run = await prisma.benchmarkRun.update({
     where: { id: runId },
     data: {
       status: error ? 'failed' : 'completed',
@@ -53,6 +58,43 @@ export async function completeBenchmarkRun(runId: string, error?: string) {
       error,
     },
   });
+  try {
+    await refreshRunModelStats(runId);
+  } catch (error) {
+    // The run's results are saved; its stats can be rebuilt later
+    console.error(
+      `Error refreshing model stats of run ${runId}, run npm run backfill-stats:`,
+      error,
+    );
+  }
+  return run;
+}
+
+// Recompute the per-model-combination aggregates of a run into
+// benchmark_run_model_stats. The query lives in the refresh_run_model_stats
+// SQL function (prisma/sql/005_refresh_run_model_stats.sql), which the Python
+// runner calls too, so both writers produce the same stats.
+export async function refreshRunModelStats(runId: string) {
+  return prisma.$executeRaw`SELECT refresh_run_model_stats(${runId}::uuid)`;
+}
+
+// Fill benchmark_run_model_stats for runs that finished before the table
+// existed. Pass timestamps to limit the backfill to specific runs.
+export async function backfillRunModelStats(timestamps?: string[]) {
+  const runs = await prisma.benchmarkRun.findMany({
+    where: {
+      status: { not: 'running' },
+      ...(timestamps?.length ? { timestamp: { in: timestamps } } : {}),
+    },
+    select: { id: true, timestamp: true },
+    orderBy: { createdAt: 'asc' },
+  });
+
+  for (const run of runs) {
+    await refreshRunModelStats(run.id);
+    console.log(`Refreshed model stats for run ${run.timestamp}`);
+  }
+  return runs.length;
 }
 
 // Clean up function
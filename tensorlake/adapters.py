@@ -0,0 +1,142 @@
+"""Provider adapters for the benchmark engine (engine.py)"""
+
+import json
+import heapq
+import random
+import asyncio
+import itertools
+from typing import Any, Optional
+
+from engine import QUEUED, Document, JobFailed, Prediction, ProviderAdapter
+
+
+class TensorLakeAdapter(ProviderAdapter):
+    """TensorLake Document AI: upload, then one parse job per page range.
+
+    The SDK is blocking, so its calls run in the engine's thread pool.
+    """
+
+    name = "tensorlake"
+    supports_page_ranges = True
+    poll_interval = 5.0
+
+    def __init__(self, api_key: str):
+        from tensorlake.documentai import DocumentAI
+
+        self.doc_ai = DocumentAI(api_key=api_key)
+
+    async def upload(self, document: Document) -> str:
+        return await asyncio.to_thread(self.doc_ai.upload, path=document.path)
+
+    async def submit(
+        self, reference: str, document: Document, page_range: Optional[str]
+    ) -> str:
+        from tensorlake.documentai.parse import (
+            ChunkingStrategy,
+            ExtractionOptions,
+            ParsingOptions,
+        )
+
+        options = ParsingOptions(
+            extraction_options=ExtractionOptions(schema=document.schema),
+            structured_extraction_skip_ocr=True,
+            chunking_strategy=ChunkingStrategy.PAGE,
+            page_range=page_range,
+            # table_parsing_strategy=TableParsingStrategy.TSR,
+        )
+        return await asyncio.to_thread(self.doc_ai.parse, reference, options=options)
+
+    async def poll(self, job_id: str) -> Optional[Prediction]:
+        result = await asyncio.to_thread(self.doc_ai.get_job, job_id=job_id)
+        if result.status in ["processing", "pending"]:
+            print(f"Waiting for job {job_id} to complete...")
+            return QUEUED if result.status == "pending" else None
+        if result.status != "successful":
+            raise JobFailed(f"Job failed with status: {result.status}")
+        outputs = result.outputs
+        return Prediction(
+            pages=[page.data for page in outputs.structured_data.pages],
+            chunks=[chunk.content for chunk in outputs.chunks or []],
+        )
+
+
+class FakeAdapter(ProviderAdapter):
+    """In-process provider for dry runs and for measuring the engine itself.
+
+    Jobs take about latency seconds (log-normal), fail with failure_rate, and
+    requests fail transiently with transient_error_rate (the engine retries
+    uploads and polls; a failed submit fails the document).
+    With capacity, at most that many jobs run at once and the rest wait in a
+    queue; with max_outstanding, submits beyond that many unfinished jobs are
+    rejected with a 429. Predictions are the ground truth of the document, so
+    a dry run also exercises scoring and the database sink end to end.
+    """
+
+    name = "fake"
+    supports_page_ranges = True
+
+    def __init__(
+        self,
+        latency: float = 0.5,
+        failure_rate: float = 0.0,
+        transient_error_rate: float = 0.0,
+        poll_interval: float = 0.05,
+        capacity: Optional[int] = None,
+        max_outstanding: Optional[int] = None,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.transient_error_rate = transient_error_rate
+        self.poll_interval = poll_interval
+        self.max_outstanding = max_outstanding
+        # When each worker of the simulated service is next free
+        self.workers = [0.0] * capacity if capacity else None
+        self.rng = random.Random(seed)
+        self.job_ids = itertools.count(1)
+        self.jobs = {}
+
+    def _request(self) -> None:
+        if self.rng.random() < self.transient_error_rate:
+            raise ConnectionError("Simulated transient error")
+
+    async def upload(self, document: Document) -> str:
+        await asyncio.sleep(self.latency / 10)
+        self._request()
+        return document.id
+
+    async def submit(
+        self, reference: Any, document: Document, page_range: Optional[str]
+    ) -> str:
+        self._request()
+        if self.max_outstanding is not None and len(self.jobs) >= self.max_outstanding:
+            raise ConnectionError("429 Too Many Requests")
+        job_id = f"fake-{next(self.job_ids)}"
+        duration = self.rng.lognormvariate(0, 0.5) * self.latency
+        failed = self.rng.random() < self.failure_rate
+        start = now = asyncio.get_running_loop().time()
+        if self.workers is not None:
+            start = max(now, heapq.heappop(self.workers))
+            heapq.heappush(self.workers, start + duration)
+        self.jobs[job_id] = (start, start + duration, failed, document, page_range)
+        return job_id
+
+    async def poll(self, job_id: str) -> Optional[Prediction]:
+        self._request()
+        start, ready_at, failed, document, page_range = self.jobs[job_id]
+        now = asyncio.get_running_loop().time()
+        if now < start:
+            return QUEUED
+        if now < ready_at:
+            return None
+        del self.jobs[job_id]
+        if failed:
+            raise JobFailed("Job failed with status: failure")
+        # The ground truth covers the whole document; later ranges add nothing
+        if page_range is not None and not page_range.startswith("1-"):
+            return Prediction(pages=[], chunks=[])
+        truth = document.item.get("true_json_output")
+        return Prediction(
+            pages=[json.loads(truth) if isinstance(truth, str) else truth],
+            chunks=[document.item.get("true_markdown_output")],
+        )
@@ -0,0 +1,111 @@
+"""Concurrency limits of the benchmark engine, adjusted while a run goes on.
+
+AdaptiveLimit is a semaphore whose size follows additive increase /
+multiplicative decrease (AIMD), as TCP congestion control does:
+
+- every request that completes without congestion adds increase / limit, so
+  the limit grows by about `increase` per round of requests;
+- a congested request multiplies the limit by `decrease`, at most once per
+  round, since the requests already in flight were sent at the old limit.
+
+A request counts as congested when it failed (429s, timeouts and other
+retried errors), when its smoothed latency is more than latency_tolerance
+times the latency seen at low load plus latency_slack seconds (so jitter of
+very fast requests does not count), or when its job waited in the
+provider's queue for longer than max_queue_time seconds. The limit then settles around
+the highest concurrency the provider sustains.
+"""
+
+import asyncio
+from typing import Optional
+
+
+class AdaptiveLimit:
+    def __init__(
+        self,
+        name: str,
+        initial: int,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        adaptive: bool = True,
+        increase: float = 1.0,
+        decrease: float = 0.7,
+        latency_tolerance: float = 2.0,
+        latency_slack: float = 0.05,
+        max_queue_time: float = 30.0,
+    ):
+        self.name = name
+        self.initial = initial
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum if maximum is not None else initial
+        self.adaptive = adaptive
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_tolerance = latency_tolerance
+        self.latency_slack = latency_slack
+        self.max_queue_time = max_queue_time
+        self.in_flight = 0
+        self.peak = self.limit
+        self.decreases = 0
+        self._condition = asyncio.Condition()
+        # Smoothed request latency, and its value at the lowest load seen
+        self._latency = None
+        self._baseline = None
+        self._since_decrease = 0
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc_info):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify(max(int(self.limit) - self.in_flight, 0))
+
+    def _congested(self, latency, queue_time, error) -> bool:
+        if error:
+            return True
+        if queue_time is not None and queue_time > self.max_queue_time:
+            return True
+        if latency is None:
+            return False
+        self._latency = (
+            latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        )
+        if self._baseline is None or self._latency < self._baseline:
+            self._baseline = self._latency
+        else:
+            # Follow slow drifts, such as larger documents later in the run
+            self._baseline += 0.01 * (self._latency - self._baseline)
+        return (
+            self._latency > self.latency_tolerance * self._baseline + self.latency_slack
+        )
+
+    def record(
+        self,
+        latency: Optional[float] = None,
+        queue_time: Optional[float] = None,
+        error: bool = False,
+    ) -> None:
+        """Account for one completed request (latency in seconds)"""
+        if not self.adaptive:
+            return
+        self._since_decrease += 1
+        if self._congested(latency, queue_time, error):
+            if self._since_decrease >= self.limit:
+                self.limit = max(self.minimum, self.limit * self.decrease)
+                self._since_decrease = 0
+                self.decreases += 1
+        else:
+            self.limit = min(self.maximum, self.limit + self.increase / self.limit)
+            self.peak = max(self.peak, self.limit)
+
+    def summary(self) -> str:
+        if not self.adaptive:
+            return f"{self.name} concurrency: fixed at {self.initial}"
+        return (
+            f"{self.name} concurrency: ended at {int(self.limit)} (started at "
+            f"{self.initial}, peak {int(self.peak)}, {self.decreases} decreases)"
+        )
@@ -0,0 +1,255 @@
+import io
+import json
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+import psycopg2
+
+RESULT_COLUMNS = [
+    "id",
+    "benchmark_run_id",
+    "file_url",
+    "ocr_model",
+    "extraction_model",
+    "direct_image_extraction",
+    "levenshtein_distance",
+    "json_accuracy",
+    "json_diff_stats",
+    "metadata",
+    "usage",
+    "error",
+]
+
+PAYLOAD_COLUMNS = [
+    "result_id",
+    "json_schema",
+    "true_markdown",
+    "predicted_markdown",
+    "true_json",
+    "predicted_json",
+    "json_diff",
+    "full_json_diff",
+    "json_accuracy_result",
+]
+
+JSON_COLUMNS = {
+    "json_diff_stats",
+    "metadata",
+    "usage",
+    "json_schema",
+    "true_json",
+    "predicted_json",
+    "json_diff",
+    "full_json_diff",
+    "json_accuracy_result",
+}
+
+# Text columns that hold JSON, like error, which the TypeScript writer stores
+# with JSON.stringify
+JSON_TEXT_COLUMNS = {"error"}
+
+# Written instead of PAYLOAD_COLUMNS when the sink has a payload codec; the
+# plain payload columns of those rows stay NULL
+COMPRESSED_PAYLOAD_COLUMNS = ["result_id", "compressed"]
+
+
+def _copy_value(column, value):
+    """Encode one value for COPY ... FROM STDIN in text format"""
+    if value is None:
+        return "\\N"
+    if column in JSON_COLUMNS or column in JSON_TEXT_COLUMNS:
+        # Values are Python objects; a str is a JSON string, not serialized JSON
+        value = json.dumps(value)
+    elif isinstance(value, bytes):
+        value = "\\x" + value.hex()
+    elif isinstance(value, bool):
+        value = "t" if value else "f"
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _connect(database_url):
+    # Timestamp columns have no time zone and hold UTC, as Prisma writes them;
+    # aware datetimes are converted to the session time zone on insert
+    return psycopg2.connect(database_url, options="-c timezone=UTC")
+
+
+def _copy_rows(cursor, table, columns, rows):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(
+            "\t".join(_copy_value(column, row.get(column)) for column in columns)
+        )
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT text)", buffer
+    )
+
+
+class PostgresResultSink:
+    """Streams benchmark results into the tables the dashboard reads.
+
+    `start` creates the benchmark_runs row, `add` queues one result (a dict
+    keyed by RESULT_COLUMNS and PAYLOAD_COLUMNS, with JSON columns and error as
+    Python values, not serialized JSON) and a background thread writes
+    queued results in batches with COPY. `close` flushes what is left, marks the
+    run completed or failed and refreshes its model stats. After a write error
+    the sink drops further results instead of failing the benchmark, and the
+    run is marked failed with that error.
+
+    With a codec (payload_codec.PayloadCodec), the payload of each result is
+    written as one zstd frame in benchmark_result_payloads.compressed and the
+    codec's dictionary is registered in payload_dictionaries.
+    """
+
+    def __init__(self, database_url, batch_size=500, flush_interval=2.0, codec=None):
+        self.database_url = database_url
+        self.codec = codec
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.run_id = None
+        self.written = 0
+        self._queue = queue.Queue()
+        self._worker = None
+        self._error = None
+
+    def start(
+        self, timestamp, models_config, total_documents, run_by=None, description=None
+    ):
+        self.run_id = str(uuid.uuid4())
+        with _connect(self.database_url) as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO benchmark_runs (
+                    id, timestamp, status, run_by, description, models_config,
+                    total_documents, created_at
+                )
+                VALUES (%s, %s, 'running', %s, %s, %s, %s, %s)
+                """,
+                (
+                    self.run_id,
+                    timestamp,
+                    run_by,
+                    description,
+                    json.dumps({"models": models_config}),
+                    total_documents,
+                    datetime.now(timezone.utc),
+                ),
+            )
+            if self.codec is not None:
+                from payload_codec import register_dictionary
+
+                register_dictionary(cursor, self.codec)
+        conn.close()
+
+        self._worker = threading.Thread(target=self._run, name="db-sink", daemon=True)
+        self._worker.start()
+        return self.run_id
+
+    def add(self, result):
+        # The writer reported its error once; the run goes on without the
+        # database and close() marks it failed
+        if self._error is not None:
+            return
+        self._queue.put(result)
+
+    def close(self, error=None):
+        """Flush remaining results and mark the run completed (or failed)"""
+        self._queue.put(None)
+        self._worker.join()
+        error = error or (str(self._error) if self._error else None)
+
+        with _connect(self.database_url) as conn, conn.cursor() as cursor:
+            cursor.execute(
+                """
+                UPDATE benchmark_runs
+                SET status = %s, completed_at = %s, error = %s
+                WHERE id = %s
+                """,
+                (
+                    "failed" if error else "completed",
+                    datetime.now(timezone.utc),
+                    error,
+                    self.run_id,
+                ),
+            )
+            # Same aggregate as refreshRunModelStats in src/utils/db.ts, so
+            # runs written by this runner show up like any other run
+            cursor.execute("SELECT refresh_run_model_stats(%s)", (self.run_id,))
+        conn.close()
+
+    def _run(self):
+        conn = None
+        batch = []
+        done = False
+        last_flush = time.monotonic()
+        try:
+            conn = _connect(self.database_url)
+            while not done:
+                timeout = max(0.0, last_flush + self.flush_interval - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                    if item is None:
+                        done = True
+                    else:
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+
+                # Flush full batches right away and partial ones every interval
+                if batch and (
+                    done
+                    or len(batch) >= self.batch_size
+                    or time.monotonic() - last_flush >= self.flush_interval
+                ):
+                    self._write_batch(conn, batch)
+                    batch = []
+                if not batch:
+                    last_flush = time.monotonic()
+        except Exception as e:
+            self._error = e
+            print(f"Error writing results to database: {str(e)}")
+            print("Results are no longer written to the database for this run")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _write_batch(self, conn, batch):
+        results = []
+        payloads = []
+        for item in batch:
+            result_id = str(uuid.uuid4())
+            result = {column: item.get(column) for column in RESULT_COLUMNS}
+            result.update({"id": result_id, "benchmark_run_id": self.run_id})
+            payload = {column: item.get(column) for column in PAYLOAD_COLUMNS}
+            payload["result_id"] = result_id
+            if self.codec is not None:
+                payload = {
+                    "result_id": result_id,
+                    "compressed": self.codec.compress(
+                        {column: payload[column] for column in PAYLOAD_COLUMNS[1:]}
+                    ),
+                }
+            results.append(result)
+            payloads.append(payload)
+
+        with conn.cursor() as cursor:
+            _copy_rows(cursor, "benchmark_results", RESULT_COLUMNS, results)
+            _copy_rows(
+                cursor,
+                "benchmark_result_payloads",
+                COMPRESSED_PAYLOAD_COLUMNS if self.codec else PAYLOAD_COLUMNS,
+                payloads,
+            )
+        conn.commit()
+        self.written += len(batch)
+        print(f"Wrote {self.written} results to database")
@@ -0,0 +1,458 @@
+"""Provider-agnostic async engine for document parsing benchmarks.
+
+The engine owns what is the same for every provider: bounded concurrency of
+uploads and parse jobs, page-range splitting of long documents, retries with
+backoff, polling, a result cache and the output files. Providers plug in
+through ProviderAdapter, either as upload / submit / poll for job-based APIs
+or as upload / call for APIs that answer in the same request:
+
+    engine = BenchmarkEngine(FakeAdapter(), parse_concurrency=16)
+    results = await engine.run(documents, on_result=record)
+    engine.write_outputs(results, documents)
+"""
+
+import os
+import json
+import time
+import random
+import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from concurrency import AdaptiveLimit
+from page_split import merge_markdown, merge_structured_data, page_count, page_ranges
+
+# Returned by ProviderAdapter.poll while a job waits in the provider's queue
+QUEUED = "queued"
+
+
+class JobFailed(Exception):
+    """The provider could not process the document; not retried"""
+
+
+@dataclass
+class Document:
+    id: str
+    path: str
+    # JSON schema of the structured data to extract, as sent to providers
+    schema: Optional[str]
+    # The document's line of metadata.jsonl (ground truth and anything else)
+    item: Dict[str, Any]
+
+
+@dataclass
+class Prediction:
+    # Structured data and markdown of each page (or chunk), in order
+    pages: List[Any]
+    chunks: List[Optional[str]]
+
+
+class ProviderAdapter:
+    """How the engine talks to one provider.
+
+    Job-based providers implement upload, submit and poll; providers that
+    answer in the same request set synchronous and implement call instead.
+    The methods are coroutines; blocking SDKs can wrap their calls in
+    asyncio.to_thread. Failed uploads and polls are retried (except on
+    JobFailed); submit and call start paid work at the provider, so they are
+    not retried and their failure fails the document.
+    """
+
+    name = "provider"
+    synchronous = False
+    supports_page_ranges = False
+    # Seconds between two polls of a running job
+    poll_interval = 5.0
+
+    async def upload(self, document: Document) -> Any:
+        """Make the document available to the provider; returns a reference"""
+        return document.path
+
+    async def submit(
+        self, reference: Any, document: Document, page_range: Optional[str]
+    ) -> str:
+        """Start a parse job; returns its id"""
+        raise NotImplementedError
+
+    async def poll(self, job_id: str) -> Optional[Prediction]:
+        """Prediction of a finished job, None while it runs, QUEUED while it
+        has not started (when the provider tells)"""
+        raise NotImplementedError
+
+    async def call(
+        self, reference: Any, document: Document, page_range: Optional[str]
+    ) -> Prediction:
+        """Parse in a single request (synchronous providers)"""
+        raise NotImplementedError
+
+
+class JsonlResultCache:
+    """Successful results of earlier runs, one JSON line each.
+
+    Documents found here are not sent to the provider again, so an
+    interrupted run picks up where it stopped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry["key"]] = entry["result"]
+
+    def get(self, key: str) -> Optional[dict]:
+        return self.entries.get(key)
+
+    def put(self, key: str, result: dict) -> None:
+        self.entries[key] = result
+        with open(self.path, "a") as f:
+            f.write(json.dumps({"key": key, "result": result}) + "\n")
+
+
+class BenchmarkEngine:
+    """Runs documents through a provider with bounded concurrency.
+
+    At most upload_concurrency uploads and parse_concurrency parse jobs (or
+    calls) are in flight at once. With adaptive, both limits start there and
+    follow request latency, errors and queue time up to max_upload_concurrency
+    and max_parse_concurrency (see concurrency.py). Long documents are split into page ranges
+    of pages_per_job pages when the adapter supports them. Failed uploads and
+    polls are retried max_retries times with exponential backoff from
+    retry_delay seconds.
+    """
+
+    def __init__(
+        self,
+        adapter: ProviderAdapter,
+        upload_concurrency: int = 8,
+        parse_concurrency: int = 32,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        pages_per_job: int = 0,
+        min_split_pages: int = 0,
+        cache: Optional[JsonlResultCache] = None,
+        adaptive: bool = False,
+        max_upload_concurrency: Optional[int] = None,
+        max_parse_concurrency: Optional[int] = None,
+        max_queue_time: float = 30.0,
+    ):
+        self.adapter = adapter
+        self.upload_concurrency = upload_concurrency
+        self.parse_concurrency = parse_concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.pages_per_job = pages_per_job
+        self.min_split_pages = min_split_pages
+        self.cache = cache
+        self.adaptive = adaptive
+        self.max_upload_concurrency = max_upload_concurrency or upload_concurrency
+        self.max_parse_concurrency = max_parse_concurrency or parse_concurrency
+        self.max_queue_time = max_queue_time
+        self.errors: List[dict] = []
+        # Results of the documents done so far, in completion order
+        self.completed: List[dict] = []
+
+    def _cache_key(self, document: Document) -> str:
+        schema = hashlib.sha1((document.schema or "").encode()).hexdigest()[:12]
+        return f"{self.adapter.name}:{document.id}:{schema}:{self.pages_per_job}"
+
+    async def _retry(
+        self,
+        what: str,
+        limit: AdaptiveLimit,
+        fn: Callable[..., Awaitable],
+        *args,
+        timed: bool = True,
+        retries: Optional[int] = None,
+    ):
+        """Call fn, retrying failures (max_retries unless given); every attempt
+        is reported to limit"""
+        retries = self.max_retries if retries is None else retries
+        for attempt in range(retries + 1):
+            start = time.perf_counter()
+            try:
+                value = await fn(*args)
+            except JobFailed:
+                raise
+            except Exception as e:
+                limit.record(error=True)
+                if attempt == retries:
+                    raise
+                delay = self.retry_delay * 2**attempt * (0.5 + random.random())
+                print(f"Retrying {what} in {delay:.1f}s after: {str(e)}")
+                await asyncio.sleep(delay)
+            else:
+                if timed:
+                    limit.record(latency=time.perf_counter() - start)
+                return value
+
+    async def _parse_range(
+        self, reference: Any, document: Document, page_range: Optional[str]
+    ):
+        """(job id, prediction) of one page range, holding a parse slot"""
+        async with self._parse_slots:
+            if self.adapter.synchronous:
+                prediction = await self._retry(
+                    f"call for {document.id}",
+                    self._parse_slots,
+                    self.adapter.call,
+                    reference,
+                    document,
+                    page_range,
+                    retries=0,
+                )
+                return None, prediction
+
+            job_id = await self._retry(
+                f"submit of {document.id}",
+                self._parse_slots,
+                self.adapter.submit,
+                reference,
+                document,
+                page_range,
+                retries=0,
+            )
+            submitted = time.perf_counter()
+            queued = False
+            while True:
+                # Poll latency says little about load; their errors do
+                prediction = await self._retry(
+                    f"poll of job {job_id}",
+                    self._parse_slots,
+                    self.adapter.poll,
+                    job_id,
+                    timed=False,
+                )
+                if prediction == QUEUED:
+                    queued = True
+                elif queued:
+                    self._parse_slots.record(queue_time=time.perf_counter() - submitted)
+                    queued = False
+                if prediction is not None and prediction != QUEUED:
+                    print(f"Job {job_id} completed successfully")
+                    return job_id, prediction
+                await asyncio.sleep(self.adapter.poll_interval)
+
+    def _result(self, document: Document, **fields) -> dict:
+        result = {
+            "img_id": document.id,
+            "result": None,
+            "job_id": None,
+            "error": None,
+            "schema": document.schema,
+            "md_text": None,
+        }
+        result.update(fields)
+        if result["error"]:
+            self.errors.append(
+                {
+                    "file": document.id,
+                    "error": result["error"],
+                    "job_id": result["job_id"],
+                }
+            )
+        return result
+
+    async def process(self, document: Document) -> dict:
+        """Result of one document, in the runner's output format"""
+        if self.cache is not None:
+            cached = self.cache.get(self._cache_key(document))
+            if cached is not None:
+                return cached
+
+        print("\nProcessing file:", document.id)
+        try:
+            async with self._upload_slots:
+                reference = await self._retry(
+                    f"upload of {document.id}",
+                    self._upload_slots,
+                    self.adapter.upload,
+                    document,
+                )
+        except Exception as e:
+            print(f"Error uploading {document.id}: {str(e)}")
+            return self._result(document, error=f"Upload failed: {str(e)}")
+
+        ranges = [None]
+        if self.adapter.supports_page_ranges and self.pages_per_job > 0:
+            # Opening the PDF blocks; keep it off the event loop
+            pages = await asyncio.to_thread(page_count, document.path)
+            ranges = page_ranges(pages, self.pages_per_job, self.min_split_pages)
+            if len(ranges) > 1:
+                print(
+                    f"Parsing {document.id} as {len(ranges)} jobs of pages {', '.join(ranges)}"
+                )
+
+        # The document takes as long as its slowest range
+        parsed = await asyncio.gather(
+            *(self._parse_range(reference, document, r) for r in ranges),
+            return_exceptions=True,
+        )
+        failures = [p for p in parsed if isinstance(p, BaseException)]
+        job_ids = [p[0] for p in parsed if not isinstance(p, BaseException) and p[0]]
+        job_id = ",".join(job_ids) or None
+        if failures:
+            print(f"Error parsing {document.id}: {str(failures[0])}")
+            return self._result(
+                document, job_id=job_id, error=f"Parse failed: {str(failures[0])}"
+            )
+
+        predictions = [prediction for _, prediction in parsed]
+        if len(predictions) == 1:
+            # A single job keeps the runner's original selection: the data of
+            # the first page and the first chunk
+            prediction = predictions[0]
+            out_data = prediction.pages[0] if prediction.pages else None
+            first_chunk = prediction.chunks[0] if prediction.chunks else None
+            md_text = first_chunk.strip() if first_chunk is not None else None
+        else:
+            out_data = merge_structured_data(
+                page for prediction in predictions for page in prediction.pages
+            )
+            md_text = merge_markdown(
+                chunk for prediction in predictions for chunk in prediction.chunks
+            )
+        if not out_data:
+            print("No prediction data for:", document.id)
+            return self._result(
+                document, job_id=job_id, md_text=md_text, error="No prediction data"
+            )
+
+        print("Added prediction for:", document.id)
+        result = self._result(document, result=out_data, job_id=job_id, md_text=md_text)
+        if self.cache is not None:
+            self.cache.put(self._cache_key(document), result)
+        return result
+
+    async def run(
+        self,
+        documents: List[Document],
+        on_result: Optional[Callable[[Document, dict], Awaitable[None]]] = None,
+    ) -> List[dict]:
+        """Results of all documents, in order. on_result is awaited with each
+        result as soon as its document is done; result["duration_ms"] holds the
+        time the document took. Exceptions raised by on_result are printed and
+        do not stop the run."""
+        self._upload_slots = AdaptiveLimit(
+            "Upload",
+            self.upload_concurrency,
+            maximum=self.max_upload_concurrency,
+            adaptive=self.adaptive,
+            max_queue_time=self.max_queue_time,
+        )
+        self._parse_slots = AdaptiveLimit(
+            "Parse",
+            self.parse_concurrency,
+            maximum=self.max_parse_concurrency,
+            adaptive=self.adaptive,
+            max_queue_time=self.max_queue_time,
+        )
+        # Threads for adapters wrapping blocking SDKs, one per possible request
+        asyncio.get_running_loop().set_default_executor(
+            ThreadPoolExecutor(self._upload_slots.maximum + self._parse_slots.maximum)
+        )
+
+        async def run_one(document: Document) -> dict:
+            start = time.time()
+            result = await self.process(document)
+            result["duration_ms"] = (time.time() - start) * 1000
+            self.completed.append(result)
+            if on_result is not None:
+                # A failing callback loses that document's side effects, not the run
+                try:
+                    await on_result(document, result)
+                except Exception as e:
+                    print(f"Error handling result of {document.id}: {str(e)}")
+            return result
+
+        results = await asyncio.gather(*(run_one(document) for document in documents))
+        print(self._upload_slots.summary())
+        print(self._parse_slots.summary())
+        return results
+
+    def write_outputs(
+        self,
+        results: List[dict],
+        documents: List[Document],
+        prefix: Optional[str] = None,
+        codec: Optional[Any] = None,
+    ) -> None:
+        """Predictions CSV, metadata JSONL with the predictions (and scores, if
+        any) added, and the error log, named after the provider.
+
+        With a codec (payload_codec.PayloadCodec) the CSV is zstd-compressed
+        and the JSONL is written as .jsonl.zst, one frame per line, with the
+        codec's dictionary saved next to it as .zdict."""
+        prefix = prefix or self.adapter.name
+        by_id = {result["img_id"]: result for result in results}
+        print("\nFinal data collection:")
+        print("Number of files processed:", len(by_id))
+
+        try:
+            preds_df = pd.DataFrame(
+                [
+                    {
+                        "file_id": file_id,
+                        "prediction": result["result"],
+                        "job_id": result["job_id"],
+                        "error": result["error"],
+                        "schema": result["schema"],
+                        "md_text": result["md_text"],
+                    }
+                    for file_id, result in by_id.items()
+                ]
+            )
+            if codec is not None:
+                preds_df.to_csv(
+                    f"{prefix}_predictions.csv.zst", index=False, compression="zstd"
+                )
+            else:
+                preds_df.to_csv(f"{prefix}_predictions.csv", index=False)
+            print(f"\nSuccessfully saved predictions for {len(by_id)} files to CSV")
+        except Exception as e:
+            print(f"Error saving predictions to CSV: {str(e)}")
+
+        def items():
+            for document in documents:
+                item = document.item
+                result = by_id.get(document.id)
+                if result is not None:
+                    item["predictedJson"] = result["result"]
+                    item["predictedMarkdown"] = result["md_text"]
+                    item["job_id"] = result["job_id"]
+                    item["error"] = result["error"]
+                    item.update(result.get("scores") or {})
+                yield item
+
+        try:
+            path = f"{prefix}_metadata_with_predictions.jsonl"
+            if codec is not None:
+                codec.write_jsonl(f"{path}.zst", items())
+                if codec.dictionary:
+                    with open(f"{prefix}_metadata_with_predictions.zdict", "wb") as f:
+                        f.write(codec.dictionary)
+            else:
+                with open(path, "w") as f:
+                    for item in items():
+                        f.write(json.dumps(item) + "\n")
+            print(
+                f"\nSuccessfully saved updated metadata for {len(documents)} items to jsonl"
+            )
+        except Exception as e:
+            print(f"Error saving updated metadata to jsonl: {str(e)}")
+
+        if self.errors:
+            try:
+                pd.DataFrame(self.errors).to_csv(
+                    f"{prefix}_processing_errors.csv", index=False
+                )
+                print(f"Saved error log with {len(self.errors)} errors")
+            except Exception as e:
+                print(f"Error saving error log: {str(e)}")
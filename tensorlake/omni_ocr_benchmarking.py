@@ -1,21 +1,15 @@
 import json
 import time
-import json
 import asyncio
 import os
 import re
-from typing import List, Union, Dict
-from pydantic import BaseModel, Field, Json
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 
-from tensorlake.documentai import DocumentAI
-from tensorlake.documentai.parse import (
-    ExtractionOptions,
-    ParsingOptions,
-    ChunkingStrategy,
-    TableParsingStrategy,
-)
+from scoring import score_document, metrics_report
+from text_similarity import DEFAULT_CHUNK_SIZE, MODES
+from engine import BenchmarkEngine, Document, JsonlResultCache
+from adapters import FakeAdapter, TensorLakeAdapter
 
 
 # Function to process JSON schema title
@@ -52,167 +46,234 @@ def process_json_schema(schema_str):
 # you will need to get your own API key from tensorlake at https://www.tensorlake.ai/
 API_KEY = "tl_XXXX"
 
-doc_ai = DocumentAI(api_key=API_KEY)
+# "tensorlake", or "fake" for a dry run of the whole pipeline against an
+# in-process provider that returns the ground truth
+PROVIDER = os.getenv("PROVIDER", "tensorlake")
+
+# Requests in flight at once, and retries of failed requests
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", "8"))
+PARSE_CONCURRENCY = int(os.getenv("PARSE_CONCURRENCY", "32"))
+MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
+
+# Optional: adjust both limits during the run (AIMD on request latency, errors
+# and time spent in the provider's queue), starting from the values above
+ADAPTIVE_CONCURRENCY = os.getenv("ADAPTIVE_CONCURRENCY", "").lower() in ("1", "true", "yes")
+MAX_UPLOAD_CONCURRENCY = int(os.getenv("MAX_UPLOAD_CONCURRENCY", "64"))
+MAX_PARSE_CONCURRENCY = int(os.getenv("MAX_PARSE_CONCURRENCY", "256"))
+MAX_QUEUE_SECONDS = float(os.getenv("MAX_QUEUE_SECONDS", "30"))
+
+# Optional: JSONL file of completed documents that are not parsed again
+RESULT_CACHE = os.getenv("RESULT_CACHE")
 
 image_path = '/home/ubuntu/Shanshan/dataset/benchmarking/omniocr/test'
 
-# Use a dictionary to maintain file_id to prediction mapping
-results: Dict[str, dict] = {}
-errors = []  # Track any errors that occur
+# Optional: also stream results into the benchmark_runs / benchmark_results
+# tables read by the dashboard (same DATABASE_URL as the TypeScript benchmark)
+DATABASE_URL = os.getenv("DATABASE_URL")
 
-async def process_single_file(data: dict) -> dict:
-    job_id = None  # Initialize job_id at the start
-    schema = process_json_schema(data['json_schema'])  # Process schema at the start
-    try:
-        img_id = data['file_name']
-        
-        print('\nProcessing file:', img_id)
-        
-        img_path = os.path.join(image_path, img_id)
-        
-        # upload image
-        try:
-            file_id = doc_ai.upload(path=img_path)
-        except Exception as e:
-            print(f"Error uploading {img_id}: {str(e)}")
-            errors.append({"file": img_id, "error": f"Upload failed: {str(e)}", "job_id": None})
-            return {"img_id": img_id, "result": None, "job_id": None, "error": f"Upload failed: {str(e)}", "schema": schema, "md_text": None}
-        
-        # parse image
+# Optional: score each document (JSON accuracy and diff stats, text similarity)
+# in a process pool as soon as it completes, instead of a second pass with
+# compute_metrics.ts
+SCORE_RESULTS = os.getenv("SCORE_RESULTS", "").lower() in ("1", "true", "yes")
+SCORING_WORKERS = int(os.getenv("SCORING_WORKERS", os.cpu_count() or 1))
+
+# Text similarity of long documents: "approximate" scores markdown in aligned
+# chunks of TEXT_SIMILARITY_CHUNK_SIZE characters, never above the exact value;
+# with TEXT_SIMILARITY_MAX_ERROR, documents whose error bound is wider than
+# that are scored exactly instead
+TEXT_SIMILARITY_OPTIONS = {
+    "mode": os.getenv("TEXT_SIMILARITY_MODE", "exact"),
+    "max_error": float(os.getenv("TEXT_SIMILARITY_MAX_ERROR")) if os.getenv("TEXT_SIMILARITY_MAX_ERROR") else None,
+    "chunk_size": int(os.getenv("TEXT_SIMILARITY_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)),
+}
+if TEXT_SIMILARITY_OPTIONS["mode"] not in MODES:
+    raise ValueError(f"TEXT_SIMILARITY_MODE must be one of {MODES}")
+
+# Optional: parse PDFs of more than SPLIT_MIN_PAGES pages as concurrent jobs of
+# SPLIT_PAGES_PER_JOB pages each (0 parses every document as a single job)
+SPLIT_PAGES_PER_JOB = int(os.getenv("SPLIT_PAGES_PER_JOB", "0"))
+SPLIT_MIN_PAGES = int(os.getenv("SPLIT_MIN_PAGES", "0"))
+
+# Optional: zstd-compress the payloads (markdown, JSON, diffs) of the outputs
+# and of the database rows, with the dictionary in PAYLOAD_DICTIONARY (trained
+# with `python payload_codec.py train`) if set
+COMPRESS_PAYLOADS = os.getenv("COMPRESS_PAYLOADS", "").lower() in ("1", "true", "yes")
+PAYLOAD_DICTIONARY = os.getenv("PAYLOAD_DICTIONARY")
+
+MODELS_CONFIG = [{"ocr": PROVIDER, "extraction": PROVIDER, "directImageExtraction": True}]
+
+def load_json_field(value, default):
+    """Metadata fields may hold JSON either as strings or already parsed"""
+    if value is None:
+        return default
+    if isinstance(value, str):
         try:
-            job_id = doc_ai.parse(
-                file_id,
-                options=ParsingOptions(
-                    extraction_options=ExtractionOptions(schema=schema),
-                    structured_extraction_skip_ocr=True,
-                    chunking_strategy=ChunkingStrategy.PAGE,
-                    # table_parsing_strategy=TableParsingStrategy.TSR,
-                ),
-            )
-        except Exception as e:
-            print(f"Error parsing {img_id}: {str(e)}")
-            errors.append({"file": img_id, "error": f"Parse failed: {str(e)}", "job_id": job_id})
-            return {"img_id": img_id, "result": None, "job_id": job_id, "error": f"Parse failed: {str(e)}", "schema": schema, "md_text": None}
-        
-        # wait for job to complete
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return default
+    return value
+
+
+def to_db_record(data: dict, result: dict, duration_ms: float) -> dict:
+    """Map one processed file to the columns written by PostgresResultSink"""
+    model = MODELS_CONFIG[0]
+    scores = result.get("scores") or {}
+    return {
+        "file_url": data['file_name'],
+        "ocr_model": model["ocr"],
+        "extraction_model": model["extraction"],
+        "direct_image_extraction": model["directImageExtraction"],
+        "metadata": load_json_field(data.get('metadata'), {}),
+        "usage": {"duration": duration_ms, "extraction": {"duration": duration_ms}},
+        "error": result["error"],
+        "json_schema": load_json_field(result["schema"], {}),
+        "true_markdown": data.get('true_markdown_output') or "",
+        "true_json": load_json_field(data.get('true_json_output'), {}),
+        "predicted_markdown": result["md_text"],
+        "predicted_json": result["result"],
+        "levenshtein_distance": scores.get("levenshteinDistance"),
+        "json_accuracy": scores.get("jsonAccuracy"),
+        "json_diff_stats": scores.get("jsonDiffStats"),
+        "json_diff": scores.get("jsonDiff"),
+        "full_json_diff": scores.get("fullJsonDiff"),
+        "json_accuracy_result": scores.get("jsonAccuracyResult"),
+    }
+
+
+async def score_result(data: dict, result: dict, scoring_pool) -> None:
+    """Score a completed file in the process pool; skipped without predictions"""
+    result["scores"] = None
+    if not result["result"] and not result["md_text"]:
+        return
+    try:
+        result["scores"] = await asyncio.get_running_loop().run_in_executor(
+            scoring_pool,
+            score_document,
+            load_json_field(data.get('true_json_output'), None),
+            result["result"],
+            data.get('true_markdown_output'),
+            result["md_text"],
+            TEXT_SIMILARITY_OPTIONS,
+        )
+    except Exception as e:
+        print(f"Error scoring {result['img_id']}: {str(e)}")
+        result["scores"] = {}
+
+
+async def record_result(document: Document, result: dict, sink, scoring_pool=None) -> None:
+    """Score a completed file and write it to the database, while the run goes on.
+    Errors are printed and only affect this file."""
+    if scoring_pool:
+        await score_result(document.item, result, scoring_pool)
+    if sink:
         try:
-            while True:
-                result = doc_ai.get_job(job_id=job_id)
-                if result.status in ["processing", "pending"]:
-                    print(f"Waiting for job {job_id} to complete...")
-                    await asyncio.sleep(5)
-                else:
-                    if result.status == "successful":
-                        print(f"Job {job_id} completed successfully")
-                        break
-                    else:
-                        error_msg = f"Job failed with status: {result.status}"
-                        errors.append({"file": img_id, "error": error_msg, "job_id": job_id})
-                        raise Exception(error_msg)
+            sink.add(to_db_record(document.item, result, result["duration_ms"]))
         except Exception as e:
-            print(f"Error waiting for job completion for {img_id}: {str(e)}")
-            errors.append({"file": img_id, "error": f"Job completion failed: {str(e)}", "job_id": job_id})
-            return {"img_id": img_id, "result": None, "job_id": job_id, "error": str(e), "schema": schema, "md_text": None}
-        
-        out_data = result.outputs.structured_data.pages[0].data
-        md_text = result.outputs.chunks[0].content.strip() if result.outputs.chunks else None
-        
-        if out_data:
-            print('Added prediction for:', img_id)
-            return {"img_id": img_id, "result": out_data, "job_id": job_id, "error": None, "schema": schema, "md_text": md_text}
-        else:
-            print('No prediction data for:', img_id)
-            errors.append({"file": img_id, "error": "No prediction data", "job_id": job_id})
-            return {"img_id": img_id, "result": None, "job_id": job_id, "error": "No prediction data", "schema": schema, "md_text": md_text}
-            
-    except Exception as e:
-        error_msg = str(e)
-        print(f"Error processing {img_id if 'img_id' in locals() else 'unknown file'}: {error_msg}")
-        errors.append({"file": img_id if 'img_id' in locals() else 'unknown', "error": error_msg, "job_id": job_id})
-        return {"img_id": img_id if 'img_id' in locals() else 'unknown', "result": None, "job_id": job_id, "error": error_msg, "schema": schema, "md_text": None}
+            print(f"Error recording {document.id} in the database: {str(e)}")
+
 
 async def main():
     print("Starting processing...")
     labels = '/home/ubuntu/Shanshan/dataset/benchmarking/omniocr/test/metadata.jsonl'
     
     # Read items from jsonl file
-    items_to_process = []
-    original_metadata = []
+    documents = []
     with open(labels, 'r') as f:
         for line in f:
             data = json.loads(line)
-            original_metadata.append(data)
-            items_to_process.append(data)
+            documents.append(Document(
+                id=data['file_name'],
+                path=os.path.join(image_path, data['file_name']),
+                schema=process_json_schema(data['json_schema']),
+                item=data,
+            ))
             # # Break after collecting 10 items for quick testing
-            # if len(items_to_process) >= 2:
+            # if len(documents) >= 2:
             #     break
     
-    print(f"Processing {len(items_to_process)} items from metadata.jsonl")
-    
-    # Process files in parallel
-    tasks = [process_single_file(item) for item in items_to_process]
-    processed_results = await asyncio.gather(*tasks)
-    
-    # Collect results
-    for result in processed_results:
-        img_id = result["img_id"]
-        results[img_id] = {
-            "prediction": result["result"],
-            "job_id": result["job_id"],
-            "error": result["error"],
-            "schema": result["schema"],
-            "md_text": result["md_text"]
-        }
-
-    print("\nFinal data collection:")
-    print("Number of files processed:", len(results))
-    
-    # Save predictions to CSV
-    try:
-        # Create DataFrame from the results dictionary
-        preds_df = pd.DataFrame([
-            {
-                'file_id': file_id,
-                'prediction': data['prediction'],
-                'job_id': data['job_id'],
-                'error': data['error'],
-                'schema': data['schema'],
-                'md_text': data['md_text']
-            }
-            for file_id, data in results.items()
-        ])
-        print("\nDataFrame before saving:")
-        print(preds_df)
+    print(f"Processing {len(documents)} items from metadata.jsonl")
+
+    adapter = FakeAdapter() if PROVIDER == "fake" else TensorLakeAdapter(API_KEY)
+    engine = BenchmarkEngine(
+        adapter,
+        upload_concurrency=UPLOAD_CONCURRENCY,
+        parse_concurrency=PARSE_CONCURRENCY,
+        max_retries=MAX_RETRIES,
+        pages_per_job=SPLIT_PAGES_PER_JOB,
+        min_split_pages=SPLIT_MIN_PAGES,
+        cache=JsonlResultCache(RESULT_CACHE) if RESULT_CACHE else None,
+        adaptive=ADAPTIVE_CONCURRENCY,
+        max_upload_concurrency=MAX_UPLOAD_CONCURRENCY,
+        max_parse_concurrency=MAX_PARSE_CONCURRENCY,
+        max_queue_time=MAX_QUEUE_SECONDS,
+    )
+
+    # Created before the sink's writer thread starts; forkserver workers do not
+    # inherit the state of running threads
+    scoring_pool = None
+    if SCORE_RESULTS:
+        scoring_pool = ProcessPoolExecutor(
+            SCORING_WORKERS, mp_context=multiprocessing.get_context("forkserver")
+        )
+        print(f"Scoring results with {SCORING_WORKERS} worker processes")
+
+    codec = None
+    if COMPRESS_PAYLOADS:
+        # Imported here so zstandard is only needed with COMPRESS_PAYLOADS
+        from payload_codec import PayloadCodec
+
+        codec = PayloadCodec.from_file(PAYLOAD_DICTIONARY) if PAYLOAD_DICTIONARY else PayloadCodec()
+        print(f"Compressing payloads (dictionary {codec.dict_id or 'none'})")
+
+    sink = None
+    if DATABASE_URL:
+        # Imported here so psycopg2 is only needed with DATABASE_URL
+        from db_sink import PostgresResultSink
+
+        sink = PostgresResultSink(DATABASE_URL, codec=codec)
+        timestamp = time.strftime("%Y-%m-%d-%H-%M-%S")
+        sink.start(timestamp, MODELS_CONFIG, len(documents))
+        print(f"Streaming results to database as run {timestamp}")
     
-        preds_df.to_csv('tensorlake_predictions.csv', index=False)
-        print(f"\nSuccessfully saved predictions for {len(results)} files to CSV")
-    except Exception as e:
-        print(f"Error saving predictions to CSV: {str(e)}")
+    # Process files in parallel, writing each result to the database as it completes
+    async def record(document, result):
+        await record_result(document, result, sink, scoring_pool)
 
-    # Save updated metadata as jsonl
+    processed_results = None
     try:
-        with open('tensorlake_metadata_with_predictions.jsonl', 'w') as f:
-            for item in original_metadata:
-                file_id = item['file_name']
-                if file_id in results:
-                    # Add prediction fields to the original item
-                    item['predictedJson'] = results[file_id]['prediction']
-                    item['predictedMarkdown'] = results[file_id]['md_text']
-                    item['job_id'] = results[file_id]['job_id']
-                    item['error'] = results[file_id]['error']
-                f.write(json.dumps(item) + '\n')
-        print(f"\nSuccessfully saved updated metadata for {len(original_metadata)} items to jsonl")
+        processed_results = await engine.run(documents, on_result=record)
     except Exception as e:
-        print(f"Error saving updated metadata to jsonl: {str(e)}")
+        if sink:
+            sink.close(error=str(e))
+        raise
+    finally:
+        if scoring_pool:
+            scoring_pool.shutdown()
+        # Predictions CSV, metadata JSONL with predictions and scores, error log;
+        # written for the files that finished even when the run fails
+        engine.write_outputs(
+            processed_results if processed_results is not None else engine.completed,
+            documents,
+            codec=codec,
+        )
+    if sink:
+        sink.close()
+        print(f"Saved {sink.written} results to database")
 
-    # Save error log
-    if errors:
+    # Save metrics in the format written by compute_metrics.ts
+    if scoring_pool:
         try:
-            error_df = pd.DataFrame(errors)
-            error_df.to_csv('tensorlake_processing_errors.csv', index=False)
-            print(f"Saved error log with {len(errors)} errors")
+            report = metrics_report(
+                [(result['img_id'], result['scores']) for result in processed_results]
+            )
+            with open(f'{adapter.name}_metrics.json', 'w') as f:
+                json.dump(report, f, indent=2)
+            summary = report["summary"]
+            print(f"\nAverage JSON Accuracy: {summary['averageJsonAccuracy']:.4f} ({summary['validJsonFiles']} valid files)")
+            print(f"Average Text Similarity: {summary['averageTextSimilarity']:.4f} ({summary['validTextFiles']} valid files)")
+            print(f"Saved metrics to {adapter.name}_metrics.json")
         except Exception as e:
-            print(f"Error saving error log: {str(e)}")
+            print(f"Error saving metrics: {str(e)}")
 
 if __name__ == "__main__":
     asyncio.run(main())
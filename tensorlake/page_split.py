@@ -0,0 +1,71 @@
+"""Splitting of multi-page documents into page ranges parsed as separate jobs.
+
+A long PDF parsed as one job sets the tail latency of a run. With
+pages_per_job set, page_ranges cuts it into ranges such as "1-4", "5-8" that
+are parsed concurrently, and the per-page outputs of all jobs are merged back
+into one prediction with merge_structured_data and merge_markdown.
+"""
+
+from typing import Any, Iterable, List, Optional
+
+try:
+    import pymupdf
+except ImportError:  # Without it every document is parsed as a single job
+    pymupdf = None
+
+
+def page_count(path: str) -> int:
+    """Pages of a PDF; images and unreadable files count as one page"""
+    if pymupdf is None or not path.lower().endswith(".pdf"):
+        return 1
+    try:
+        with pymupdf.open(path) as doc:
+            return doc.page_count
+    except Exception:
+        return 1
+
+
+def page_ranges(pages: int, pages_per_job: int, min_pages: int) -> List[Optional[str]]:
+    """Page ranges ("1-4") of one document; [None] parses it as a single job"""
+    if pages_per_job <= 0 or pages <= max(min_pages, pages_per_job):
+        return [None]
+    return [
+        f"{start}-{min(start + pages_per_job - 1, pages)}"
+        for start in range(1, pages + 1, pages_per_job)
+    ]
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def merge_structured_data(pages: Iterable[Any]) -> Any:
+    """Merge the structured data extracted from each page, in page order.
+
+    Objects are merged key by key, arrays (line items, table rows spanning
+    pages) are concatenated, and for other values the first non-empty one
+    wins.
+    """
+    merged = None
+    for data in pages:
+        if _is_empty(data):
+            continue
+        if merged is None:
+            merged = data
+        elif isinstance(merged, dict) and isinstance(data, dict):
+            merged = dict(merged)
+            for key, value in data.items():
+                merged[key] = (
+                    value
+                    if key not in merged
+                    else merge_structured_data([merged[key], value])
+                )
+        elif isinstance(merged, list) and isinstance(data, list):
+            merged = merged + data
+    return merged
+
+
+def merge_markdown(chunks: Iterable[Optional[str]]) -> Optional[str]:
+    """Page chunks joined in page order; None when there is no text at all"""
+    parts = [chunk.strip() for chunk in chunks if chunk and chunk.strip()]
+    return "\n\n".join(parts) if parts else None
@@ -0,0 +1,347 @@
+"""Zstandard compression of result payloads with a dictionary trained on the corpus.
+
+The markdown, ground truth, predictions and diffs of one result are
+compressed together into one zstd frame, so any result can be read on its
+own. Frames of a few kilobytes compress poorly by themselves; a dictionary
+trained on earlier payloads gives each of them the vocabulary the corpus
+shares (markdown tables, the keys of the JSON schemas, diff structure). The
+frame header records the id of the dictionary it was written with, and the
+dictionary is stored next to the frames (in payload_dictionaries, in the
+Parquet sidecar, or as a .zdict file beside the runner's outputs).
+
+    # Train a dictionary on earlier runs and report the compression ratio
+    python tensorlake/payload_codec.py train payloads.zdict results/*/results.json tensorlake_metadata_with_predictions.jsonl
+
+    # Compress the plain payload rows already in benchmark_result_payloads,
+    # or only those of one run (npm run compress-payloads runs this after a
+    # TypeScript benchmark)
+    python tensorlake/payload_codec.py compress-db payloads.zdict
+    python tensorlake/payload_codec.py compress-db payloads.zdict --run-id <id>
+"""
+
+import os
+import json
+import random
+import argparse
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+import zstandard
+
+# zstd's default dictionary size; larger ones gain little on our payloads
+DICTIONARY_SIZE = 112_640
+COMPRESSION_LEVEL = 9
+
+# Training reads at most this many samples of at most this many bytes in total
+MAX_TRAINING_SAMPLES = 5000
+MAX_TRAINING_BYTES = 32 * 1024 * 1024
+
+# Payload fields of a result in the TypeScript results.json, the runner's
+# JSONL, and benchmark_result_payloads
+RESULT_PAYLOAD_FIELDS = [
+    "jsonSchema",
+    "trueMarkdown",
+    "predictedMarkdown",
+    "trueJson",
+    "predictedJson",
+    "jsonDiff",
+    "fullJsonDiff",
+    "jsonAccuracyResult",
+]
+JSONL_PAYLOAD_FIELDS = [
+    "json_schema",
+    "true_markdown_output",
+    "true_json_output",
+    "predictedMarkdown",
+    "predictedJson",
+    "jsonDiff",
+    "fullJsonDiff",
+    "jsonAccuracyResult",
+]
+DB_PAYLOAD_COLUMNS = [
+    "json_schema",
+    "true_markdown",
+    "predicted_markdown",
+    "true_json",
+    "predicted_json",
+    "json_diff",
+    "full_json_diff",
+    "json_accuracy_result",
+]
+
+
+def train_dictionary(samples: Sequence[bytes], size: int = DICTIONARY_SIZE) -> bytes:
+    """Dictionary for frames like the samples; raises zstandard.ZstdError on too few"""
+    return zstandard.train_dictionary(size, list(samples)).as_bytes()
+
+
+def training_samples(payloads: Iterable[Any], seed: int = 0) -> List[bytes]:
+    """Encoded payloads to train on, an even random subset of at most the limits"""
+    samples = [encode(payload) for payload in payloads]
+    random.Random(seed).shuffle(samples)
+    selected, total = [], 0
+    for sample in samples[:MAX_TRAINING_SAMPLES]:
+        if total + len(sample) > MAX_TRAINING_BYTES:
+            break
+        selected.append(sample)
+        total += len(sample)
+    return selected
+
+
+def frame_dictionary_id(frame: bytes) -> int:
+    """Id of the dictionary a frame needs; 0 when it was written without one"""
+    return zstandard.get_frame_parameters(frame).dict_id
+
+
+def encode(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+class PayloadCodec:
+    """Compresses JSON-serializable payloads into frames and back.
+
+    Without a dictionary frames are plain zstd. Instances can be shared
+    between threads; each thread gets its own (de)compression context.
+    """
+
+    def __init__(
+        self, dictionary: Optional[bytes] = None, level: int = COMPRESSION_LEVEL
+    ):
+        self.dictionary = dictionary
+        self.level = level
+        self._dict_data = (
+            zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        )
+        self.dict_id = self._dict_data.dict_id() if self._dict_data else 0
+        self._local = threading.local()
+
+    @classmethod
+    def from_file(cls, path: str) -> "PayloadCodec":
+        with open(path, "rb") as f:
+            return cls(f.read())
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        if not hasattr(self._local, "compressor"):
+            self._local.compressor = zstandard.ZstdCompressor(
+                level=self.level, dict_data=self._dict_data
+            )
+        return self._local.compressor
+
+    def _decompressor(self) -> zstandard.ZstdDecompressor:
+        if not hasattr(self._local, "decompressor"):
+            self._local.decompressor = zstandard.ZstdDecompressor(
+                dict_data=self._dict_data
+            )
+        return self._local.decompressor
+
+    def compress(self, payload: Any) -> bytes:
+        return self._compressor().compress(encode(payload))
+
+    def decompress(self, frame: bytes) -> Any:
+        dict_id = frame_dictionary_id(frame)
+        if dict_id not in (0, self.dict_id):
+            raise ValueError(
+                f"Payload needs dictionary {dict_id}, this codec has {self.dict_id}"
+            )
+        return json.loads(self._decompressor().decompress(frame))
+
+    def write_jsonl(self, path: str, records: Iterable[Dict[str, Any]]) -> None:
+        """JSONL with each line compressed as its own frame.
+
+        The file is a valid multi-frame zstd stream, so `zstd -d -D <dictionary>`
+        turns it back into plain JSONL for tools such as compute_metrics.ts.
+        """
+        with open(path, "wb") as f:
+            for record in records:
+                f.write(self._compressor().compress(encode(record) + b"\n"))
+
+    def read_jsonl(self, path: str) -> Iterator[Dict[str, Any]]:
+        with open(path, "rb") as f:
+            reader = self._decompressor().stream_reader(f, read_across_frames=True)
+            for line in _lines(reader):
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _lines(reader) -> Iterator[bytes]:
+    """Lines of a binary stream that has read() but no readline()"""
+    pending = b""
+    while True:
+        chunk = reader.read(1 << 20)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def dictionary_path(path: Path) -> Path:
+    """The .zdict the runner writes next to a .jsonl.zst"""
+    return path.with_name(path.name[: -len(".jsonl.zst")] + ".zdict")
+
+
+def read_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """Records of a runner JSONL file, plain or compressed (.jsonl.zst)"""
+    if path.name.endswith(".jsonl.zst"):
+        dictionary = dictionary_path(path)
+        codec = (
+            PayloadCodec.from_file(dictionary)
+            if dictionary.exists()
+            else PayloadCodec()
+        )
+        yield from codec.read_jsonl(path)
+        return
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_records(path: Path) -> Iterator[Dict[str, Any]]:
+    """Results of a results.json, or records of a runner JSONL file"""
+    if path.name.endswith((".jsonl", ".jsonl.zst")):
+        yield from read_jsonl(path)
+    else:
+        with open(path) as f:
+            yield from json.load(f)
+
+
+def record_payload(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The payload fields of a results.json result or a runner JSONL record"""
+    fields = (
+        JSONL_PAYLOAD_FIELDS
+        if "true_markdown_output" in record
+        else RESULT_PAYLOAD_FIELDS
+    )
+    return {field: record[field] for field in fields if field in record}
+
+
+def train(args) -> None:
+    payloads = [
+        record_payload(record) for path in args.inputs for record in read_records(path)
+    ]
+    random.Random(args.seed).shuffle(payloads)
+    # Measured on payloads the dictionary was not trained on
+    held_out = payloads[: max(len(payloads) // 10, 1)]
+    dictionary = train_dictionary(
+        training_samples(payloads[len(held_out) :], args.seed), args.size
+    )
+    with open(args.dictionary, "wb") as f:
+        f.write(dictionary)
+
+    plain = sum(len(encode(payload)) for payload in held_out)
+    for label, codec in [
+        ("zstd", PayloadCodec(level=args.level)),
+        ("zstd + dictionary", PayloadCodec(dictionary, level=args.level)),
+    ]:
+        compressed = sum(len(codec.compress(payload)) for payload in held_out)
+        print(
+            f"{label:<20}{plain / compressed:>6.1f}x ({compressed:,} of {plain:,} bytes)"
+        )
+    print(
+        f"Saved dictionary {PayloadCodec(dictionary).dict_id} "
+        f"({len(dictionary):,} bytes) to {args.dictionary}"
+    )
+
+
+def register_dictionary(cursor, codec: PayloadCodec) -> None:
+    """Store the codec's dictionary in payload_dictionaries for the dashboard"""
+    if codec.dictionary:
+        cursor.execute(
+            """
+            INSERT INTO payload_dictionaries (id, dictionary, created_at)
+            VALUES (%s, %s, now())
+            ON CONFLICT (id) DO NOTHING
+            """,
+            (codec.dict_id, codec.dictionary),
+        )
+
+
+def compress_db(args) -> None:
+    """Rewrite plain benchmark_result_payloads rows as compressed frames"""
+    import psycopg2
+
+    codec = (
+        PayloadCodec.from_file(args.dictionary) if args.dictionary else PayloadCodec()
+    )
+    conn = psycopg2.connect(os.environ["DATABASE_URL"])
+    with conn, conn.cursor() as cursor:
+        register_dictionary(cursor, codec)
+
+    plain = compressed = rows = 0
+    while True:
+        with conn, conn.cursor() as cursor:
+            cursor.execute(
+                f"""
+                SELECT result_id, {", ".join(DB_PAYLOAD_COLUMNS)}
+                FROM benchmark_result_payloads
+                WHERE compressed IS NULL
+                    AND (
+                        %(run_id)s::uuid IS NULL
+                        OR result_id IN (
+                            SELECT id FROM benchmark_results
+                            WHERE benchmark_run_id = %(run_id)s::uuid
+                        )
+                    )
+                LIMIT %(batch_size)s
+                FOR UPDATE SKIP LOCKED
+                """,
+                {"run_id": args.run_id, "batch_size": args.batch_size},
+            )
+            batch = cursor.fetchall()
+            if not batch:
+                break
+            updates = []
+            for result_id, *values in batch:
+                payload = dict(zip(DB_PAYLOAD_COLUMNS, values))
+                frame = codec.compress(payload)
+                plain += len(encode(payload))
+                compressed += len(frame)
+                updates.append((frame, result_id))
+            cursor.executemany(
+                f"""
+                UPDATE benchmark_result_payloads
+                SET compressed = %s,
+                    {", ".join(f"{column} = NULL" for column in DB_PAYLOAD_COLUMNS)}
+                WHERE result_id = %s
+                """,
+                updates,
+            )
+        rows += len(batch)
+        print(f"Compressed {rows} payloads, {plain / max(compressed, 1):.1f}x")
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    train_parser = commands.add_parser("train", help="train a dictionary")
+    train_parser.add_argument("dictionary", help="output .zdict file")
+    train_parser.add_argument(
+        "inputs", nargs="+", type=Path, help="results.json or runner JSONL files"
+    )
+    train_parser.add_argument("--size", type=int, default=DICTIONARY_SIZE)
+    train_parser.add_argument("--level", type=int, default=COMPRESSION_LEVEL)
+    train_parser.add_argument("--seed", type=int, default=0)
+    train_parser.set_defaults(run=train)
+
+    db_parser = commands.add_parser(
+        "compress-db", help="compress plain payload rows in DATABASE_URL"
+    )
+    db_parser.add_argument(
+        "dictionary", nargs="?", help=".zdict file from train (plain zstd without)"
+    )
+    db_parser.add_argument("--run-id", help="only the payloads of this run")
+    db_parser.add_argument("--batch-size", type=int, default=500)
+    db_parser.set_defaults(run=compress_db)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
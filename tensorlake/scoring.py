@@ -0,0 +1,503 @@
+"""Python port of the metrics in src/evaluation, for scoring inside the runner.
+
+calculate_json_accuracy reproduces calculateJsonAccuracy, including the diff
+produced by the json-diff package it is built on (same scores, fuzzy matching
+of objects inside arrays and the sorted comparison of array elements), and
+calculate_text_similarity reproduces calculateTextSimilarity (with faster
+modes for long documents in text_similarity). score_document is
+the picklable entry point run in the scoring process pool.
+"""
+
+import difflib
+import json
+from decimal import ROUND_HALF_UP, Decimal
+
+from text_similarity import DEFAULT_CHUNK_SIZE, estimate_similarity
+
+
+def _type_of(value):
+    """json-diff's extendedTypeOf for decoded JSON values"""
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "boolean"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list):
+        return "array"
+    return "object"
+
+
+def _is_scalar(value):
+    return not isinstance(value, (dict, list))
+
+
+def _js_number(value):
+    """Number.prototype.toString of a JSON number"""
+    if isinstance(value, int):
+        return str(value)
+    if value == int(value) and abs(value) < 1e21:
+        return str(int(value))
+    sign, digits, exponent = Decimal(repr(value)).normalize().as_tuple()
+    digits = "".join(map(str, digits))
+    k = len(digits)
+    n = exponent + k
+    if k <= n <= 21:
+        text = digits + "0" * (n - k)
+    elif 0 < n <= 21:
+        text = digits[:n] + "." + digits[n:]
+    elif -6 < n <= 0:
+        text = "0." + "0" * -n + digits
+    else:
+        mantissa = digits if k == 1 else digits[0] + "." + digits[1:]
+        text = f"{mantissa}e{'+' if n - 1 >= 0 else '-'}{abs(n - 1)}"
+    return ("-" if sign else "") + text
+
+
+def _js_string(value):
+    """String(value), which keys both Array.prototype.sort and difflib's index"""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return "null"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return _js_number(value)
+
+
+def _js_sort_key(value):
+    # JavaScript compares strings by UTF-16 code units
+    return _js_string(value).encode("utf-16-be", "surrogatepass")
+
+
+class _JsonDiff:
+    """Port of json-diff's JsonDiff with the sort and full options"""
+
+    def __init__(self, full=False, sort=True):
+        self.full = full
+        self.sort = sort
+
+    def diff(self, obj1, obj2):
+        """(score, result, equal); result None means no difference"""
+        type1 = _type_of(obj1)
+        if type1 == _type_of(obj2):
+            if type1 == "object":
+                return self._object_diff(obj1, obj2)
+            if type1 == "array":
+                return self._array_diff(obj1, obj2)
+            if obj1 == obj2:
+                return 100, obj1 if self.full else None, True
+        return 0, {"__old": obj1, "__new": obj2}, False
+
+    def _object_diff(self, obj1, obj2):
+        result = {}
+        score = 0
+        equal = True
+
+        for key, value in obj1.items():
+            if key not in obj2:
+                result[f"{key}__deleted"] = value
+                score -= 30
+                equal = False
+        for key, value in obj2.items():
+            if key not in obj1:
+                result[f"{key}__added"] = value
+                score -= 30
+                equal = False
+
+        for key, value1 in obj1.items():
+            if key in obj2:
+                score += 20
+                change_score, change, change_equal = self.diff(value1, obj2[key])
+                if not change_equal:
+                    result[key] = change
+                    equal = False
+                elif self.full:
+                    result[key] = value1
+                score += min(20, max(-10, change_score / 5))
+
+        if equal:
+            score = 100 * max(len(obj1), 0.5)
+            if not self.full:
+                result = None
+        else:
+            score = max(0, score)
+        return score, result, equal
+
+    def _find_matching_object(self, item, index, fuzzy_originals):
+        best = None
+        for key, original in fuzzy_originals.items():
+            if key == "__next":
+                continue
+            candidate, match_index = original
+            index_distance = abs(match_index - index)
+            if _type_of(item) == _type_of(candidate):
+                score = self.diff(item, candidate)[0]
+                if (
+                    best is None
+                    or score > best[0]
+                    or (score == best[0] and index_distance < best[2])
+                ):
+                    best = (score, key, index_distance)
+        return best
+
+    def _scalarize(self, array, originals, fuzzy_originals=None):
+        """Replace objects and arrays by keys, reusing the key of the best
+        matching element of the other array so they line up in the diff"""
+        fuzzy_matches = {}
+        if fuzzy_originals is not None:
+            key_scores = {}
+            for index, item in enumerate(array):
+                if _is_scalar(item):
+                    continue
+                best = self._find_matching_object(item, index, fuzzy_originals)
+                if best and (
+                    best[1] not in key_scores or best[0] > key_scores[best[1]][0]
+                ):
+                    key_scores[best[1]] = (best[0], index)
+            for key, (_, index) in key_scores.items():
+                fuzzy_matches[index] = key
+
+        result = []
+        for index, item in enumerate(array):
+            if _is_scalar(item):
+                result.append(item)
+                continue
+            key = fuzzy_matches.get(index)
+            if not key:
+                key = f"__$!SCALAR{originals['__next']}"
+                originals["__next"] += 1
+            originals[key] = (item, index)
+            result.append(key)
+        return result
+
+    @staticmethod
+    def _is_scalarized(item, originals):
+        return isinstance(item, str) and item in originals and item != "__next"
+
+    def _descalarize(self, item, originals):
+        return originals[item][0] if self._is_scalarized(item, originals) else item
+
+    def _array_diff(self, obj1, obj2):
+        originals1 = {"__next": 1}
+        seq1 = self._scalarize(obj1, originals1)
+        originals2 = {"__next": originals1["__next"]}
+        seq2 = self._scalarize(obj2, originals2, originals1)
+
+        if self.sort:
+            seq1.sort(key=_js_sort_key)
+            seq2.sort(key=_js_sort_key)
+        # difflib.js indexes elements by their string form
+        opcodes = difflib.SequenceMatcher(
+            None, [_js_string(x) for x in seq1], [_js_string(x) for x in seq2]
+        ).get_opcodes()
+
+        result = []
+        score = 0
+        equal = True
+        for op, i1, i2, j1, j2 in opcodes:
+            if op != "equal":
+                equal = False
+
+            if op == "equal":
+                for i in range(i1, i2):
+                    item = seq1[i]
+                    if self._is_scalarized(item, originals1):
+                        item1 = self._descalarize(item, originals1)
+                        item2 = self._descalarize(item, originals2)
+                        _, change, change_equal = self.diff(item1, item2)
+                        if not change_equal:
+                            result.append(["~", change])
+                            equal = False
+                        else:
+                            result.append([" ", item1] if self.full else [" "])
+                    else:
+                        result.append([" ", item] if self.full else [" "])
+                    score += 10
+            if op in ("delete", "replace"):
+                for i in range(i1, i2):
+                    result.append(["-", self._descalarize(seq1[i], originals1)])
+                    score -= 5
+            if op in ("insert", "replace"):
+                for j in range(j1, j2):
+                    result.append(["+", self._descalarize(seq2[j], originals2)])
+                    score -= 5
+
+        if equal or not opcodes:
+            return 100, obj1 if self.full else None, True
+        return max(0, score), result, False
+
+
+def _convert_strings_to_uppercase(obj):
+    if obj is None or _is_scalar(obj):
+        return obj
+    if isinstance(obj, list):
+        return [_convert_strings_to_uppercase(item) for item in obj]
+    result = {}
+    for key, value in obj.items():
+        if isinstance(value, str):
+            result[key] = value.upper()
+        else:
+            result[key] = _convert_strings_to_uppercase(value)
+    return result
+
+
+def _members(obj):
+    """for (key in obj) over an object or array"""
+    if isinstance(obj, list):
+        return [(str(index), value) for index, value in enumerate(obj)]
+    return list(obj.items())
+
+
+def count_total_fields(obj):
+    """Number of primitive values in obj, array elements included"""
+    count = 0
+
+    def traverse(current):
+        nonlocal count
+        if _is_scalar(current):
+            return
+        if isinstance(current, list):
+            for item in current:
+                if _is_scalar(item):
+                    count += 1
+                else:
+                    traverse(item)
+            return
+        for key, value in current.items():
+            # Skip diff metadata keys
+            if "__" in key:
+                continue
+            if _is_scalar(value):
+                count += 1
+            else:
+                traverse(value)
+
+    traverse(obj)
+    return count
+
+
+def count_changes(diff_result):
+    """Additions, deletions and modifications in a json-diff result"""
+    changes = {"additions": 0, "deletions": 0, "modifications": 0, "total": 0}
+
+    def traverse(obj):
+        if _is_scalar(obj):
+            return
+        for key, value in _members(obj):
+            if isinstance(value, list):
+                for item in value:
+                    if not isinstance(item, list) or len(item) != 2:
+                        continue
+                    operation, element = item
+                    if _is_scalar(element):
+                        if operation == "+":
+                            changes["additions"] += 1
+                        elif operation == "-":
+                            changes["deletions"] += 1
+                    elif operation == "+":
+                        changes["additions"] += count_total_fields(element)
+                    elif operation == "-":
+                        changes["deletions"] += count_total_fields(element)
+                    elif operation == "~":
+                        traverse(element)
+            elif key.endswith("__deleted"):
+                changes["deletions"] += (
+                    1 if _is_scalar(value) else count_total_fields(value)
+                )
+            elif key.endswith("__added"):
+                changes["additions"] += (
+                    1 if _is_scalar(value) else count_total_fields(value)
+                )
+            elif isinstance(value, dict):
+                if "__old" in value and "__new" in value:
+                    if value["__old"] is None and value["__new"] is not None:
+                        changes["modifications"] += (
+                            count_total_fields(value["__new"]) or 1
+                        )
+                    else:
+                        changes["modifications"] += (
+                            count_total_fields(value["__old"]) or 1
+                        )
+                else:
+                    traverse(value)
+
+    traverse(diff_result)
+    changes["total"] = (
+        changes["additions"] + changes["deletions"] + changes["modifications"]
+    )
+    return changes
+
+
+def _to_fixed(value, digits):
+    """Number(value.toFixed(digits)): ties round away from zero"""
+    return float(
+        Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP)
+    )
+
+
+def calculate_json_accuracy(actual, predicted, ignore_cases=False):
+    """1 - (additions + deletions + modifications) / fields in actual"""
+    if ignore_cases:
+        actual = _convert_strings_to_uppercase(actual)
+        predicted = _convert_strings_to_uppercase(predicted)
+
+    full_diff_result = _JsonDiff(full=True).diff(actual, predicted)[1]
+    diff_result = _JsonDiff().diff(actual, predicted)[1]
+    total_fields = count_total_fields(actual)
+
+    if diff_result is None:
+        return {
+            "score": 1,
+            "jsonDiff": {},
+            "fullJsonDiff": {},
+            "jsonDiffStats": {
+                "additions": 0,
+                "deletions": 0,
+                "modifications": 0,
+                "total": 0,
+            },
+            "totalFields": total_fields,
+        }
+
+    changes = count_changes(diff_result)
+    if total_fields:
+        score = _to_fixed(max(0, 1 - changes["total"] / total_fields), 4)
+    else:
+        # NaN in JavaScript when nothing counted, which JSON.stringify writes as null
+        score = 0 if changes["total"] else None
+    return {
+        "score": score,
+        "jsonDiff": diff_result,
+        "fullJsonDiff": full_diff_result,
+        "jsonDiffStats": changes,
+        "totalFields": total_fields,
+    }
+
+
+def calculate_text_similarity(
+    original, predicted, mode="exact", max_error=None, chunk_size=DEFAULT_CHUNK_SIZE
+):
+    """1 - Levenshtein distance / length of the longer normalized text.
+
+    The approximate mode of text_similarity gives a lower bound instead of
+    the exact value, for long documents.
+    """
+    if original == predicted:
+        return 1
+    if not original or not predicted:
+        return 0
+
+    estimate = estimate_similarity(
+        original, predicted, mode, max_error=max_error, chunk_size=chunk_size
+    )
+    if estimate is None:
+        # 0 / 0 in JavaScript
+        return None
+    return _to_fixed(estimate.similarity, 4)
+
+
+def _load_json(value):
+    return json.loads(value) if isinstance(value, str) else value
+
+
+def score_document(
+    true_json,
+    predicted_json,
+    true_markdown,
+    predicted_markdown,
+    text_similarity_options=None,
+):
+    """Scores of one document under the same conditions as compute_metrics.ts.
+
+    Returns the result fields the TypeScript benchmark stores (jsonAccuracy,
+    jsonDiff, fullJsonDiff, jsonDiffStats, jsonAccuracyResult and
+    levenshteinDistance); fields whose inputs are missing are left out.
+    text_similarity_options are passed on to calculate_text_similarity.
+    """
+    scores = {}
+    if predicted_json and true_json:
+        accuracy = calculate_json_accuracy(
+            _load_json(true_json), _load_json(predicted_json)
+        )
+        scores.update(
+            {
+                "jsonAccuracy": accuracy["score"],
+                "jsonDiff": accuracy["jsonDiff"],
+                "fullJsonDiff": accuracy["fullJsonDiff"],
+                "jsonDiffStats": accuracy["jsonDiffStats"],
+                "jsonAccuracyResult": accuracy,
+            }
+        )
+    if predicted_markdown and true_markdown:
+        scores["levenshteinDistance"] = calculate_text_similarity(
+            true_markdown, predicted_markdown, **(text_similarity_options or {})
+        )
+    return scores
+
+
+def metrics_report(scored):
+    """The metrics.json compute_metrics.ts writes, from (file_id, scores) pairs.
+
+    scores is None for files without any prediction.
+    """
+    detailed = []
+    for file_id, scores in scored:
+        # Files without any prediction are skipped
+        if scores is None:
+            continue
+        accuracy = scores.get("jsonAccuracyResult")
+        similarity = scores.get("levenshteinDistance", False)
+        detailed.append(
+            {
+                "file_id": file_id,
+                "json": (
+                    {
+                        "accuracy": accuracy["score"],
+                        "diffStats": accuracy["jsonDiffStats"],
+                        "totalFields": accuracy["totalFields"],
+                    }
+                    if accuracy
+                    else None
+                ),
+                "text": (
+                    None
+                    if similarity is False
+                    else (
+                        {"similarity": similarity}
+                        if similarity is not None
+                        else {
+                            "similarity": 0,
+                            "error": "Failed to calculate similarity",
+                        }
+                    )
+                ),
+            }
+        )
+
+    valid_json = [m for m in detailed if m["json"] is not None]
+    valid_text = [m for m in detailed if m["text"] and "error" not in m["text"]]
+    failed_text = [m for m in detailed if m["text"] and "error" in m["text"]]
+    return {
+        "summary": {
+            "averageJsonAccuracy": (
+                sum(m["json"]["accuracy"] or 0 for m in valid_json) / len(valid_json)
+                if valid_json
+                else 0
+            ),
+            "averageTextSimilarity": (
+                sum(m["text"]["similarity"] for m in valid_text) / len(valid_text)
+                if valid_text
+                else 0
+            ),
+            "totalFiles": len(detailed),
+            "skippedFiles": len(scored) - len(detailed),
+            "validJsonFiles": len(valid_json),
+            "validTextFiles": len(valid_text),
+            "failedTextFiles": len(failed_text),
+            "failedTextFileIds": [m["file_id"] for m in failed_text],
+        },
+        "detailed": detailed,
+    }
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from concurrency import AdaptiveLimit
+
+
+def run_round(limit, **signal):
+    """Record one round of requests: as many as the current limit allows"""
+    for _ in range(int(limit.limit)):
+        limit.record(**signal)
+
+
+def test_grows_by_about_one_per_round_up_to_maximum():
+    limit = AdaptiveLimit("test", 4, maximum=10)
+    for size in range(4, 8):
+        # Each request adds 1 / limit: a window of about `size` requests
+        # takes the limit from size to size + 1
+        requests = 0
+        while limit.limit < size + 1:
+            limit.record(latency=0.1)
+            requests += 1
+        assert size <= requests <= size + 1
+
+    for _ in range(20):
+        run_round(limit, latency=0.1)
+    assert limit.limit == 10
+    assert limit.peak == 10
+    assert limit.decreases == 0
+
+
+@pytest.mark.parametrize(
+    "signal",
+    [
+        {"error": True},
+        {"queue_time": 31.0},
+    ],
+)
+def test_decreases_once_per_round_on_a_throttle_signal(signal):
+    limit = AdaptiveLimit("test", 10, maximum=10)
+    run_round(limit, latency=0.1)
+
+    limit.record(**signal)
+    assert limit.limit == pytest.approx(7)
+    # Requests in flight were sent at the old limit: no second cut this round
+    limit.record(**signal)
+    assert limit.limit == pytest.approx(7)
+    assert limit.decreases == 1
+
+    # The next cut comes a round of the new limit after the first
+    for _ in range(5):
+        limit.record(**signal)
+    assert limit.limit == pytest.approx(7)
+    limit.record(**signal)
+    assert limit.limit == pytest.approx(4.9)
+    assert limit.decreases == 2
+
+
+def test_latency_rising_past_the_tolerance_counts_as_congestion():
+    limit = AdaptiveLimit("test", 8, maximum=8)
+    run_round(limit, latency=0.5)
+    for _ in range(20):
+        limit.record(latency=5.0)
+    assert limit.limit < 8
+    assert limit.decreases >= 1
+
+
+def test_never_drops_below_minimum():
+    limit = AdaptiveLimit("test", 4, minimum=2, maximum=4)
+    for _ in range(50):
+        limit.record(error=True)
+    assert limit.limit == 2
+
+
+def test_fixed_limit_ignores_signals():
+    limit = AdaptiveLimit("test", 4, maximum=10, adaptive=False)
+    for _ in range(20):
+        limit.record(error=True)
+        limit.record(latency=0.1)
+    assert limit.limit == 4
+    assert limit.summary() == "test concurrency: fixed at 4"
+
+
+def test_holds_at_most_limit_requests_at_once():
+    async def main():
+        limit = AdaptiveLimit("test", 3, adaptive=False)
+        most = 0
+
+        async def request():
+            nonlocal most
+            async with limit:
+                most = max(most, limit.in_flight)
+                await asyncio.sleep(0.001)
+
+        await asyncio.gather(*(request() for _ in range(20)))
+        return most, limit.in_flight
+
+    assert asyncio.run(main()) == (3, 0)
@@ -0,0 +1,76 @@
+import json
+
+import pytest
+
+from db_sink import _copy_value
+
+
+def unescape(field):
+    """Decode one field of COPY text format, as Postgres does"""
+    if field == "\\N":
+        return None
+    escapes = {"\\": "\\", "t": "\t", "n": "\n", "r": "\r"}
+    out = []
+    i = 0
+    while i < len(field):
+        if field[i] == "\\":
+            out.append(escapes[field[i + 1]])
+            i += 2
+        else:
+            out.append(field[i])
+            i += 1
+    return "".join(out)
+
+
+@pytest.mark.parametrize("column", ["predicted_markdown", "usage", "error"])
+def test_none_is_null(column):
+    assert _copy_value(column, None) == "\\N"
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "plain",
+        "tab\there",
+        "line\nbreak\r\nwindows",
+        "back\\slash \\N \\t",
+        "\\N",
+        "",
+        "ünïcödé → ✓",
+    ],
+)
+def test_text_round_trips_through_copy_escaping(text):
+    field = _copy_value("predicted_markdown", text)
+    assert "\t" not in field and "\n" not in field and "\r" not in field
+    assert unescape(field) == text
+
+
+def test_scalars():
+    assert _copy_value("direct_image_extraction", True) == "t"
+    assert _copy_value("direct_image_extraction", False) == "f"
+    assert _copy_value("levenshtein_distance", 0.25) == "0.25"
+    assert _copy_value("compressed", b"\x00\xff") == "\\\\x00ff"
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        {"total": 1, "items": [{"name": "a\tb"}], "note": "line\nbreak"},
+        [1, None, "x"],
+        # Strings are JSON strings, whether or not they look like JSON
+        "not json",
+        '{"already": "serialized"}',
+        "",
+        0,
+    ],
+)
+def test_json_columns_are_always_encoded(value):
+    assert json.loads(unescape(_copy_value("predicted_json", value))) == value
+    assert json.loads(unescape(_copy_value("metadata", value))) == value
+
+
+def test_error_is_stored_like_json_stringify():
+    assert unescape(_copy_value("error", "Upload failed: timeout")) == (
+        '"Upload failed: timeout"'
+    )
+    assert unescape(_copy_value("error", {"message": "x"})) == '{"message": "x"}'
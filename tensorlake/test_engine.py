@@ -0,0 +1,238 @@
+import asyncio
+import json
+from collections import Counter
+
+import pandas as pd
+
+import engine as engine_module
+from adapters import FakeAdapter
+from engine import (
+    BenchmarkEngine,
+    Document,
+    JobFailed,
+    JsonlResultCache,
+    Prediction,
+    ProviderAdapter,
+)
+
+
+class ScriptedAdapter(ProviderAdapter):
+    """Fails the requests it is told to, and counts every call"""
+
+    name = "scripted"
+    poll_interval = 0
+
+    def __init__(
+        self,
+        upload_failures=None,
+        poll_failures=None,
+        reject_submit=(),
+        failed_jobs=(),
+        pages=None,
+        chunks=None,
+    ):
+        self.upload_failures = Counter(upload_failures or {})
+        self.poll_failures = Counter(poll_failures or {})
+        self.reject_submit = set(reject_submit)
+        self.failed_jobs = set(failed_jobs)
+        self.pages = pages
+        self.chunks = chunks
+        self.calls = Counter()
+
+    async def upload(self, document):
+        self.calls["upload", document.id] += 1
+        if self.upload_failures[document.id] > 0:
+            self.upload_failures[document.id] -= 1
+            raise ConnectionError("upload reset")
+        return document.id
+
+    async def submit(self, reference, document, page_range):
+        self.calls["submit", document.id] += 1
+        if document.id in self.reject_submit:
+            raise ConnectionError("submit reset")
+        return f"{document.id}:{page_range}"
+
+    async def poll(self, job_id):
+        document_id, page_range = job_id.split(":")
+        self.calls["poll", document_id] += 1
+        # Each job runs for one poll before it is done
+        if self.calls["poll", document_id] == 1:
+            return None
+        if self.poll_failures[document_id] > 0:
+            self.poll_failures[document_id] -= 1
+            raise ConnectionError("poll reset")
+        if document_id in self.failed_jobs:
+            raise JobFailed("Job failed with status: failure")
+        return Prediction(
+            pages=self.pages or [{"id": document_id, "range": page_range}],
+            chunks=self.chunks or [f" {document_id} "],
+        )
+
+
+def document(document_id, schema="{}"):
+    return Document(
+        id=document_id,
+        path=f"{document_id}.png",
+        schema=schema,
+        item={"file_name": document_id},
+    )
+
+
+def run(engine, documents, on_result=None):
+    return asyncio.run(engine.run(documents, on_result=on_result))
+
+
+def test_uploads_and_polls_are_retried_submits_are_not():
+    adapter = ScriptedAdapter(
+        upload_failures={"flaky": 2},
+        poll_failures={"flaky": 1},
+        reject_submit={"rejected"},
+    )
+    engine = BenchmarkEngine(adapter, max_retries=2, retry_delay=0)
+    flaky, rejected = run(engine, [document("flaky"), document("rejected")])
+
+    assert flaky["error"] is None
+    assert flaky["result"] == {"id": "flaky", "range": "None"}
+    assert adapter.calls["upload", "flaky"] == 3
+    assert adapter.calls["submit", "flaky"] == 1
+    # Running, failed once, then done
+    assert adapter.calls["poll", "flaky"] == 3
+
+    assert rejected["error"] == "Parse failed: submit reset"
+    assert adapter.calls["submit", "rejected"] == 1
+    assert adapter.calls["poll", "rejected"] == 0
+
+
+def test_retries_give_up_after_max_retries():
+    adapter = ScriptedAdapter(upload_failures={"upload": 5}, poll_failures={"poll": 5})
+    engine = BenchmarkEngine(adapter, max_retries=2, retry_delay=0)
+    upload, poll = run(engine, [document("upload"), document("poll")])
+
+    assert upload["error"] == "Upload failed: upload reset"
+    assert adapter.calls["upload", "upload"] == 3
+    assert adapter.calls["submit", "upload"] == 0
+    assert poll["error"] == "Parse failed: poll reset"
+    assert adapter.calls["poll", "poll"] == 1 + 3
+
+
+def test_failed_jobs_are_not_retried():
+    adapter = ScriptedAdapter(failed_jobs={"bad"})
+    engine = BenchmarkEngine(adapter, max_retries=3, retry_delay=0)
+    (bad,) = run(engine, [document("bad")])
+    assert bad["error"] == "Parse failed: Job failed with status: failure"
+    assert adapter.calls["poll", "bad"] == 2
+    assert engine.errors == [
+        {"file": "bad", "error": bad["error"], "job_id": None},
+    ]
+
+
+def test_failures_stay_with_their_document():
+    adapter = ScriptedAdapter(
+        upload_failures={"a": 9}, reject_submit={"b"}, failed_jobs={"c"}
+    )
+    engine = BenchmarkEngine(adapter, max_retries=1, retry_delay=0)
+    seen = []
+
+    async def on_result(doc, result):
+        seen.append(doc.id)
+        if doc.id == "d":
+            raise RuntimeError("database down")
+
+    ids = ["a", "b", "c", "d", "e"]
+    results = run(engine, [document(i) for i in ids], on_result)
+
+    # Results come back in document order, whatever order they finished in
+    assert [r["img_id"] for r in results] == ids
+    assert [r["error"] is None for r in results] == [False, False, False, True, True]
+    assert results[4]["result"] == {"id": "e", "range": "None"}
+    assert sorted(seen) == ids
+    assert len(engine.completed) == len(ids)
+    assert [error["file"] for error in engine.errors] == ["a", "b", "c"]
+
+
+def test_cached_documents_are_not_sent_again(tmp_path):
+    cache_path = str(tmp_path / "cache.jsonl")
+    documents = [document("ok"), document("bad")]
+
+    first = ScriptedAdapter(failed_jobs={"bad"})
+    run(BenchmarkEngine(first, cache=JsonlResultCache(cache_path)), documents)
+
+    # A new run reads the cache from disk; failures were not cached
+    second = ScriptedAdapter()
+    ok, bad = run(
+        BenchmarkEngine(second, cache=JsonlResultCache(cache_path)), documents
+    )
+    assert ok["result"] == {"id": "ok", "range": "None"}
+    assert second.calls["upload", "ok"] == 0
+    assert bad["error"] is None
+    assert second.calls["upload", "bad"] == 1
+
+    # A different schema or split setting is a different cache entry
+    third = ScriptedAdapter()
+    run(
+        BenchmarkEngine(third, cache=JsonlResultCache(cache_path)),
+        [document("ok", schema='{"type": "object"}')],
+    )
+    assert third.calls["upload", "ok"] == 1
+    fourth = ScriptedAdapter()
+    run(
+        BenchmarkEngine(fourth, cache=JsonlResultCache(cache_path), pages_per_job=2),
+        [document("ok")],
+    )
+    assert fourth.calls["upload", "ok"] == 1
+
+
+def test_single_job_keeps_the_first_page_and_chunk():
+    adapter = ScriptedAdapter(
+        pages=[{"total": 1, "items": [1]}, {"items": [2]}],
+        chunks=[" first ", "second"],
+    )
+    (result,) = run(BenchmarkEngine(adapter), [document("doc")])
+    assert result["result"] == {"total": 1, "items": [1]}
+    assert result["md_text"] == "first"
+
+
+def test_split_documents_are_merged(monkeypatch):
+    monkeypatch.setattr(engine_module, "page_count", lambda path: 5)
+    adapter = ScriptedAdapter(pages=[{"items": [1]}], chunks=["text"])
+    adapter.supports_page_ranges = True
+    engine = BenchmarkEngine(adapter, pages_per_job=2)
+    (result,) = run(engine, [document("doc")])
+
+    assert adapter.calls["submit", "doc"] == 3
+    assert result["job_id"] == "doc:1-2,doc:3-4,doc:5-5"
+    assert result["result"] == {"items": [1, 1, 1]}
+    assert result["md_text"] == "text\n\ntext\n\ntext"
+
+
+def test_write_outputs_follows_document_order(tmp_path):
+    adapter = FakeAdapter(latency=0.01, failure_rate=0.3, poll_interval=0, seed=3)
+    documents = [
+        Document(
+            id=f"doc-{i}",
+            path=f"doc-{i}.png",
+            schema="{}",
+            item={"file_name": f"doc-{i}", "true_json_output": {"i": i}},
+        )
+        for i in range(12)
+    ]
+    engine = BenchmarkEngine(adapter, retry_delay=0)
+    run(engine, documents[:10])
+
+    # Results in another order than the documents, as engine.completed holds
+    # them after an interrupted run; the last two documents never ran
+    prefix = str(tmp_path / "fake")
+    engine.write_outputs(list(reversed(engine.completed)), documents, prefix=prefix)
+
+    with open(f"{prefix}_metadata_with_predictions.jsonl") as f:
+        items = [json.loads(line) for line in f]
+    assert [item["file_name"] for item in items] == [d.id for d in documents]
+    for i, item in enumerate(items[:10]):
+        if item["error"] is None:
+            assert item["predictedJson"] == {"i": i}
+    assert all("predictedJson" not in item for item in items[10:])
+
+    predictions = pd.read_csv(f"{prefix}_predictions.csv")
+    assert sorted(predictions["file_id"]) == sorted(d.id for d in documents[:10])
+    errors = pd.read_csv(f"{prefix}_processing_errors.csv")
+    assert len(errors) == predictions["error"].notna().sum() > 0
@@ -0,0 +1,58 @@
+import pytest
+
+from page_split import merge_markdown, merge_structured_data, page_ranges
+
+
+def pages_of(ranges, pages):
+    """Pages each range covers, in order; [None] covers the whole document"""
+    if ranges == [None]:
+        return list(range(1, pages + 1))
+    covered = []
+    for page_range in ranges:
+        start, end = map(int, page_range.split("-"))
+        assert start <= end
+        covered.extend(range(start, end + 1))
+    return covered
+
+
+@pytest.mark.parametrize("pages_per_job", [1, 2, 4, 5])
+@pytest.mark.parametrize("extra", [-1, 0, 1])
+def test_ranges_cover_every_page_once(pages_per_job, extra):
+    for pages in (1, pages_per_job, pages_per_job + 1, 3 * pages_per_job + extra):
+        if pages < 1:
+            continue
+        ranges = page_ranges(pages, pages_per_job, 0)
+        assert pages_of(ranges, pages) == list(range(1, pages + 1))
+        assert all(
+            len(pages_of([r], pages)) <= pages_per_job for r in ranges if r is not None
+        )
+
+
+def test_short_documents_are_a_single_job():
+    assert page_ranges(1, 4, 0) == [None]
+    assert page_ranges(4, 4, 0) == [None]
+    assert page_ranges(5, 4, 0) == ["1-4", "5-5"]
+    assert page_ranges(9, 4, 0) == ["1-4", "5-8", "9-9"]
+    # Below min_pages nothing is split, and 0 pages per job disables splitting
+    assert page_ranges(9, 4, 10) == [None]
+    assert page_ranges(100, 0, 0) == [None]
+
+
+def test_merge_structured_data():
+    assert merge_structured_data([]) is None
+    assert merge_structured_data([None, {}, {"a": 1}]) == {"a": 1}
+    assert merge_structured_data(
+        [
+            {"total": "", "items": [1, 2], "vendor": {"name": "A"}},
+            {"total": "10", "items": [3], "vendor": {"name": "B", "vat": "X"}},
+        ]
+    ) == {"total": "10", "items": [1, 2, 3], "vendor": {"name": "A", "vat": "X"}}
+    # Lists of pages are concatenated; the first non-empty scalar wins
+    assert merge_structured_data([[1], [], [2, 3]]) == [1, 2, 3]
+    assert merge_structured_data(["a", "b"]) == "a"
+
+
+def test_merge_markdown():
+    assert merge_markdown([]) is None
+    assert merge_markdown([None, "  ", ""]) is None
+    assert merge_markdown([" # Page 1 \n", None, "Page 2"]) == "# Page 1\n\nPage 2"
@@ -0,0 +1,98 @@
+import random
+
+import pytest
+import zstandard
+
+from payload_codec import (
+    PayloadCodec,
+    frame_dictionary_id,
+    train_dictionary,
+    training_samples,
+)
+
+
+def payloads(count, seed=0):
+    """Result payloads that share vocabulary, as a benchmark's do"""
+    rng = random.Random(seed)
+    words = ["Invoice", "Total", "Customer", "Date", "Amount", "Item", "Tax"]
+    for index in range(count):
+        total = round(rng.uniform(1, 1000), 2)
+        markdown = "\n".join(
+            f"| {rng.choice(words)} | {rng.randint(1, 99)} |" for _ in range(20)
+        )
+        yield {
+            "jsonSchema": {
+                "type": "object",
+                "properties": {"total": {"type": "number"}},
+            },
+            "trueMarkdown": f"# Document {index}\n\n{markdown}",
+            "predictedMarkdown": f"# Document {index}\n{markdown}",
+            "trueJson": {"total": total, "customer": rng.choice(words)},
+            "predictedJson": {"total": total, "customer": None},
+            "jsonDiff": {"customer": {"__old": "Invoice", "__new": None}},
+        }
+
+
+@pytest.fixture(scope="module")
+def dictionary():
+    return train_dictionary(training_samples(payloads(500)), size=16_384)
+
+
+PAYLOAD = {
+    "trueMarkdown": "| a | b |\n| ü | 日本 |",
+    "predictedJson": {"total": 1.5, "items": [1, None, "x"]},
+    "jsonDiff": None,
+}
+
+
+def test_round_trip_without_dictionary():
+    codec = PayloadCodec()
+    frame = codec.compress(PAYLOAD)
+    assert codec.dict_id == 0
+    assert frame_dictionary_id(frame) == 0
+    assert codec.decompress(frame) == PAYLOAD
+    # Plain zstd that any decompressor reads
+    assert zstandard.ZstdDecompressor().decompress(frame).startswith(b"{")
+
+
+def test_round_trip_with_dictionary(dictionary):
+    codec = PayloadCodec(dictionary)
+    assert codec.dict_id != 0
+    for payload in [PAYLOAD, *payloads(20, seed=1)]:
+        frame = codec.compress(payload)
+        assert frame_dictionary_id(frame) == codec.dict_id
+        assert codec.decompress(frame) == payload
+
+
+def test_dictionary_makes_small_frames_smaller(dictionary):
+    held_out = list(payloads(50, seed=2))
+    plain = sum(len(PayloadCodec().compress(p)) for p in held_out)
+    with_dictionary = sum(len(PayloadCodec(dictionary).compress(p)) for p in held_out)
+    assert with_dictionary < plain
+
+
+def test_frames_name_the_dictionary_they_need(dictionary):
+    other = train_dictionary(training_samples(payloads(500, seed=3)), size=8192)
+    frame = PayloadCodec(dictionary).compress(PAYLOAD)
+
+    with pytest.raises(ValueError, match=str(PayloadCodec(dictionary).dict_id)):
+        PayloadCodec(other).decompress(frame)
+    with pytest.raises(ValueError):
+        PayloadCodec().decompress(frame)
+    # A codec with a dictionary still reads frames written without one
+    assert PayloadCodec(other).decompress(PayloadCodec().compress(PAYLOAD)) == PAYLOAD
+
+
+def test_jsonl_round_trip(tmp_path, dictionary):
+    codec = PayloadCodec(dictionary)
+    records = list(payloads(30, seed=4))
+    path = str(tmp_path / "out.jsonl.zst")
+    codec.write_jsonl(path, records)
+    assert list(codec.read_jsonl(path)) == records
+
+    # One frame per line: plain zstd with the dictionary gives back the JSONL
+    with open(path, "rb") as f:
+        reader = zstandard.ZstdDecompressor(
+            dict_data=zstandard.ZstdCompressionDict(dictionary)
+        ).stream_reader(f, read_across_frames=True)
+        assert reader.read().count(b"\n") == len(records)
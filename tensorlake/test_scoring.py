@@ -0,0 +1,199 @@
+import pytest
+
+from scoring import (
+    calculate_json_accuracy,
+    calculate_text_similarity,
+    count_changes,
+    count_total_fields,
+    score_document,
+)
+
+# Cases of tests/evaluation/json.test.ts, which the port must keep matching
+
+
+@pytest.mark.parametrize(
+    "obj,expected",
+    [
+        # Nested objects, array elements included
+        ({"a": 1, "b": {"c": 2, "d": [3, {"e": 4}]}}, 4),
+        # Array elements count as individual fields
+        ({"a": [1, 2, 3], "b": "test", "c": True}, 5),
+        # Objects nested in arrays
+        ({"a": [{"b": 1}, {"c": 2}], "d": "test", "e": True}, 4),
+        # Null values count
+        ({"a": None, "b": {"c": None}, "d": "test"}, 3),
+        # Diff metadata keys do not
+        ({"a": 1, "b__deleted": True, "c__added": "test", "d": {"e": 2}}, 2),
+    ],
+)
+def test_count_total_fields(obj, expected):
+    assert count_total_fields(obj) == expected
+
+
+@pytest.mark.parametrize(
+    "actual,predicted,expected",
+    [
+        # Half of the fields match
+        ({"a": 1, "b": 2}, {"a": 1, "b": 3}, 0.5),
+        # Nested objects
+        (
+            {"a": 1, "b": {"c": 2, "d": 4, "e": 4}},
+            {"a": 1, "b": {"c": 2, "d": 4, "e": 5}},
+            0.75,
+        ),
+        # Nested arrays and objects
+        (
+            {"a": 1, "b": [{"c": 2, "d": 4, "e": 4, "f": [2, 9]}]},
+            {"a": 1, "b": [{"c": 2, "d": 4, "e": 5, "f": [2, 3]}]},
+            0.5,
+        ),
+        # Array elements match regardless of order
+        (
+            {"a": 1, "b": [{"c": 1, "d": 2}, {"c": 3, "d": 4}]},
+            {"a": 1, "b": [{"c": 3, "d": 4}, {"c": 1, "d": 2}]},
+            1,
+        ),
+        # Every element is unmatched when the predicted array is null
+        ({"a": 1, "b": [1, 2, 3]}, {"a": 1, "b": None}, 0.25),
+        (
+            {"a": 1, "b": [{"c": 1, "d": 1}, {"c": 2}, {"c": 3, "e": 4}]},
+            {"a": 1, "b": None},
+            0.1667,
+        ),
+        # A null object in the prediction is a partial match
+        (
+            {"a": 1, "b": {"c": 1, "d": {"e": 1, "f": 2}}},
+            {"a": 1, "b": {"c": 1, "d": None}},
+            0.5,
+        ),
+    ],
+)
+def test_json_accuracy(actual, predicted, expected):
+    assert calculate_json_accuracy(actual, predicted)["score"] == expected
+
+
+@pytest.mark.parametrize(
+    "actual,predicted,expected",
+    [
+        # Actual null to predicted value, object, complex object and array
+        ({"a": [{"b": 1, "c": None}]}, {"a": [{"b": 1, "c": 2}]}, 0.5),
+        (
+            {"a": [{"b": 1, "c": None, "f": 4}]},
+            {"a": [{"b": 1, "c": {"d": 2}, "f": 4}]},
+            0.6667,
+        ),
+        (
+            {"a": [{"b": 1, "c": None, "f": 4}]},
+            {"a": [{"b": 1, "c": {"d": 2, "e": 3}, "f": 4}]},
+            0.3333,
+        ),
+        (
+            {"a": [{"b": 1, "c": None, "f": 4}]},
+            {"a": [{"b": 1, "c": [3], "f": 4}]},
+            0.6667,
+        ),
+        # Actual value, object, complex object and array to predicted null
+        ({"a": [{"b": 1, "c": 2}]}, {"a": [{"b": 1, "c": None}]}, 0.5),
+        ({"a": [{"b": 1, "c": {"d": 2}}]}, {"a": [{"b": 1, "c": None}]}, 0.5),
+        (
+            {"a": [{"b": 1, "c": {"d": 2, "e": 3}}]},
+            {"a": [{"b": 1, "c": None}]},
+            0.3333,
+        ),
+        ({"a": [{"b": 1, "c": [3, 2]}]}, {"a": [{"b": 1, "c": None}]}, 0.3333),
+    ],
+)
+def test_json_accuracy_null_comparisons(actual, predicted, expected):
+    assert calculate_json_accuracy(actual, predicted)["score"] == expected
+
+
+def test_scores_are_rounded_to_four_decimals_half_up():
+    actual = {"a": 1, "b": 2, "c": 3}
+    assert calculate_json_accuracy(actual, dict(actual, c=4))["score"] == 0.6667
+    # 1 - 3/32 = 0.90625 is an exact tie: toFixed rounds it up, round() to even
+    actual = {f"k{i}": i for i in range(32)}
+    predicted = dict(actual, k0=-1, k1=-1, k2=-1)
+    assert calculate_json_accuracy(actual, predicted)["score"] == 0.9063
+
+
+def test_equal_documents_have_no_diff():
+    result = calculate_json_accuracy({"a": [1, {"b": 2}]}, {"a": [{"b": 2}, 1]})
+    assert result["score"] == 1
+    assert result["jsonDiff"] == {}
+    assert result["jsonDiffStats"]["total"] == 0
+    assert result["totalFields"] == 2
+
+
+def test_added_and_deleted_keys_are_counted_by_their_fields():
+    result = calculate_json_accuracy(
+        {"a": 1, "b": {"c": 1, "d": 2}}, {"a": 1, "e": {"f": 1, "g": 2, "h": 3}}
+    )
+    assert set(result["jsonDiff"]) == {"b__deleted", "e__added"}
+    assert result["jsonDiffStats"] == {
+        "additions": 3,
+        "deletions": 2,
+        "modifications": 0,
+        "total": 5,
+    }
+    assert result["score"] == 0
+
+
+def test_count_changes_of_array_operations():
+    diff = {
+        "a": [
+            [" "],
+            ["-", 1],
+            ["+", 2],
+            ["+", {"b": 1, "c": 2}],
+            ["~", {"d": {"__old": 1, "__new": 2}}],
+        ]
+    }
+    assert count_changes(diff) == {
+        "additions": 3,
+        "deletions": 1,
+        "modifications": 1,
+        "total": 5,
+    }
+
+
+def test_ignore_cases():
+    actual = {"a": "Hello", "b": ["x"]}
+    predicted = {"a": "HELLO", "b": ["x"]}
+    assert calculate_json_accuracy(actual, predicted)["score"] == 0.5
+    assert calculate_json_accuracy(actual, predicted, ignore_cases=True)["score"] == 1
+
+
+@pytest.mark.parametrize(
+    "original,predicted,expected",
+    [
+        ("same text", "same text", 1),
+        # Empty strings
+        ("", "", 1),
+        ("", "text", 0),
+        ("text", "", 0),
+        # Case and surrounding whitespace are normalized
+        ("Hello World", "hello world", 1),
+        ("  hello\n", "hello", 1),
+        ("\tHELLO  ", "  hello\n\n", 1),
+        # Whitespace inside the text is not
+        ("hello world", "hello  world", 0.9167),
+        ("kitten", "sitting", 0.5714),
+    ],
+)
+def test_text_similarity(original, predicted, expected):
+    assert calculate_text_similarity(original, predicted) == expected
+
+
+def test_text_similarity_of_whitespace_only_texts_is_undefined():
+    # Both normalize to "", which is 0 / 0 in JavaScript
+    assert calculate_text_similarity("  ", "\n") is None
+
+
+def test_score_document_leaves_out_missing_inputs():
+    scores = score_document('{"a": 1, "b": 2}', {"a": 1, "b": 3}, None, "text")
+    assert scores["jsonAccuracy"] == 0.5
+    assert scores["jsonAccuracyResult"]["totalFields"] == 2
+    assert "levenshteinDistance" not in scores
+
+    scores = score_document({"a": 1}, None, "Text", "text")
+    assert scores == {"levenshteinDistance": 1}
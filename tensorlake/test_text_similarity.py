@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from text_similarity import (
+    banded_distance,
+    bounded_levenshtein_distance,
+    chunked_distance,
+    distance_lower_bound,
+    estimate_similarity,
+    levenshtein_distance,
+)
+
+# Few letters so random strings share many characters; the rest are outside
+# ASCII, including a character that takes two UTF-16 code units
+ALPHABET = "abc \n" + "éß日\U0001f600"
+
+# Around the 64-bit word boundary of the bit-parallel algorithms and beyond
+LENGTHS = [0, 1, 2, 5, 31, 63, 64, 65, 100, 127, 128, 129, 200, 300, 500]
+
+
+def naive_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        previous = current
+    return previous[-1]
+
+
+def random_text(rng, length):
+    return "".join(rng.choice(ALPHABET) for _ in range(length))
+
+
+def mutate(rng, text, edits):
+    chars = list(text)
+    for _ in range(edits):
+        position = rng.randint(0, len(chars))
+        operation = rng.choice(["insert", "delete", "replace"]) if chars else "insert"
+        if operation == "insert":
+            chars.insert(position, rng.choice(ALPHABET))
+        elif operation == "delete":
+            del chars[min(position, len(chars) - 1)]
+        else:
+            chars[min(position, len(chars) - 1)] = rng.choice(ALPHABET)
+    return "".join(chars)
+
+
+def pairs():
+    rng = random.Random(0)
+    cases = [("", ""), ("", "abc"), ("日本", ""), ("a" * 64, "a" * 65)]
+    for length in LENGTHS:
+        for _ in range(3):
+            a = random_text(rng, length)
+            # Similar texts (small distances, the banded path) and unrelated ones
+            cases.append((a, mutate(rng, a, rng.randint(0, max(1, length // 8)))))
+            cases.append((a, random_text(rng, rng.choice(LENGTHS))))
+    return cases
+
+
+PAIRS = pairs()
+
+
+@pytest.mark.parametrize("a,b", PAIRS)
+def test_exact_distances_match_naive_dp(a, b):
+    expected = naive_distance(a, b)
+    assert levenshtein_distance(a, b) == expected
+    assert levenshtein_distance(b, a) == expected
+    assert banded_distance(a, b) == expected
+    assert banded_distance(a, b, distance_lower_bound(a, b)) == expected
+    assert distance_lower_bound(a, b) <= expected
+
+
+@pytest.mark.parametrize("a,b", PAIRS)
+def test_bounded_distance_contract(a, b):
+    expected = naive_distance(a, b)
+    for k in sorted({0, 1, 3, expected - 1, expected, expected + 2, 40, 100}):
+        if k < 0:
+            continue
+        bounded = bounded_levenshtein_distance(a, b, k)
+        assert bounded == (expected if expected <= k else None), k
+        limited = banded_distance(a, b, max_distance=k)
+        assert limited == (expected if expected <= k else None), k
+
+
+@pytest.mark.parametrize("a,b", PAIRS)
+def test_chunked_distance_never_below_exact(a, b):
+    expected = naive_distance(a, b)
+    for chunk_size in (4, 16, 64, 2000):
+        assert chunked_distance(a, b, chunk_size) >= expected
+
+
+@pytest.mark.parametrize("a,b", PAIRS[::3])
+def test_estimates_bracket_the_exact_similarity(a, b):
+    exact = estimate_similarity(a, b)
+    if exact is None:
+        assert not a.strip() and not b.strip()
+        return
+    assert exact.exact
+    for options in (
+        {"mode": "approximate", "chunk_size": 16},
+        {"mode": "approximate", "chunk_size": 16, "max_error": 0.05},
+        {"min_similarity": 0.9},
+    ):
+        estimate = estimate_similarity(a, b, **options)
+        assert estimate.lower <= exact.similarity + 1e-12
+        assert exact.similarity <= estimate.upper + 1e-12
+        assert estimate.similarity == estimate.lower
@@ -0,0 +1,327 @@
+"""Levenshtein text similarity for long documents.
+
+calculateTextSimilarity compares whole documents, so exact scoring costs
+len(a) * len(b) / 64 big-int steps with the bit-parallel algorithm. This
+module keeps that result and adds cheaper ways to get to it:
+
+- exact: Ukkonen's band. Only diagonals within k of the main one are
+  computed, starting from a lower bound on the distance and doubling k until
+  the distance fits, so similar documents cost len * k / 64 instead.
+- exact with min_similarity: the same, but stops once the distance is known
+  to put the similarity below the threshold.
+- approximate: the original text is cut into chunks of about chunk_size
+  characters, each matched with the closest stretch of the prediction, and
+  the chunk distances summed, for len * chunk_size / 64. The sum is an upper
+  bound on the distance, so the similarity is never overstated, and character
+  counts give a lower bound. With max_error, documents whose bounds are
+  further apart than that are scored exactly instead.
+
+Lengths and positions are in UTF-16 code units, as in JavaScript.
+"""
+
+from collections import Counter
+from typing import NamedTuple, Optional
+
+MODES = ("exact", "approximate")
+
+DEFAULT_CHUNK_SIZE = 2000
+
+# Band width the doubling search starts from
+MIN_BAND = 64
+
+# Characters removed by JavaScript's String.prototype.trim
+JS_WHITESPACE = (
+    "\t\n\v\f\r \xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006"
+    "\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+)
+
+
+class SimilarityEstimate(NamedTuple):
+    """Similarity with the interval the exact value is known to be in.
+
+    similarity is the lower end of the interval, so an estimate never
+    overstates a model. exact is True when lower == upper was computed.
+    """
+
+    similarity: float
+    lower: float
+    upper: float
+    exact: bool
+
+
+def utf16_units(text):
+    """text with characters outside the BMP split into surrogate pairs"""
+    if text.isascii() or max(text) <= "\uffff":
+        return text
+    encoded = text.encode("utf-16-le", "surrogatepass")
+    return "".join(
+        chr(int.from_bytes(encoded[i : i + 2], "little"))
+        for i in range(0, len(encoded), 2)
+    )
+
+
+def normalize(text):
+    """The normalization calculateTextSimilarity applies before comparing"""
+    return utf16_units(text.strip(JS_WHITESPACE).lower())
+
+
+def levenshtein_distance(a, b):
+    """Edit distance with Myers' bit-parallel algorithm on arbitrary-size ints.
+
+    Each column of the dynamic programming matrix is a pair of bit vectors, so
+    the cost is len(b) big-int steps of len(a) / 64 words instead of
+    len(a) * len(b) Python operations.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if not b:
+        return len(a)
+
+    peq = {}
+    for index, char in enumerate(b):
+        peq[char] = peq.get(char, 0) | (1 << index)
+
+    m = len(b)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    for char in a:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return score
+
+
+def bounded_levenshtein_distance(a, b, max_distance):
+    """Edit distance if it is at most max_distance, otherwise None.
+
+    Hyyrö's bit vectors restricted to a band of 2 * max_distance + 1 rows
+    that moves down one row per column, so each step works on ints of the
+    band width rather than of the whole text. Cells outside the band are
+    replaced by upper bounds, which leaves every distance up to max_distance
+    exact (Ukkonen).
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    n, m = len(a), len(b)
+    k = max_distance
+    if k < 0 or n - m > k:
+        return None
+    width = 2 * k + 1
+    if width >= m:
+        distance = levenshtein_distance(a, b)
+        return distance if distance <= k else None
+
+    # Row i of b is bit i + k; rows -k..0 stand for the boundary row extended
+    # upwards, where D[i][j] = j - i. The band of column j is then bits
+    # j..j + 2k, read from blocks of at least the band width.
+    block = width
+    blocks = (m + 3 * k + 1) // block + 2
+    peq = {}
+    for row, char in enumerate(b, 1):
+        bits = peq.get(char)
+        if bits is None:
+            bits = peq[char] = [0] * blocks
+        position = row + k
+        bits[position // block] |= 1 << (position % block)
+
+    mask = (1 << width) - 1
+    top = 1 << (width - 1)
+    diagonal = 1 << k
+    # Column 0: +1 down to rows 1..k, -1 down to the rows above
+    vp = mask ^ ((1 << (k + 1)) - 1)
+    vn = (1 << (k + 1)) - 1
+    score = 0
+    for j in range(1, n + 1):
+        # Move the band down a row; the new bottom row starts as an upper bound
+        vp = (vp >> 1) | top
+        vn >>= 1
+        bits = peq.get(a[j - 1])
+        if bits is None:
+            eq = 0
+        else:
+            index, offset = divmod(j, block)
+            eq = ((bits[index] | (bits[index + 1] << block)) >> offset) & mask
+        d0 = ((((eq & vp) + vp) ^ vp) | eq | vn) & mask
+        hp = vn | (~(d0 | vp) & mask)
+        hn = d0 & vp
+        if j <= m:
+            # D[j][j] along the diagonal
+            if not d0 & diagonal:
+                score += 1
+        else:
+            # Then D[m][j] along the last row
+            row = 1 << (k - (j - m))
+            if hp & row:
+                score += 1
+            elif hn & row:
+                score -= 1
+        hp = ((hp << 1) | 1) & mask
+        hn = (hn << 1) & mask
+        vp = hn | (~(d0 | hp) & mask)
+        vn = d0 & hp
+    return score if score <= k else None
+
+
+def distance_lower_bound(a, b):
+    """Characters one text has more of than the other; each edit fixes one"""
+    counts = Counter(a)
+    counts.subtract(Counter(b))
+    surplus = sum(count for count in counts.values() if count > 0)
+    deficit = -sum(count for count in counts.values() if count < 0)
+    return max(surplus, deficit)
+
+
+def banded_distance(a, b, lower_bound=0, max_distance=None):
+    """Exact edit distance, doubling the band from lower_bound until it fits.
+
+    With max_distance, returns None as soon as the distance is known to be
+    larger.
+    """
+    longest = max(len(a), len(b))
+    limit = longest if max_distance is None else min(max_distance, longest)
+    band = max(lower_bound, MIN_BAND)
+    while True:
+        band = min(band, limit)
+        distance = bounded_levenshtein_distance(a, b, band)
+        if distance is not None or band >= limit:
+            return distance
+        band *= 2
+
+
+def _closest_prefix(pattern, text, expected):
+    """(distance, end) of the prefix of text with the smallest edit distance
+    to pattern, preferring ends near expected.
+
+    Myers' score is the last row of the matrix, i.e. the distance from
+    pattern to every prefix of text in turn.
+    """
+    peq = {}
+    for index, char in enumerate(pattern):
+        peq[char] = peq.get(char, 0) | (1 << index)
+
+    m = len(pattern)
+    mask = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv = mask
+    mv = 0
+    score = m
+    best = (m, 0)
+    for end, char in enumerate(text, 1):
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        if score < best[0] or (
+            score == best[0] and abs(end - expected) < abs(best[1] - expected)
+        ):
+            best = (score, end)
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+    return best
+
+
+def chunked_distance(a, b, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Upper bound on the edit distance from aligned chunks.
+
+    a is cut at the first line break after every chunk_size characters. Each
+    chunk is matched with the prefix of the rest of b closest to it, looked
+    for up to a quarter chunk past where the lengths so far put its end.
+    Editing every chunk into its counterpart edits a into b, so the sum of
+    the chunk distances is never below the distance.
+    """
+    if not a or not b:
+        return max(len(a), len(b))
+    distance = 0
+    previous_a = previous_b = 0
+    while len(a) - previous_a > chunk_size:
+        cut = previous_a + chunk_size
+        line_break = a.find("\n", cut, cut + chunk_size // 4)
+        if line_break != -1:
+            cut = line_break + 1
+        expected = round(
+            (cut - previous_a) * (len(b) - previous_b) / (len(a) - previous_a)
+        )
+        window = b[previous_b : previous_b + expected + chunk_size // 4]
+        chunk_distance, end = _closest_prefix(a[previous_a:cut], window, expected)
+        distance += chunk_distance
+        previous_a, previous_b = cut, previous_b + end
+    return distance + levenshtein_distance(a[previous_a:], b[previous_b:])
+
+
+def estimate_similarity(
+    original,
+    predicted,
+    mode="exact",
+    min_similarity=None,
+    max_error=None,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+) -> Optional[SimilarityEstimate]:
+    """1 - edit distance / longer length of two normalized texts.
+
+    Returns None when both are empty after normalization. In approximate
+    mode, max_error is the widest interval accepted before falling back to
+    the exact distance; None accepts any. With min_similarity, similarities
+    found to be below it come back as an inexact estimate whose upper end is
+    below min_similarity.
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown text similarity mode {mode!r}, expected {MODES}")
+    a = normalize(original)
+    b = normalize(predicted)
+    longest = max(len(a), len(b))
+    if not longest:
+        return None
+    if a == b:
+        return SimilarityEstimate(1.0, 1.0, 1.0, True)
+
+    def similarity(distance):
+        return 1 - distance / longest
+
+    lower_bound = distance_lower_bound(a, b)
+    upper_bound = None
+    if mode == "approximate" and len(a) > chunk_size:
+        upper_bound = chunked_distance(a, b, chunk_size)
+        estimate = SimilarityEstimate(
+            similarity(upper_bound),
+            similarity(upper_bound),
+            similarity(lower_bound),
+            upper_bound == lower_bound,
+        )
+        if max_error is None or estimate.upper - estimate.lower <= max_error:
+            return estimate
+
+    floor = similarity(longest if upper_bound is None else upper_bound)
+    max_distance = upper_bound
+    if min_similarity is not None:
+        threshold = int((1 - min_similarity) * longest)
+        if lower_bound > threshold:
+            return SimilarityEstimate(floor, floor, similarity(lower_bound), False)
+        if max_distance is None or threshold < max_distance:
+            max_distance = threshold
+
+    distance = banded_distance(a, b, lower_bound, max_distance)
+    if distance is None:
+        # Past min_similarity: the distance is at least max_distance + 1
+        ceiling = similarity(max(lower_bound, max_distance + 1))
+        return SimilarityEstimate(floor, floor, ceiling, False)
+    return SimilarityEstimate(*[similarity(distance)] * 3, True)
@@ -0,0 +1,180 @@
+"""Speed and accuracy of the text similarity modes against exact scoring.
+
+Documents come from the runner's output JSONL, plain or .jsonl.zst
+(true_markdown_output and predictedMarkdown) or a TypeScript benchmark results.json (trueMarkdown and
+predictedMarkdown). OmniOCR documents are single pages, so --pages joins
+consecutive documents into multi-page ones. Without inputs, synthetic
+documents with OCR-like edits are used:
+
+    python tensorlake/text_similarity_benchmark.py tensorlake_metadata_with_predictions.jsonl --pages 20
+    python tensorlake/text_similarity_benchmark.py results/2025-01-01T00-00-00/results.json
+    python tensorlake/text_similarity_benchmark.py --synthetic 20 --synthetic-chars 100000
+
+Every mode is compared with the full bit-parallel distance (the previous
+scoring) on the same documents: total time, speedup, and the error of the
+reported similarity, which never exceeds the exact one.
+"""
+
+import json
+import time
+import random
+import argparse
+from pathlib import Path
+from typing import List, Tuple
+
+from payload_codec import read_jsonl
+from text_similarity import (
+    DEFAULT_CHUNK_SIZE,
+    estimate_similarity,
+    levenshtein_distance,
+    normalize,
+)
+
+# (label, estimate_similarity keyword arguments)
+MODES = [
+    ("exact (banded)", {"mode": "exact"}),
+    ("approximate, chunks of 1000", {"mode": "approximate", "chunk_size": 1000}),
+    (
+        f"approximate, chunks of {DEFAULT_CHUNK_SIZE}",
+        {"mode": "approximate", "chunk_size": DEFAULT_CHUNK_SIZE},
+    ),
+    ("approximate, chunks of 8000", {"mode": "approximate", "chunk_size": 8000}),
+    ("approximate, max error 0.01", {"mode": "approximate", "max_error": 0.01}),
+]
+
+WORDS = (
+    "invoice total amount date customer account number description quantity "
+    "price tax due payment reference order shipping address balance statement"
+).split()
+
+Pair = Tuple[str, str]
+
+
+def load_documents(paths: List[Path]) -> List[Pair]:
+    pairs = []
+    for path in paths:
+        if path.name.endswith((".jsonl", ".jsonl.zst")):
+            records = list(read_jsonl(path))
+            keys = ("true_markdown_output", "predictedMarkdown")
+        else:
+            with open(path) as f:
+                records = json.load(f)
+            keys = ("trueMarkdown", "predictedMarkdown")
+        pairs.extend(
+            (record[keys[0]], record[keys[1]])
+            for record in records
+            if record.get(keys[0]) and record.get(keys[1])
+        )
+    return pairs
+
+
+def join_pages(pairs: List[Pair], pages: int) -> List[Pair]:
+    """Consecutive documents joined into documents of `pages` pages"""
+    return [
+        (
+            "\n\n".join(true for true, _ in pairs[i : i + pages]),
+            "\n\n".join(predicted for _, predicted in pairs[i : i + pages]),
+        )
+        for i in range(0, len(pairs), pages)
+    ]
+
+
+def _synthetic_page(rng: random.Random) -> str:
+    lines = [f"## {rng.choice(WORDS).title()} {rng.randint(1, 99)}"]
+    for _ in range(rng.randint(10, 30)):
+        if rng.random() < 0.3:
+            cells = [rng.choice(WORDS) for _ in range(4)]
+            cells.append(f"{rng.uniform(0, 10_000):.2f}")
+            lines.append("| " + " | ".join(cells) + " |")
+        else:
+            lines.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 16))))
+    return "\n".join(lines)
+
+
+def _ocr_edits(text: str, rate: float, rng: random.Random) -> str:
+    """Character substitutions, insertions and deletions, plus dropped lines"""
+    lines = [line for line in text.split("\n") if rng.random() >= rate / 4]
+    out = []
+    for char in "\n".join(lines):
+        r = rng.random()
+        if r < rate / 3:
+            continue
+        if r < 2 * rate / 3:
+            out.append(rng.choice("il1oO0rn m.,|"))
+        elif r < rate:
+            out.append(char + rng.choice(" .,"))
+        else:
+            out.append(char)
+    return "".join(out)
+
+
+def synthetic_documents(count: int, chars: int, seed: int) -> List[Pair]:
+    rng = random.Random(seed)
+    pairs = []
+    for _ in range(count):
+        pages = []
+        while sum(map(len, pages)) < chars:
+            pages.append(_synthetic_page(rng))
+        true = "\n\n".join(pages)
+        pairs.append((true, _ocr_edits(true, rng.choice([0.01, 0.05, 0.15]), rng)))
+    return pairs
+
+
+def full_similarity(true: str, predicted: str) -> float:
+    a, b = normalize(true), normalize(predicted)
+    longest = max(len(a), len(b))
+    return 1 - levenshtein_distance(a, b) / longest if longest else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("inputs", nargs="*", type=Path, help="JSONL or results.json")
+    parser.add_argument(
+        "--pages", type=int, default=1, help="consecutive documents joined into one"
+    )
+    parser.add_argument(
+        "--synthetic", type=int, default=10, help="synthetic documents without inputs"
+    )
+    parser.add_argument("--synthetic-chars", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.inputs:
+        pairs = join_pages(load_documents(args.inputs), args.pages)
+    else:
+        pairs = synthetic_documents(args.synthetic, args.synthetic_chars, args.seed)
+    if not pairs:
+        parser.error("no documents with both true and predicted markdown")
+    characters = sum(len(true) + len(predicted) for true, predicted in pairs)
+    print(
+        f"{len(pairs)} documents, {characters / len(pairs) / 2:,.0f} characters "
+        "per side on average"
+    )
+
+    start = time.perf_counter()
+    exact = [full_similarity(true, predicted) for true, predicted in pairs]
+    baseline = time.perf_counter() - start
+    print(f"\n{'mode':<32}{'seconds':>9}{'speedup':>9}{'mean err':>10}{'max err':>10}")
+    print(f"{'full distance':<32}{baseline:>9.2f}{1:>9.1f}{0:>10.5f}{0:>10.5f}")
+
+    for label, options in MODES:
+        start = time.perf_counter()
+        estimates = [
+            estimate_similarity(true, predicted, **options) for true, predicted in pairs
+        ]
+        elapsed = time.perf_counter() - start
+        errors = [
+            value - estimate.similarity
+            for value, estimate in zip(exact, estimates)
+            if estimate is not None
+        ]
+        # The reported similarity is a lower bound on the exact one
+        assert all(error >= -1e-12 for error in errors), label
+        print(
+            f"{label:<32}{elapsed:>9.2f}{baseline / elapsed:>9.1f}"
+            f"{sum(errors) / len(errors):>10.5f}{max(errors):>10.5f}"
+        )
+
+
+if __name__ == "__main__":
+    main()